@@ -0,0 +1,471 @@
+import gzip
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import time
+from typing import Callable, Dict, List
+from urllib.parse import urlparse, parse_qs
+
+from pygrocy.grocy import Product, Chore, ShoppingListProduct
+from pygrocy.utils import parse_int
+
+from grocy_telegram_bot.cache import GrocyCached
+from grocy_telegram_bot.const import NEVER_EXPIRES_DATE
+from grocy_telegram_bot.events import EventBroker
+from grocy_telegram_bot.stats import API_REQUEST_COUNT
+from grocy_telegram_bot.util import create_hash, filter_overdue_chores
+
+LOGGER = logging.getLogger(__name__)
+
+LIST_INVENTORY = "inventory"
+LIST_EXPIRING = "expiring"
+LIST_OVERDUE_CHORES = "overdue_chores"
+LIST_SHOPPING_LIST = "shopping_list"
+
+# url path -> name of the list served on it
+API_PATHS = {
+    "/api/inventory": LIST_INVENTORY,
+    "/api/expiring": LIST_EXPIRING,
+    "/api/chores/overdue": LIST_OVERDUE_CHORES,
+    "/api/shopping_list": LIST_SHOPPING_LIST,
+}
+
+EVENTS_PATH = "/api/events"
+EVENT_FORMAT_SSE = "sse"
+EVENT_FORMAT_NDJSON = "ndjson"
+EVENT_FORMATS = [EVENT_FORMAT_SSE, EVENT_FORMAT_NDJSON]
+# time between two keepalive messages on an idle event stream, in seconds
+EVENT_KEEPALIVE_INTERVAL = 15
+# time clients should wait before reconnecting to the event stream, in milliseconds
+EVENT_RETRY_INTERVAL = 3000
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+# responses smaller than this are not worth compressing
+GZIP_MIN_SIZE = 1024
+# number of encoded pages kept per snapshot
+MAX_CACHED_PAGES = 32
+
+
+def product_to_json(product: Product) -> dict:
+    """
+    :param product: the product
+    :return: json serializable representation of the product
+    """
+    best_before_date = None
+    if product.best_before_date is not None and product.best_before_date.date() < NEVER_EXPIRES_DATE:
+        best_before_date = product.best_before_date.date().isoformat()
+    return {
+        "id": product.id,
+        "name": product.name,
+        "amount": parse_int(product.available_amount, 0),
+        "best_before_date": best_before_date,
+    }
+
+
+def chore_to_json(chore: Chore) -> dict:
+    """
+    :param chore: the chore
+    :return: json serializable representation of the chore
+    """
+    next_execution_time = chore.next_estimated_execution_time
+    return {
+        "id": chore.id,
+        "name": chore.name,
+        "next_estimated_execution_time": None if next_execution_time is None else next_execution_time.isoformat(),
+    }
+
+
+def shopping_list_item_to_json(item: ShoppingListProduct) -> dict:
+    """
+    :param item: the shopping list item
+    :return: json serializable representation of the shopping list item
+    """
+    return {
+        "id": item.id,
+        "product_id": item.product_id,
+        "name": item.product.name if item.product is not None else None,
+        "amount": parse_int(item.amount, item.amount),
+        "note": item.note,
+    }
+
+
+def create_snapshot_loaders(grocy: GrocyCached) -> Dict[str, Callable[[], List[dict]]]:
+    """
+    Creates the functions loading the lists served by the api.
+    They use the cached Grocy client, so they share responses with the bot commands and the prewarmer.
+    :param grocy: the cached Grocy client
+    :return: list name -> function returning the current items of the list
+    """
+
+    def inventory() -> List[dict]:
+        # stock entries come first and contain all details, skip their duplicates in the volatile stock
+        products = {}
+        for product in grocy.get_all_products():
+            products.setdefault(product.id, product)
+        return list(map(product_to_json, sorted(products.values(), key=lambda x: (x.name or "").lower())))
+
+    def expiring() -> List[dict]:
+        expired = grocy.expired_products(True)
+        expired_ids = set(map(lambda x: x.id, expired))
+        products = expired + list(filter(lambda x: x.id not in expired_ids, grocy.expiring_products(True)))
+        products = sorted(products, key=lambda x: x.best_before_date or datetime.max.replace(tzinfo=timezone.utc))
+        return [{**product_to_json(product), "expired": product.id in expired_ids} for product in products]
+
+    def overdue_chores() -> List[dict]:
+        chores = sorted(filter_overdue_chores(grocy.chores(True)), key=lambda x: x.next_estimated_execution_time)
+        return list(map(chore_to_json, chores))
+
+    def shopping_list() -> List[dict]:
+        return list(map(shopping_list_item_to_json, grocy.shopping_list(True)))
+
+    return {
+        LIST_INVENTORY: inventory,
+        LIST_EXPIRING: expiring,
+        LIST_OVERDUE_CHORES: overdue_chores,
+        LIST_SHOPPING_LIST: shopping_list,
+    }
+
+
+class Page:
+    """
+    An encoded page of a snapshot
+    """
+
+    def __init__(self, etag: str, body: bytes):
+        self.etag = etag
+        self.body = body
+        self._gzip_body = None
+
+    @property
+    def gzip_body(self) -> bytes:
+        """
+        The gzip compressed body, compressed on first use
+        """
+        if self._gzip_body is None:
+            self._gzip_body = gzip.compress(self.body)
+        return self._gzip_body
+
+
+class Snapshot:
+    """
+    The items of a list at one point in time, along with the pages already encoded from them
+    """
+
+    def __init__(self, items: List[dict], created_at: float, generation: int):
+        """
+        :param items: json serializable items
+        :param created_at: time the items have been loaded at
+        :param generation: invalidation generation of the store the items have been loaded in
+        """
+        self.items = items
+        self.created_at = created_at
+        self.generation = generation
+        # based on the content, so unchanged items keep their etag when the snapshot is refreshed
+        self.version = create_hash(json.dumps(items, sort_keys=True).encode())
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def page(self, offset: int, limit: int) -> Page:
+        """
+        :param offset: index of the first item
+        :param limit: maximum number of items
+        :return: the encoded page
+        """
+        key = (offset, limit)
+        with self._lock:
+            page = self._pages.get(key, None)
+            if page is not None:
+                self._pages.move_to_end(key)
+                return page
+
+        body = json.dumps({
+            "items": self.items[offset:offset + limit],
+            "total": len(self.items),
+            "offset": offset,
+            "limit": limit,
+        }, ensure_ascii=False).encode()
+        page = Page(f'"{self.version}-{offset}-{limit}"', body)
+
+        with self._lock:
+            self._pages[key] = page
+            while len(self._pages) > MAX_CACHED_PAGES:
+                self._pages.popitem(last=False)
+        return page
+
+
+class SnapshotStore:
+    """
+    Keeps the latest snapshot of every list and refreshes it once it is older than the cache duration,
+    or a write call has invalidated the cache. Concurrent requests for an outdated snapshot wait for a single refresh,
+    so any number of clients polling the api results in at most one Grocy request per list and cache duration.
+    """
+
+    def __init__(self, loaders: Dict[str, Callable[[], List[dict]]], max_age: float):
+        """
+        :param loaders: list name -> function returning the current items of the list
+        :param max_age: maximum age of a snapshot in seconds
+        """
+        self._loaders = loaders
+        self._max_age = max_age
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._locks = {name: threading.Lock() for name in loaders}
+        self._generation = 0
+
+    def invalidate(self):
+        """
+        Marks all snapshots as outdated
+        """
+        self._generation += 1
+
+    def get(self, name: str) -> Snapshot:
+        """
+        Returns the latest snapshot of a list, refreshing it if necessary.
+        If the refresh fails, the previous snapshot (if any) is returned.
+        :param name: name of the list
+        :return: the snapshot
+        """
+        with self._locks[name]:
+            snapshot = self._snapshots.get(name, None)
+            if snapshot is not None and not self._is_outdated(snapshot):
+                return snapshot
+
+            generation = self._generation
+            try:
+                items = self._loaders[name]()
+            except Exception:
+                if snapshot is None:
+                    raise
+                LOGGER.warning(f"Error refreshing {name} snapshot, serving the previous one", exc_info=True)
+                return snapshot
+
+            refreshed = Snapshot(items, time(), generation)
+            if snapshot is not None and snapshot.version == refreshed.version:
+                # keep the pages which have already been encoded
+                snapshot.created_at = refreshed.created_at
+                snapshot.generation = generation
+                return snapshot
+            self._snapshots[name] = refreshed
+            return refreshed
+
+    def _is_outdated(self, snapshot: Snapshot) -> bool:
+        return snapshot.generation != self._generation or time() - snapshot.created_at > self._max_age
+
+
+def _accepts_gzip(accept_encoding: str or None) -> bool:
+    """
+    :param accept_encoding: value of the Accept-Encoding header
+    :return: true if the client accepts gzip encoded responses, false otherwise
+    """
+    if accept_encoding is None:
+        return False
+    for encoding in accept_encoding.split(","):
+        name, _, params = encoding.strip().partition(";")
+        if name.strip().lower() not in ["gzip", "*"]:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        return quality > 0
+    return False
+
+
+def _matches_etag(if_none_match: str or None, etag: str) -> bool:
+    """
+    :param if_none_match: value of the If-None-Match header
+    :param etag: the current etag
+    :return: true if the client already has the current version, false otherwise
+    """
+    if if_none_match is None:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag == etag or tag == f"W/{etag}":
+            return True
+    return False
+
+
+class _ApiRequestHandler(BaseHTTPRequestHandler):
+    server: "ApiServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") == EVENTS_PATH and self.server.events is not None:
+            self._stream_events(parse_qs(url.query))
+            return
+
+        name = API_PATHS.get(url.path.rstrip("/"), None)
+        if name is None:
+            self._respond_error(HTTPStatus.NOT_FOUND, "unknown", "Not found")
+            return
+
+        try:
+            query = parse_qs(url.query)
+            offset = int(query.get("offset", [0])[0])
+            limit = int(query.get("limit", [DEFAULT_PAGE_LIMIT])[0])
+            if offset < 0 or not 1 <= limit <= MAX_PAGE_LIMIT:
+                raise ValueError()
+        except ValueError:
+            self._respond_error(HTTPStatus.BAD_REQUEST, name,
+                                f"offset must be >= 0 and limit between 1 and {MAX_PAGE_LIMIT}")
+            return
+
+        try:
+            page = self.server.snapshots.get(name).page(offset, limit)
+        except Exception:
+            LOGGER.exception(f"Error loading {name}")
+            self._respond_error(HTTPStatus.SERVICE_UNAVAILABLE, name, "Grocy is not available")
+            return
+
+        if _matches_etag(self.headers.get("If-None-Match", None), page.etag):
+            API_REQUEST_COUNT.labels(endpoint=name, status=HTTPStatus.NOT_MODIFIED.value).inc()
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", page.etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+
+        body = page.body
+        compress = len(body) >= GZIP_MIN_SIZE and _accepts_gzip(self.headers.get("Accept-Encoding", None))
+        if compress:
+            body = page.gzip_body
+
+        API_REQUEST_COUNT.labels(endpoint=name, status=HTTPStatus.OK.value).inc()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", page.etag)
+        # clients may keep the response, but have to revalidate it using its etag
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_events(self, query: dict):
+        """
+        Streams events as server-sent events, or newline delimited json, until the client disconnects
+        """
+        event_format = query.get("format", [None])[0]
+        if event_format is None:
+            accept = self.headers.get("Accept", "") or ""
+            event_format = EVENT_FORMAT_NDJSON if "application/x-ndjson" in accept else EVENT_FORMAT_SSE
+
+        # EventSource clients send the id of the last received event when reconnecting
+        after = query.get("after", [self.headers.get("Last-Event-ID", None)])[0]
+        try:
+            if event_format not in EVENT_FORMATS:
+                raise ValueError()
+            after = int(after) if after not in [None, ""] else None
+        except ValueError:
+            self._respond_error(HTTPStatus.BAD_REQUEST, "events",
+                                f"format must be one of {EVENT_FORMATS} and after a sequence number")
+            return
+
+        subscription, missed, complete = self.server.events.subscribe(after)
+        try:
+            API_REQUEST_COUNT.labels(endpoint="events", status=HTTPStatus.OK.value).inc()
+            self.send_response(HTTPStatus.OK)
+            if event_format == EVENT_FORMAT_SSE:
+                self.send_header("Content-Type", "text/event-stream")
+            else:
+                self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            if event_format == EVENT_FORMAT_SSE:
+                self.wfile.write(f"retry: {EVENT_RETRY_INTERVAL}\n\n".encode())
+            if not complete:
+                # the client has missed events which aren't available anymore and has to fetch the current state
+                self._write_event(event_format, "gap", {"type": "gap", "after": after,
+                                                        "last_seq": self.server.events.last_seq})
+            for event in missed:
+                self._write_event(event_format, event.type, event.to_json(), event.seq)
+
+            while True:
+                events = subscription.get(timeout=EVENT_KEEPALIVE_INTERVAL)
+                if len(events) <= 0:
+                    if subscription.closed:
+                        # the client resumes from its last event when reconnecting
+                        break
+                    self.wfile.write(b": keepalive\n\n" if event_format == EVENT_FORMAT_SSE else b"\n")
+                for event in events:
+                    self._write_event(event_format, event.type, event.to_json(), event.seq)
+        except (BrokenPipeError, ConnectionResetError):
+            LOGGER.debug("Event stream client disconnected")
+        finally:
+            subscription.close()
+
+    def _write_event(self, event_format: str, type: str, data: dict, seq: int = None):
+        body = json.dumps(data, ensure_ascii=False)
+        if event_format == EVENT_FORMAT_NDJSON:
+            self.wfile.write(f"{body}\n".encode())
+            return
+        lines = [] if seq is None else [f"id: {seq}"]
+        lines.extend([f"event: {type}", f"data: {body}", "", ""])
+        self.wfile.write("\n".join(lines).encode())
+
+    def _respond_error(self, status: HTTPStatus, endpoint: str, message: str):
+        API_REQUEST_COUNT.labels(endpoint=endpoint, status=status.value).inc()
+        body = json.dumps({"error": message}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args):
+        LOGGER.debug(f"{self.address_string()} - {format % args}")
+
+
+class ApiServer(ThreadingHTTPServer):
+    """
+    HTTP server serving a read-only json api of the inventory, expiring products, overdue chores and shopping list.
+    Lists are served from snapshots, see SnapshotStore, and support pagination (offset and limit query parameters),
+    conditional requests (ETag and If-None-Match) and gzip compression.
+    Changes detected by the monitor are streamed as server-sent events or newline delimited json.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, listen: str, port: int, snapshots: SnapshotStore, events: EventBroker = None):
+        """
+        :param listen: address to listen on
+        :param port: port to listen on
+        :param snapshots: the snapshots to serve
+        :param events: the events to stream, if any
+        """
+        self.snapshots = snapshots
+        self.events = events
+        self._thread = None
+        super().__init__((listen, port), _ApiRequestHandler)
+
+    def start(self):
+        """
+        Starts serving requests on a background thread
+        """
+        LOGGER.debug(f"Serving api on {self.server_address}")
+        self._thread = threading.Thread(target=self.serve_forever, name="api", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        """
+        Stops serving requests and releases all resources
+        """
+        if self._thread is not None:
+            super().shutdown()
+            self._thread = None
+        self.server_close()
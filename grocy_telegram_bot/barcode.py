@@ -0,0 +1,35 @@
+import importlib.util
+import logging
+from io import BytesIO
+from typing import List
+
+LOGGER = logging.getLogger(__name__)
+
+
+def is_barcode_decoding_available() -> bool:
+    """
+    :return: True if the optional dependencies to decode barcodes from images are installed
+    """
+    return all(map(lambda x: importlib.util.find_spec(x) is not None, ["pyzbar", "PIL"]))
+
+
+def decode_barcodes(image_data: bytes) -> List[str]:
+    """
+    Decodes all barcodes found in an image, locally using zbar.
+    Requires the optional "pyzbar" and "Pillow" packages.
+    :param image_data: the image data
+    :return: list of decoded barcodes
+    """
+    from PIL import Image
+    from pyzbar.pyzbar import decode
+
+    with Image.open(BytesIO(image_data)) as image:
+        results = decode(image)
+
+    barcodes = []
+    for result in results:
+        barcode = result.data.decode("utf-8", errors="ignore")
+        if barcode not in barcodes:
+            barcodes.append(barcode)
+    LOGGER.debug(f"Decoded barcodes: {barcodes}")
+    return barcodes
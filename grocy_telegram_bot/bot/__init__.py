@@ -1,31 +1,57 @@
 import logging
+import threading
 from datetime import timedelta
+from time import time
+from typing import Tuple, Dict
 
-from telegram import Update, ParseMode
+from telegram import Update, ParseMode, Bot
 from telegram.ext import CommandHandler, Filters, MessageHandler, Updater, \
-    CallbackContext, CallbackQueryHandler
+    CallbackContext, CallbackQueryHandler, Handler
 from telegram_click.decorator import command
 
+from grocy_telegram_bot.api import ApiServer, SnapshotStore, create_snapshot_loaders
+from grocy_telegram_bot.bot.executor import ChatOrderedExecutor
 from grocy_telegram_bot.bot.inline_keyboard_handler import InlineKeyboardHandler
 from grocy_telegram_bot.bot.reply_keyboard_handler import ReplyKeyboardHandler
-from grocy_telegram_bot.cache import GrocyCached
+from grocy_telegram_bot.bot.request import InstrumentedRequest, handling_update, last_success_time
+from grocy_telegram_bot.bot.state import InteractionStateStore
+from grocy_telegram_bot.bot.webhook import WebhookServer
+from grocy_telegram_bot.cache import GrocyCached, add_invalidation_listener, remove_invalidation_listener
+from grocy_telegram_bot.commands.barcode import BarcodeCommandHandler
+from grocy_telegram_bot.commands.batch import BatchCommandHandler
 from grocy_telegram_bot.commands.chore import ChoreCommandHandler
 from grocy_telegram_bot.commands.config import ConfigCommandHandler
+from grocy_telegram_bot.commands.export import ExportCommandHandler
 from grocy_telegram_bot.commands.help import HelpCommandHandler
+from grocy_telegram_bot.commands.image import ImageCommandHandler
+from grocy_telegram_bot.commands.inline_query import InlineQueryCommandHandler
 from grocy_telegram_bot.commands.inventory import InventoryCommandHandler
+from grocy_telegram_bot.commands.product_action import ProductActionCommandHandler
+from grocy_telegram_bot.commands.profile import ProfileCommandHandler
 from grocy_telegram_bot.commands.shopping_list import ShoppingListCommandHandler
 from grocy_telegram_bot.commands.stats import StatsCommandHandler
+from grocy_telegram_bot.commands.trace import TraceCommandHandler
 from grocy_telegram_bot.commands.version import VersionCommandHandler
 from grocy_telegram_bot.config import Config
 from grocy_telegram_bot.const import *
+from grocy_telegram_bot.events import EventBroker
+from grocy_telegram_bot.grocy_client import grocy_status
+from grocy_telegram_bot.health import add_readiness_check, remove_readiness_check, format_time
 from grocy_telegram_bot.monitoring.monitor import Monitor
 from grocy_telegram_bot.notifier import Notifier
 from grocy_telegram_bot.permissions import CONFIG_ADMINS
+from grocy_telegram_bot.prewarm import CachePrewarmer
 from grocy_telegram_bot.stats import COMMAND_TIME_START
+from grocy_telegram_bot.tracing import RingBufferExporter, JsonLinesExporter, add_exporter, trace, record_span, \
+    instrument_telegram_click
 from grocy_telegram_bot.util import send_message, flatten
+from grocy_telegram_bot.write_queue import GrocyWriteQueue
 
 LOGGER = logging.getLogger(__name__)
 
+# maximum time since the last successful poll for updates, until polling is considered dead
+POLLING_TIMEOUT_SECONDS = 60
+
 
 class GrocyTelegramBot:
     """
@@ -44,24 +70,70 @@ class GrocyTelegramBot:
             api_key=config.GROCY_API_KEY.value,
             port=config.GROCY_PORT.value)
 
-        self._response_handler = ReplyKeyboardHandler()
-        self._keyboard_handler = InlineKeyboardHandler()
+        self._trace_buffer = None
+        if config.TRACING_ENABLED.value:
+            self._trace_buffer = RingBufferExporter(config.TRACING_BUFFER_SIZE.value)
+            add_exporter(self._trace_buffer)
+            if config.TRACING_FILE.value is not None:
+                add_exporter(JsonLinesExporter(config.TRACING_FILE.value))
+            instrument_telegram_click()
+        # time the dispatcher started processing the current update, used to trace handler selection
+        self._dispatch_state = threading.local()
+        # update id -> time the update was received, by polling or by the webhook server
+        self._received_at: Dict[int, float] = {}
+
+        self._prewarmer = None
+        if config.GROCY_CACHE_PREWARM.value:
+            self._prewarmer = CachePrewarmer(self._grocy)
+
+        self._snapshot_store = None
+        self._events = None
+        self._api_server = None
+        if config.API_ENABLED.value:
+            self._snapshot_store = SnapshotStore(create_snapshot_loaders(self._grocy),
+                                                 max_age=config.GROCY_CACHE_DURATION.value.total_seconds())
+            self._events = EventBroker()
 
-        self._updater = Updater(token=self._config.TELEGRAM_BOT_TOKEN.value, use_context=True)
+        self._state_store = InteractionStateStore(
+            max_entries=self._config.BOT_STATE_MAX_ENTRIES.value,
+            ttl=self._config.BOT_STATE_TIME_TO_LIVE.value,
+            file_path=self._config.BOT_STATE_FILE.value)
+        self._response_handler = ReplyKeyboardHandler(self._state_store)
+        self._keyboard_handler = InlineKeyboardHandler(self._state_store)
+
+        # the connection pool has to fit the threads of the updater, the dispatcher and our handler workers
+        request = InstrumentedRequest(con_pool_size=self._config.BOT_WORKERS.value + 8)
+        bot = Bot(token=self._config.TELEGRAM_BOT_TOKEN.value,
+                  base_url=self._config.TELEGRAM_BASE_URL.value,
+                  request=request)
+        self._updater = Updater(bot=bot, use_context=True)
         LOGGER.debug("Using bot id '{}' ({})".format(self._updater.bot.id, self._updater.bot.name))
 
         self._dispatcher = self._updater.dispatcher
+        self._executor = ChatOrderedExecutor(workers=self._config.BOT_WORKERS.value)
+
+        self._write_queue = GrocyWriteQueue(delay=self._config.BOT_SHOPPING_WRITE_DELAY.value)
 
-        self._help_command_handler = HelpCommandHandler(self._config, self._grocy, self._response_handler,
-                                                        self._keyboard_handler)
+        command_handler_args = (self._config, self._grocy, self._response_handler, self._keyboard_handler,
+                                self._write_queue)
+        self._help_command_handler = HelpCommandHandler(*command_handler_args)
         self._grocy_command_handlers = [
-            ChoreCommandHandler(self._config, self._grocy, self._response_handler, self._keyboard_handler),
-            ConfigCommandHandler(self._config, self._grocy, self._response_handler, self._keyboard_handler),
+            BarcodeCommandHandler(*command_handler_args),
+            ChoreCommandHandler(*command_handler_args),
+            ConfigCommandHandler(*command_handler_args),
+            ExportCommandHandler(*command_handler_args),
             self._help_command_handler,
-            InventoryCommandHandler(self._config, self._grocy, self._response_handler, self._keyboard_handler),
-            ShoppingListCommandHandler(self._config, self._grocy, self._response_handler, self._keyboard_handler),
-            StatsCommandHandler(self._config, self._grocy, self._response_handler, self._keyboard_handler),
-            VersionCommandHandler(self._config, self._grocy, self._response_handler, self._keyboard_handler)
+            ImageCommandHandler(*command_handler_args),
+            InlineQueryCommandHandler(*command_handler_args),
+            # has to be registered before the inventory and shopping list commands
+            BatchCommandHandler(*command_handler_args),
+            InventoryCommandHandler(*command_handler_args),
+            ProductActionCommandHandler(*command_handler_args),
+            ProfileCommandHandler(*command_handler_args),
+            ShoppingListCommandHandler(*command_handler_args),
+            StatsCommandHandler(*command_handler_args),
+            TraceCommandHandler(*command_handler_args, trace_buffer=self._trace_buffer),
+            VersionCommandHandler(*command_handler_args)
         ]
 
         command_handlers = flatten(list(map(lambda x: x.command_handlers(), self._grocy_command_handlers)))
@@ -92,35 +164,219 @@ class GrocyTelegramBot:
 
         for group, handlers in handler_groups.items():
             for handler in handlers:
+                self._run_on_executor(handler)
                 self._updater.dispatcher.add_handler(handler, group=group)
 
+        update_queue = self._updater.update_queue
+        put = update_queue.put
+
+        def put_timed(update, *args, **kwargs):
+            if isinstance(update, Update):
+                self._received_at[update.update_id] = time()
+            put(update, *args, **kwargs)
+
+        update_queue.put = put_timed
+
+        process_update = self._dispatcher.process_update
+
+        def process_update_timed(update):
+            self._dispatch_state.started_at = time()
+            self._dispatch_state.received_at = self._received_at.pop(getattr(update, "update_id", None), None)
+            process_update(update)
+
+        self._dispatcher.process_update = process_update_timed
+
         self._monitor = None
-        chat_ids = self._config.NOTIFICATION_CHAT_IDS.value
-        if chat_ids is not None and len(chat_ids) > 0:
+        chat_ids = self._config.NOTIFICATION_CHAT_IDS.value or []
+        # the event stream of the api is fed by the monitor as well
+        if len(chat_ids) > 0 or self._events is not None:
             self._notifier = Notifier(self._updater, chat_ids)
             interval = self._config.GROCY_CACHE_DURATION.value + timedelta(seconds=1)
-            self._monitor = Monitor(interval, self._notifier, self._grocy)
+            self._monitor = Monitor(interval, self._notifier, self._grocy, self._events)
+
+        self._started_at = None
 
     @property
     def bot(self):
         return self._updater.bot
 
-    def start(self):
+    def start(self, idle: bool = True):
         """
         Starts up the bot.
+        :param idle: whether to block until a stop signal is received and shut down afterwards
         """
+        self._started_at = time()
+        if self._prewarmer is not None:
+            self._prewarmer.start()
+        self._write_queue.start()
         if self._monitor is not None:
             self._monitor.start()
-        self._updater.start_polling()
+        if self._snapshot_store is not None:
+            self._start_api()
+        if self._config.TELEGRAM_WEBHOOK_ENABLED.value:
+            self._start_webhook()
+        else:
+            self._updater.start_polling()
+        add_readiness_check("cache", self._check_cache)
+        add_readiness_check("watchers", self._check_watchers)
+        add_readiness_check("grocy", self._check_grocy)
+        add_readiness_check("telegram", self._check_telegram)
+        if not idle:
+            return
         self._updater.idle()
+        # idle() only stops the updater when a stop signal is received
+        self.stop()
 
     def stop(self):
         """
         Shuts down the bot.
         """
+        for name in ["cache", "watchers", "grocy", "telegram"]:
+            remove_readiness_check(name)
         if self._monitor is not None:
             self._monitor.stop()
+        if self._api_server is not None:
+            remove_invalidation_listener(self._snapshot_store.invalidate)
+            # ends all event streams
+            self._events.close()
+            self._api_server.shutdown()
+            self._api_server = None
         self._updater.stop()
+        self._executor.shutdown()
+        self._write_queue.stop()
+        if self._prewarmer is not None:
+            self._prewarmer.stop()
+        # write the interaction state to disk, after all updates have been processed
+        self._state_store.stop()
+
+    def _check_cache(self) -> Tuple[bool, dict]:
+        if self._prewarmer is None:
+            return True, {"prewarm": False}
+        return self._prewarmer.ready.is_set(), {"prewarm": True, "warm": self._prewarmer.ready.is_set()}
+
+    def _check_watchers(self) -> Tuple[bool, dict]:
+        if self._monitor is None:
+            return True, {}
+        watchers = {
+            type(watcher).__name__: {"alive": watcher.is_alive(), "last_success": format_time(watcher.last_success)}
+            for watcher in self._monitor.watchers
+        }
+        return all(map(lambda x: x["alive"], watchers.values())), watchers
+
+    @staticmethod
+    def _check_grocy() -> Tuple[bool, dict]:
+        status = grocy_status()
+        last_success = status["last_success"]
+        last_error_time = status["last_error_time"]
+        # unknown until the first request was made
+        reachable = last_error_time is None or (last_success is not None and last_success > last_error_time)
+        latency = status["last_latency"]
+        return reachable, {
+            "last_success": format_time(last_success),
+            "latency_ms": round(latency * 1000, 1) if latency is not None else None,
+            "last_error": status["last_error"],
+            "last_error_time": format_time(last_error_time),
+        }
+
+    def _check_telegram(self) -> Tuple[bool, dict]:
+        alive = self._updater.running and self._dispatcher.running
+        if self._config.TELEGRAM_WEBHOOK_ENABLED.value:
+            return alive, {"mode": "webhook"}
+
+        # the first poll may still be in progress right after starting up
+        last_poll = last_success_time("getUpdates")
+        polling = time() - (last_poll or self._started_at) <= POLLING_TIMEOUT_SECONDS
+        return alive and polling, {"mode": "polling", "last_poll": format_time(last_poll)}
+
+    def _run_on_executor(self, handler: Handler):
+        """
+        Moves the execution of the handler callback from the dispatcher thread to the executor,
+        so a slow command in one chat doesn't block all other chats.
+        :param handler: the handler to modify
+        """
+        callback = handler.callback
+
+        callback_name = getattr(callback, "__qualname__", type(handler).__name__)
+
+        def execute(update: Update, context: CallbackContext, received_at: float, dispatched_at: float,
+                    submitted_at: float):
+            try:
+                with trace("update", start=received_at, handler=callback_name, update_id=update.update_id):
+                    record_span("update_queue", received_at, dispatched_at)
+                    record_span("dispatch", dispatched_at, submitted_at)
+                    record_span("queue", submitted_at, time())
+                    with handling_update(received_at):
+                        callback(update, context)
+            except Exception as ex:
+                self._dispatcher.dispatch_error(update, ex)
+
+        def submit(update: Update, context: CallbackContext):
+            submitted_at = time()
+            dispatched_at = getattr(self._dispatch_state, "started_at", None) or submitted_at
+            received_at = getattr(self._dispatch_state, "received_at", None) or dispatched_at
+            self._executor.submit(self._executor_key(update), execute, update, context,
+                                  received_at, dispatched_at, submitted_at)
+
+        handler.callback = submit
+
+    @staticmethod
+    def _executor_key(update: Update):
+        """
+        :param update: the chat update object
+        :return: the key used to serialize the processing of updates
+        """
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        if update.effective_user is not None:
+            return update.effective_user.id
+        return None
+
+    def _start_api(self):
+        """
+        Starts the local http server of the read-only json api
+        """
+        # writes made by the bot show up in the api right away
+        add_invalidation_listener(self._snapshot_store.invalidate)
+        self._api_server = ApiServer(
+            listen=self._config.API_LISTEN.value,
+            port=self._config.API_PORT.value,
+            snapshots=self._snapshot_store,
+            events=self._events
+        )
+        self._api_server.start()
+
+    def _start_webhook(self):
+        """
+        Starts the dispatcher and a local http server receiving updates via webhook.
+        """
+        webhook_url = self._config.TELEGRAM_WEBHOOK_URL.value
+        if webhook_url is None:
+            raise ValueError("A webhook url is required when using webhook mode")
+
+        server = WebhookServer(
+            listen=self._config.TELEGRAM_WEBHOOK_LISTEN.value,
+            port=self._config.TELEGRAM_WEBHOOK_PORT.value,
+            url_path=self._config.TELEGRAM_WEBHOOK_PATH.value,
+            secret_token=self._config.TELEGRAM_WEBHOOK_SECRET_TOKEN.value,
+            bot=self.bot,
+            update_queue=self._updater.update_queue,
+            workers=self._config.TELEGRAM_WEBHOOK_WORKERS.value
+        )
+
+        # let the updater manage the lifecycle of the dispatcher and our server,
+        # so idle() and stop() behave just like they do when polling
+        self._updater.running = True
+        self._updater.httpd = server
+        self._updater.job_queue.start()
+        threading.Thread(target=self._dispatcher.start, name="dispatcher").start()
+        server.start()
+
+        webhook_kwargs = {}
+        secret_token = self._config.TELEGRAM_WEBHOOK_SECRET_TOKEN.value
+        if secret_token is not None:
+            webhook_kwargs["secret_token"] = secret_token
+        self.bot.set_webhook(url=webhook_url, **webhook_kwargs)
+        LOGGER.debug(f"Webhook set to {webhook_url}")
 
     @COMMAND_TIME_START.time()
     def _start_callback(self, update: Update, context: CallbackContext) -> None:
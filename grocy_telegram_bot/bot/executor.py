@@ -0,0 +1,92 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+from typing import Any, Dict, Deque, Tuple
+
+from grocy_telegram_bot.stats import HANDLER_QUEUE_DEPTH, HANDLER_QUEUE_WAIT_TIME
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ChatOrderedExecutor:
+    """
+    Executes tasks on a worker pool while preserving the order of tasks with the same key.
+    Tasks with different keys (f.ex. different chats) are processed in parallel.
+    """
+
+    def __init__(self, workers: int):
+        """
+        Creates an executor
+        :param workers: number of worker threads
+        """
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="handler")
+        self._lock = threading.Condition()
+        self._shutdown = False
+        # pending tasks per key, a key is present as long as one of its tasks is queued or running
+        self._queues: Dict[Any, Deque[Tuple[float, callable, tuple]]] = {}
+        # number of queued tasks of all keys, which are not running yet
+        self._waiting = 0
+
+    def submit(self, key: Any, func: callable, *args):
+        """
+        Queues a task for execution
+        :param key: tasks with the same key are executed one after another, in submission order
+        :param func: the function to execute
+        :param args: arguments to pass to the function
+        """
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit tasks after shutdown")
+            queue = self._queues.get(key, None)
+            idle = queue is None
+            if idle:
+                queue = deque()
+                self._queues[key] = queue
+            queue.append((time(), func, args))
+            self._waiting += 1
+            HANDLER_QUEUE_DEPTH.set(self._waiting)
+
+        if idle:
+            self._executor.submit(self._run_next, key)
+
+    def _run_next(self, key: Any):
+        """
+        Runs the next task of the given key and reschedules itself if more tasks are pending.
+        Only a single task is run at a time, so that busy keys can't starve other keys.
+        :param key: the key
+        """
+        with self._lock:
+            queued_at, func, args = self._queues[key].popleft()
+            self._waiting -= 1
+            HANDLER_QUEUE_DEPTH.set(self._waiting)
+
+        HANDLER_QUEUE_WAIT_TIME.observe(time() - queued_at)
+        try:
+            func(*args)
+        except Exception as ex:
+            LOGGER.exception(ex)
+
+        with self._lock:
+            queue = self._queues[key]
+            if len(queue) > 0:
+                reschedule = True
+            else:
+                self._queues.pop(key)
+                reschedule = False
+                self._lock.notify_all()
+
+        if reschedule:
+            self._executor.submit(self._run_next, key)
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stops accepting new tasks
+        :param wait: whether to wait for queued tasks to finish
+        """
+        with self._lock:
+            self._shutdown = True
+            if wait:
+                self._lock.wait_for(lambda: len(self._queues) <= 0)
+        self._executor.shutdown(wait=wait)
@@ -4,25 +4,58 @@ from typing import Dict
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import CallbackContext
 
+from grocy_telegram_bot.bot.state import InteractionStateStore
+from grocy_telegram_bot.telegram_util import CALLBACK_DATA_CODEC, CallbackData
+
 
 class InlineKeyboardHandler:
-    # this map is used to map a command_id to a callback function
-    _inline_keyboard__command_to_callback_map = {}
 
-    # this map is used to remember what type is associated
-    # with the callback data of a keyboard button
-    _inline_keyboard__callback_data_type_map = {}
+    def __init__(self, state_store: InteractionStateStore):
+        self._state_store = state_store
+        # this map is used to map a command_id to a callback function
+        self._inline_keyboard__command_to_callback_map = {}
+        # this map is used to map a command_id to a callback function for buttons
+        # whose callback data contains everything needed to handle them
+        self._stateless_command_to_callback_map = {}
+
+    def register_callback(self, command_id: str, callback):
+        """
+        Registers the function to call when a button of a keyboard created by the given command is pressed
+        :param command_id: the command id
+        :param callback: the function to call
+        """
+        self._inline_keyboard__command_to_callback_map[command_id] = callback
 
-    def __init__(self):
-        pass
+    def register_stateless_callback(self, command_id: str, callback):
+        """
+        Registers the function to call when a button with codec encoded callback data of the given command
+        is pressed. These buttons don't need any stored message state, so they also work for inline messages.
+        :param command_id: the command id of the callback data
+        :param callback: the function to call with the decoded callback data
+        """
+        self._stateless_command_to_callback_map[command_id] = callback
 
-    def register_listener(self, chat_id: str, message_id: str, command_id: str, callback, callback_data: any):
-        key = f"{chat_id}_{message_id}"
-        self._inline_keyboard__callback_data_type_map[key] = command_id
-        self._inline_keyboard__command_to_callback_map[command_id] = {
-            "callback": callback,
+    def register_listener(self, chat_id: str, message_id: str, command_id: str, callback_data: dict):
+        """
+        Remembers the state of a message with an inline keyboard
+        :param chat_id: the chat id of the message
+        :param message_id: the message id
+        :param command_id: the id of the command that created the keyboard
+        :param callback_data: json serializable data to pass to the callback
+        """
+        self._state_store.put_message_state(chat_id, message_id, {
+            "command_id": command_id,
             "callback_data": callback_data
-        }
+        })
+
+    def get_listener_data(self, chat_id: str, message_id: str) -> dict or None:
+        """
+        :param chat_id: the chat id of the message
+        :param message_id: the message id
+        :return: the callback data of the given message, or None
+        """
+        state = self._state_store.get_message_state(chat_id, message_id)
+        return None if state is None else state["callback_data"]
 
     def inline_keyboard_click_callback(self, update: Update, context: CallbackContext):
         """
@@ -31,32 +64,62 @@ class InlineKeyboardHandler:
         :param context:
         """
         bot = context.bot
-        user_id = update.callback_query.from_user.id
-        chat_id = update.effective_chat.id
-        message_id = update.effective_message.message_id
 
         query = update.callback_query
-        # TODO: is it possible to get this query_id when initially sending the keyboard? -> NOPE, but a chat_id & msg_id key should suffice
-        # then it would be easy to remember the shopping list items in a dict somewhere
-        # to regenerate it with the new counts/amounts
         query_id = query.id
         selection_data = query.data
 
         try:
-            command_id = self._inline_keyboard__callback_data_type_map.get(f"{chat_id}_{message_id}", None)
-            if command_id is None:
-                bot.answer_callback_query(query_id, text="Unknown message")
+            # messages sent via inline query don't belong to a chat
+            state = None
+            if update.effective_chat is not None:
+                chat_id = update.effective_chat.id
+                message_id = update.effective_message.message_id
+                state = self._state_store.get_message_state(chat_id, message_id)
+            if state is None:
+                self._stateless_click_callback(update, context, selection_data)
                 return
 
-            callback_info = self._inline_keyboard__command_to_callback_map[command_id]
-            callback = callback_info["callback"]
-            callback_data = callback_info["callback_data"]
+            callback = self._inline_keyboard__command_to_callback_map[state["command_id"]]
+            callback_data = state["callback_data"]
             # call listener
             callback(update, context, selection_data, callback_data)
+            # persist changes the listener made to its data
+            self._state_store.put_message_state(chat_id, message_id, state)
         except Exception:
             logging.exception("Error processing inline keyboard button callback")
             bot.answer_callback_query(query_id, text="Error")
 
+    def _stateless_click_callback(self, update: Update, context: CallbackContext, selection_data: str):
+        """
+        Handles a button click using only the data of the button itself
+        :param update:
+        :param context:
+        :param selection_data: the callback data of the button
+        """
+        callback = None
+        callback_data = self._decode_callback_data(selection_data)
+        if callback_data is not None:
+            callback = self._stateless_command_to_callback_map.get(callback_data.command_id, None)
+
+        if callback is None:
+            context.bot.answer_callback_query(update.callback_query.id, text="Unknown message")
+            return
+        callback(update, context, callback_data)
+
+    @staticmethod
+    def _decode_callback_data(selection_data: str) -> CallbackData or None:
+        """
+        :param selection_data: callback data of a button
+        :return: the decoded callback data, or None if it is not codec encoded
+        """
+        if selection_data is None or selection_data.startswith("{"):
+            return None
+        try:
+            return CALLBACK_DATA_CODEC.decode(selection_data)
+        except Exception:
+            return None
+
     @staticmethod
     def build_inline_keyboard(items: Dict[str, str]) -> InlineKeyboardMarkup:
         """
@@ -0,0 +1,183 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import List, Any, Dict, Tuple
+
+from telegram import Bot, Update, InlineKeyboardMarkup, InlineKeyboardButton, Message
+from telegram.ext import CallbackContext
+
+from grocy_telegram_bot.bot.inline_keyboard_handler import InlineKeyboardHandler
+from grocy_telegram_bot.telegram_util import PageCallbackData
+from grocy_telegram_bot.tracing import traced
+from grocy_telegram_bot.util import send_message
+
+
+class ListSnapshotCache:
+    """
+    In-memory cache of list snapshots, bounded by the total number of rows of all snapshots.
+    The least recently used snapshots are evicted first.
+    """
+
+    def __init__(self, max_rows: int):
+        """
+        Creates a snapshot cache
+        :param max_rows: maximum total number of rows of all cached snapshots
+        """
+        self._max_rows = max_rows
+        self._lock = threading.Lock()
+        self._snapshots: Dict[Tuple[int, int], List[Any]] = OrderedDict()
+        self._row_count = 0
+
+    def put(self, key: Tuple[int, int], rows: List[Any]):
+        """
+        Caches a snapshot, a snapshot larger than the cache is not cached at all
+        :param key: (chat id, message id) of the list message
+        :param rows: the rows of the list
+        """
+        with self._lock:
+            self._remove(key)
+            if len(rows) > self._max_rows:
+                return
+            self._snapshots[key] = rows
+            self._row_count += len(rows)
+            while self._row_count > self._max_rows:
+                self._remove(next(iter(self._snapshots)))
+
+    def get(self, key: Tuple[int, int]) -> List[Any] or None:
+        """
+        :param key: (chat id, message id) of the list message
+        :return: the cached rows, or None if they have been evicted
+        """
+        with self._lock:
+            rows = self._snapshots.get(key, None)
+            if rows is not None:
+                self._snapshots.move_to_end(key)
+            return rows
+
+    def _remove(self, key: Tuple[int, int]):
+        rows = self._snapshots.pop(key, None)
+        if rows is not None:
+            self._row_count -= len(rows)
+
+
+class PaginatedList:
+    """
+    Sends a list as a message showing a single page of it, with buttons to navigate between pages.
+
+    The rows of a sent list are kept in a bounded in-memory cache, so only the rows of the visible page
+    have to be rendered, and navigating edits the message in place without querying Grocy again.
+    Only the page and the query to load the rows again are kept in the interaction state, and the rows
+    are loaded again once they have been evicted from the cache.
+    """
+
+    def __init__(self, inline_keyboard_handler: InlineKeyboardHandler, list_id: str, load_rows: callable,
+                 render_rows: callable, page_size: int, cache_rows: int):
+        """
+        Creates a paginated list type
+        :param inline_keyboard_handler: the inline keyboard handler
+        :param list_id: unique id of this list type
+        :param load_rows: function to load the presorted list of rows for a json serializable query
+        :param render_rows: function to render a list of rows into a list of lines,
+                            rows that are strings (f.ex. section headers) are shown as they are
+        :param page_size: number of rows per page
+        :param cache_rows: maximum total number of rows of sent lists kept in memory
+        """
+        self._inline_keyboard_handler = inline_keyboard_handler
+        self._list_id = list_id
+        self._load_rows = load_rows
+        self._render_rows = render_rows
+        self._page_size = page_size
+        self._snapshots = ListSnapshotCache(cache_rows)
+        inline_keyboard_handler.register_callback(list_id, self._page_button_pressed_callback)
+
+    def send(self, bot: Bot, chat_id: int, title: str, query: dict, parse_mode: str = None) -> Message:
+        """
+        Loads a list and sends its first page
+        :param bot: the bot
+        :param chat_id: the chat to send the list to
+        :param title: the title shown above every page
+        :param query: json serializable query passed to the load_rows function
+        :param parse_mode: specify whether to parse the text as markdown or HTML
+        :return: the sent message
+        """
+        rows = self._load_rows(query)
+        data = {
+            "title": title,
+            "parse_mode": parse_mode,
+            "page": 0,
+            "query": query,
+        }
+        text, keyboard = self._render_page(data, rows)
+        message = send_message(bot, chat_id, text, parse_mode=parse_mode, menu=keyboard, expand_emoji=False)
+        if keyboard is not None:
+            self._snapshots.put((chat_id, message.message_id), rows)
+            self._inline_keyboard_handler.register_listener(
+                chat_id=chat_id,
+                message_id=message.message_id,
+                command_id=self._list_id,
+                callback_data=data)
+        return message
+
+    def _page_button_pressed_callback(self, update: Update, context: CallbackContext, button_data: str,
+                                      data: dict):
+        """
+        Called when a page navigation button is pressed
+        :param update: the chat update object
+        :param context: telegram context
+        :param button_data: callback data of the pressed button
+        :param data: the stored state of the list
+        """
+        bot = context.bot
+        query_id = update.callback_query.id
+        chat_id = update.effective_chat.id
+        message_id = update.effective_message.message_id
+
+        page = PageCallbackData.decode(button_data).page
+        if page == data["page"]:
+            bot.answer_callback_query(query_id)
+            return
+
+        key = (chat_id, message_id)
+        rows = self._snapshots.get(key)
+        if rows is None:
+            # evicted from the cache, or lost by a restart
+            rows = self._load_rows(data.get("query", {}))
+            self._snapshots.put(key, rows)
+        # rows were stored in the state by older versions
+        data.pop("rows", None)
+
+        data["page"] = max(0, min(page, self._page_count(rows) - 1))
+        text, keyboard = self._render_page(data, rows)
+        bot.edit_message_text(text, chat_id=chat_id, message_id=message_id,
+                              parse_mode=data["parse_mode"], reply_markup=keyboard)
+        bot.answer_callback_query(query_id)
+
+    def _page_count(self, rows: List[Any]) -> int:
+        return max(1, math.ceil(len(rows) / self._page_size))
+
+    @traced("render")
+    def _render_page(self, data: dict, rows: List[Any]) -> (str, InlineKeyboardMarkup or None):
+        """
+        Renders the current page of a list
+        :param data: the state of the list
+        :param rows: the rows of the list
+        :return: the text of the page, and its navigation keyboard (or None if there is only a single page)
+        """
+        page = data["page"]
+        page_count = self._page_count(rows)
+
+        page_rows = rows[page * self._page_size:(page + 1) * self._page_size]
+        rendered = iter(self._render_rows(list(filter(lambda x: not isinstance(x, str), page_rows))))
+        lines = list(map(lambda x: x if isinstance(x, str) else next(rendered), page_rows))
+
+        text = "\n".join([data["title"], *lines]).strip()
+        if page_count <= 1:
+            return text, None
+
+        text += f"\n\nPage {page + 1}/{page_count}"
+        buttons = []
+        if page > 0:
+            buttons.append(InlineKeyboardButton("◀", callback_data=PageCallbackData(page - 1).encode()))
+        if page < page_count - 1:
+            buttons.append(InlineKeyboardButton("▶", callback_data=PageCallbackData(page + 1).encode()))
+        return text, InlineKeyboardMarkup.from_row(buttons)
@@ -1,110 +1,112 @@
 import logging
-from typing import List, Any
+from collections import OrderedDict
+from typing import List, Any, Dict
 
 from telegram import Update, ParseMode, ReplyKeyboardRemove, ReplyKeyboardMarkup, KeyboardButton
 from telegram.ext import CallbackContext
 
+from grocy_telegram_bot.bot.state import InteractionStateStore
 from grocy_telegram_bot.const import CANCEL_KEYBOARD_COMMAND
-from grocy_telegram_bot.util import send_message, fuzzy_match
+from grocy_telegram_bot.search import FuzzySearchIndex
+from grocy_telegram_bot.util import send_message
 
 LOGGER = logging.getLogger(__name__)
 
 
 class ReplyKeyboardHandler:
-    # this map is used to remember from which users we
-    # are currently awaiting a response message
-    awaiting_response = {}
 
-    def __init__(self):
-        pass
+    def __init__(self, state_store: InteractionStateStore):
+        # the state store is used to remember from which users we
+        # are currently awaiting a response message
+        self._state_store = state_store
+        # this map is used to map a callback_id to a callback function
+        # and a function to resolve a choice id to the actual choice
+        self._callback_map = {}
+
+    def register_callback(self, callback_id: str, callback, resolver):
+        """
+        Registers the function to call when the user has selected a choice
+        :param callback_id: the callback id
+        :param callback: the function to call with the selected choice
+        :param resolver: function to resolve a choice id back to the choice (or None if it doesn't exist anymore)
+        """
+        self._callback_map[callback_id] = (callback, resolver)
 
     def on_message(self, update: Update, context: CallbackContext):
         user_id = update.effective_user.id
         text = update.effective_message.text
 
-        if user_id not in self.awaiting_response:
+        data = self._state_store.get_user_state(user_id)
+        if data is None:
             return
 
-        data = self.awaiting_response[user_id]
         if text in data["valid_responses"]:
             LOGGER.debug("Awaited response from user {} received: {}".format(user_id, text))
-            try:
-                data["callback"](update, context, text, data["callback_data"])
-                self.awaiting_response.pop(user_id)
-            finally:
-                # TODO: log error
-                pass
-
-    def _on_user_selection(self, update: Update, context: CallbackContext, message: str, data: dict):
-        """
-        Called when a user selection is awaited and user message arrives
-        :param update:
-        :param context:
-        :param message:
-        :param data:
-        """
-        self.await_user_selection(update, context, message, data["choices"], data["key"],
-                                  data["callback"], data["callback_data"])
+            self._state_store.pop_user_state(user_id)
+            callback, resolver = self._callback_map[data["callback_id"]]
+            choice = resolver(data["valid_responses"][text])
+            if choice is None:
+                send_message(context.bot, update.effective_chat.id, "The selected item doesn't exist anymore",
+                             reply_to=update.effective_message.message_id,
+                             menu=ReplyKeyboardRemove(selective=True))
+                return
+            callback(update, context, choice, data["callback_data"])
 
     def await_user_selection(self, update: Update, context: CallbackContext,
-                             selection: str or None, choices: List[Any], key: callable,
-                             callback: callable, callback_data: dict):
+                             selection: str or None, index: FuzzySearchIndex,
+                             callback_id: str, callback_data: dict, choice_id: callable = lambda x: x.id):
         """
         Sends a ReplyKeyboard to the user and waits for a valid selection.
         :param update: Update
         :param context: CallbackContext
         :param selection: the current user selection (if any)
-        :param choices: list of choices to select from
-        :param key: function to create unique string key for a choice
-        :param callback: the function to call, when a selection was made
-        :param callback_data: data to pass to the callback function
+        :param index: search index of the choices to select from
+        :param callback_id: id of the registered callback to call, when a selection was made
+        :param callback_data: json serializable data to pass to the callback function
+        :param choice_id: function to get the id of a choice, which is passed to the registered resolver
         """
         bot = context.bot
         chat_id = update.effective_chat.id
         message_id = update.effective_message.message_id
         user_id = update.effective_user.id
 
-        fuzzy_matches = fuzzy_match(selection, choices=choices, key=key, limit=5)
+        fuzzy_matches = index.search(selection, limit=5)
 
         # check if something matches perfectly
         perfect_matches = list(filter(lambda x: x[1] == 100, fuzzy_matches))
         if len(perfect_matches) == 1:
             choice = perfect_matches[0][0]
+            callback, _ = self._callback_map[callback_id]
             callback(update, context, choice, callback_data)
             return
 
         # send reply keyboard with fuzzy matches to user
-        keyboard_texts = list(map(lambda x: "{}".format(key(x[0])), fuzzy_matches))
-        keyboard = self.build_reply_keyboard(keyboard_texts)
+        options = OrderedDict(map(lambda x: ("{}".format(index.key(x[0])), choice_id(x[0])), fuzzy_matches))
+        keyboard = self.build_reply_keyboard(list(options.keys()))
         text = "No unique perfect match found, please select one of the menu options"
         self.await_response(
             user_id=user_id,
-            options=keyboard_texts,
-            callback=self._on_user_selection,
-            callback_data={
-                "choices": choices,
-                "key": key,
-                "callback": callback,
-                "callback_data": callback_data,
-            })
+            options=options,
+            callback_id=callback_id,
+            callback_data=callback_data)
         send_message(bot, chat_id, text, parse_mode=ParseMode.MARKDOWN, reply_to=message_id, menu=keyboard)
 
-    def await_response(self, user_id: str, options: List[str], callback_data: dict, callback):
+    def await_response(self, user_id: str, options: Dict[str, Any], callback_id: str, callback_data: dict):
         """
         Remember, that we are awaiting a response message from a user
         :param user_id: the user id
-        :param options: a list of messages that the user can send as a valid response
-        :param callback: function to call with callback data
+        :param options: a map of messages that the user can send as a valid response, to the id of the related choice
+        :param callback_id: id of the registered callback to call with callback data
         :param callback_data: data to pass to callback
         """
-        if user_id in self.awaiting_response:
-            raise AssertionError("Already awaiting response to a previous query from user {}".format(user_id))
+        if self._state_store.get_user_state(user_id) is not None:
+            LOGGER.debug("Replacing previous query awaiting a response from user {}".format(user_id))
 
-        self.awaiting_response[user_id] = {
+        self._state_store.put_user_state(user_id, {
             "valid_responses": options,
-            "callback": callback,
+            "callback_id": callback_id,
             "callback_data": callback_data
-        }
+        })
 
     def cancel_keyboard_callback(self, update: Update, context: CallbackContext):
         bot = context.bot
@@ -116,8 +118,7 @@ class ReplyKeyboardHandler:
         send_message(bot, chat_id, text, parse_mode=ParseMode.MARKDOWN, reply_to=message_id,
                      menu=ReplyKeyboardRemove(selective=True))
 
-        if user_id in self.awaiting_response:
-            self.awaiting_response.pop(user_id)
+        self._state_store.pop_user_state(user_id)
 
     @staticmethod
     def build_reply_keyboard(items: List[str]) -> ReplyKeyboardMarkup:
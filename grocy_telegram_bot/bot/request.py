@@ -0,0 +1,107 @@
+import logging
+import threading
+from contextlib import contextmanager
+from time import perf_counter, time
+
+from telegram.error import RetryAfter, TelegramError
+from telegram.utils.request import Request
+
+from grocy_telegram_bot.stats import TELEGRAM_REQUEST_TIME, TELEGRAM_REQUEST_SIZE, TELEGRAM_RETRY_AFTER_COUNT, \
+    TELEGRAM_REQUEST_ERROR_COUNT, UPDATE_REPLY_TIME
+from grocy_telegram_bot.tracing import span
+
+LOGGER = logging.getLogger(__name__)
+
+# methods which don't reply to an update
+_NON_REPLY_METHODS = {"getUpdates", "getMe", "getFile", "downloadFile", "setWebhook", "deleteWebhook"}
+
+# the update handled by the current thread
+_update_state = threading.local()
+
+# method name -> time of the last successful call, f.ex. to tell whether polling for updates is still alive
+_last_success = {}
+
+
+def last_success_time(method: str) -> float or None:
+    """
+    :param method: name of a Bot API method, f.ex. "getUpdates"
+    :return: time of the last successful call of the method, as returned by time.time(), None if there was none
+    """
+    return _last_success.get(method, None)
+
+
+@contextmanager
+def handling_update(received_at: float):
+    """
+    Context manager to mark the current thread as handling an update, to measure the time until the first reply
+    :param received_at: time the update was received, as returned by time.time()
+    """
+    _update_state.received_at = received_at
+    try:
+        yield
+    finally:
+        _update_state.received_at = None
+
+
+def api_method_name(url: str) -> str:
+    """
+    :param url: url of a Bot API request
+    :return: the name of the called Bot API method, f.ex. "sendMessage"
+    """
+    if "/file/bot" in url:
+        return "downloadFile"
+    return url.rsplit("/", 1)[-1]
+
+
+def payload_size(kwargs: dict) -> int:
+    """
+    :param kwargs: arguments of a urllib3 request
+    :return: size of the request payload in bytes
+    """
+    body = kwargs.get("body", None)
+    if body is not None:
+        return len(body)
+
+    size = 0
+    for value in kwargs.get("fields", {}).values():
+        if isinstance(value, tuple):
+            # uploaded file: (file name, data, mimetype)
+            value = value[1]
+        if isinstance(value, str):
+            value = value.encode()
+        if isinstance(value, bytes):
+            size += len(value)
+    return size
+
+
+class InstrumentedRequest(Request):
+    """
+    Request object used by the bot, which records the latency, payload size and errors of every Bot API call,
+    as well as the time from receiving an update until the first reply to it was sent
+    """
+
+    def _request_wrapper(self, *args, **kwargs):
+        method = api_method_name(args[1])
+        TELEGRAM_REQUEST_SIZE.labels(method=method).observe(payload_size(kwargs))
+
+        start = perf_counter()
+        try:
+            with span("telegram", method=method):
+                result = super()._request_wrapper(*args, **kwargs)
+        except RetryAfter as ex:
+            LOGGER.warning(f"Rate limit exceeded calling {method}, retry after {ex.retry_after}s")
+            TELEGRAM_RETRY_AFTER_COUNT.labels(method=method).inc()
+            raise
+        except TelegramError as ex:
+            TELEGRAM_REQUEST_ERROR_COUNT.labels(method=method, error=type(ex).__name__).inc()
+            raise
+        finally:
+            TELEGRAM_REQUEST_TIME.labels(method=method).observe(perf_counter() - start)
+
+        _last_success[method] = time()
+        received_at = getattr(_update_state, "received_at", None)
+        if received_at is not None and method not in _NON_REPLY_METHODS:
+            UPDATE_REPLY_TIME.observe(time() - received_at)
+            # only the first reply is measured
+            _update_state.received_at = None
+        return result
@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+from time import time
+from typing import Dict, Any
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = timedelta(seconds=5)
+
+
+class InteractionStateStore:
+    """
+    Bounded store for the state of pending user interactions, like inline keyboard messages
+    or awaited reply keyboard responses.
+
+    Entries expire when they haven't been used for the given time to live, and the least recently
+    used entries are evicted when the store is full. Stored state must be json serializable
+    (ids, counters, short texts), since it is optionally persisted to disk to survive a restart.
+    Changes are written to disk by a background thread at most once per flush interval, and on stop().
+    """
+
+    def __init__(self, max_entries: int, ttl: timedelta, file_path: Path or None = None,
+                 flush_interval: timedelta = DEFAULT_FLUSH_INTERVAL):
+        """
+        Creates a state store
+        :param max_entries: maximum number of entries
+        :param ttl: time after which unused entries expire
+        :param file_path: optional file to persist the state to
+        :param flush_interval: maximum time between a change and writing it to the file
+        """
+        self._max_entries = max_entries
+        self._ttl = ttl.total_seconds()
+        self._file_path = file_path
+        self._lock = threading.RLock()
+        # key -> (last access timestamp, state)
+        self._entries: Dict[str, list] = OrderedDict()
+        # whether there are changes which haven't been written to the file yet
+        self._dirty = False
+        # serializes writing the file
+        self._save_lock = threading.Lock()
+        self._load()
+
+        self._stop_requested = threading.Event()
+        self._thread = None
+        if self._file_path is not None:
+            self._thread = threading.Thread(target=self._flush_periodically, args=(flush_interval.total_seconds(),),
+                                            name="state-store", daemon=True)
+            self._thread.start()
+
+    def __len__(self):
+        with self._lock:
+            self._prune()
+            return len(self._entries)
+
+    def put_message_state(self, chat_id: int, message_id: int, state: Dict[str, Any]):
+        """
+        Stores the state of a message
+        :param chat_id: chat id
+        :param message_id: message id
+        :param state: the state to store
+        """
+        self._put(self._message_key(chat_id, message_id), state)
+
+    def get_message_state(self, chat_id: int, message_id: int) -> Dict[str, Any] or None:
+        """
+        :param chat_id: chat id
+        :param message_id: message id
+        :return: the state of the given message, or None
+        """
+        return self._get(self._message_key(chat_id, message_id))
+
+    def pop_message_state(self, chat_id: int, message_id: int) -> Dict[str, Any] or None:
+        """
+        Removes the state of a message
+        :param chat_id: chat id
+        :param message_id: message id
+        :return: the removed state, or None
+        """
+        return self._pop(self._message_key(chat_id, message_id))
+
+    def put_user_state(self, user_id: int, state: Dict[str, Any]):
+        """
+        Stores the state of a user
+        :param user_id: user id
+        :param state: the state to store
+        """
+        self._put(self._user_key(user_id), state)
+
+    def get_user_state(self, user_id: int) -> Dict[str, Any] or None:
+        """
+        :param user_id: user id
+        :return: the state of the given user, or None
+        """
+        return self._get(self._user_key(user_id))
+
+    def pop_user_state(self, user_id: int) -> Dict[str, Any] or None:
+        """
+        Removes the state of a user
+        :param user_id: user id
+        :return: the removed state, or None
+        """
+        return self._pop(self._user_key(user_id))
+
+    def flush(self):
+        """
+        Writes pending changes to the file
+        """
+        if self._file_path is None:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # serialized while holding the lock, since the stored states may be modified concurrently
+                data = json.dumps(self._entries, separators=(',', ':'))
+                self._dirty = False
+            try:
+                self._save(data)
+            except Exception:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def stop(self):
+        """
+        Stops writing changes in the background and writes pending changes to the file
+        """
+        self._stop_requested.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _flush_periodically(self, interval: float):
+        while not self._stop_requested.wait(interval):
+            try:
+                self.flush()
+            except Exception:
+                LOGGER.exception(f"Error writing state file {self._file_path}")
+
+    @staticmethod
+    def _message_key(chat_id: int, message_id: int) -> str:
+        return f"m_{chat_id}_{message_id}"
+
+    @staticmethod
+    def _user_key(user_id: int) -> str:
+        return f"u_{user_id}"
+
+    def _put(self, key: str, state: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = [time(), state]
+            self._entries.move_to_end(key)
+            self._prune()
+            self._dirty = True
+
+    def _get(self, key: str) -> Dict[str, Any] or None:
+        with self._lock:
+            self._prune()
+            entry = self._entries.get(key, None)
+            if entry is None:
+                return None
+            entry[0] = time()
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _pop(self, key: str) -> Dict[str, Any] or None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self._dirty = True
+            return entry[1]
+
+    def _prune(self):
+        """
+        Removes expired entries and evicts the least recently used ones if the store is full
+        """
+        expired_before = time() - self._ttl
+        # entries are ordered by last access, so expired ones are always at the front
+        while len(self._entries) > 0:
+            key, (last_access, _) = next(iter(self._entries.items()))
+            if last_access >= expired_before and len(self._entries) <= self._max_entries:
+                break
+            LOGGER.debug(f"Removing state entry: {key}")
+            self._entries.pop(key)
+
+    def _load(self):
+        if self._file_path is None or not self._file_path.exists():
+            return
+        try:
+            with open(self._file_path) as file:
+                entries = json.load(file)
+            self._entries.update(sorted(entries.items(), key=lambda x: x[1][0]))
+            self._prune()
+        except Exception as ex:
+            LOGGER.warning(f"Ignoring unreadable state file {self._file_path}: {ex}")
+
+    def _save(self, data: str):
+        # write to a temporary file first, so a crash never leaves a corrupt state file behind
+        temp_file_path = self._file_path.with_name(f"{self._file_path.name}.tmp")
+        with open(temp_file_path, "w") as file:
+            file.write(data)
+        os.replace(temp_file_path, self._file_path)
@@ -0,0 +1,127 @@
+import hmac
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from queue import Queue
+
+from telegram import Bot, Update
+
+LOGGER = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+# telegram updates are small json documents, anything bigger is rejected
+MAX_CONTENT_LENGTH = 1024 * 1024
+
+
+class _WebhookRequestHandler(BaseHTTPRequestHandler):
+    server: "WebhookServer"
+
+    def do_POST(self):
+        if self.path.split("?", 1)[0] != self.server.url_path:
+            self._respond(HTTPStatus.NOT_FOUND)
+            return
+
+        if not self.server.is_valid_secret_token(self.headers.get(SECRET_TOKEN_HEADER, None)):
+            LOGGER.warning(f"Rejecting webhook request from {self.client_address[0]}: invalid secret token")
+            self._respond(HTTPStatus.FORBIDDEN)
+            return
+
+        content_length = int(self.headers.get("Content-Length", 0))
+        if content_length <= 0 or content_length > MAX_CONTENT_LENGTH:
+            self._respond(HTTPStatus.BAD_REQUEST)
+            return
+
+        try:
+            data = json.loads(self.rfile.read(content_length).decode("utf-8"))
+            update = Update.de_json(data, self.server.bot)
+        except Exception as ex:
+            LOGGER.warning(f"Rejecting malformed webhook request: {ex}")
+            self._respond(HTTPStatus.BAD_REQUEST)
+            return
+
+        self.server.update_queue.put(update)
+        self._respond(HTTPStatus.OK)
+
+    def do_GET(self):
+        self._respond(HTTPStatus.METHOD_NOT_ALLOWED)
+
+    def _respond(self, status: HTTPStatus):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args):
+        LOGGER.debug(f"{self.address_string()} - {format % args}")
+
+
+class WebhookServer(HTTPServer):
+    """
+    HTTP server receiving Telegram updates via webhook and putting them into the update queue of the dispatcher.
+    TLS is expected to be terminated by a reverse proxy in front of this server.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, listen: str, port: int, url_path: str, secret_token: str or None, bot: Bot,
+                 update_queue: Queue, workers: int = 4):
+        """
+        Creates a webhook server
+        :param listen: address to listen on
+        :param port: port to listen on
+        :param url_path: url path to accept updates on
+        :param secret_token: secret token expected in the header of every request (if any)
+        :param bot: the bot used to deserialize updates
+        :param update_queue: the queue to put received updates into
+        :param workers: number of threads used to process requests
+        """
+        self.url_path = url_path
+        self.bot = bot
+        self.update_queue = update_queue
+        self._secret_token = secret_token
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="webhook")
+        self._thread = None
+        super().__init__((listen, port), _WebhookRequestHandler)
+
+    def is_valid_secret_token(self, token: str or None) -> bool:
+        """
+        :param token: the secret token send with a request
+        :return: true if the token matches the configured one, false otherwise
+        """
+        if self._secret_token is None:
+            return True
+        if token is None:
+            return False
+        return hmac.compare_digest(token.encode(), self._secret_token.encode())
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def start(self):
+        """
+        Starts serving requests on a background thread
+        """
+        LOGGER.debug(f"Listening for webhook requests on {self.server_address}{self.url_path}")
+        self._thread = threading.Thread(target=self.serve_forever, name="webhook", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        """
+        Stops serving requests and releases all resources
+        """
+        if self._thread is not None:
+            super().shutdown()
+            self._thread = None
+        self.server_close()
+        self._executor.shutdown(wait=True)
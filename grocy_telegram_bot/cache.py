@@ -1,19 +1,24 @@
+import base64
+import functools
 import logging
-from typing import List
+import threading
+from contextlib import contextmanager
+from typing import List, Callable, Dict
 
 from expiringdict import ExpiringDict
 from pygrocy import Grocy
 from pygrocy.grocy import Product
 
-from grocy_telegram_bot.config import Config
-from grocy_telegram_bot.util import timing
+from grocy_telegram_bot.config import get_config
+from grocy_telegram_bot.const import REQUESTS_TIMEOUT
+from grocy_telegram_bot.search import FuzzySearchIndex, BarcodeIndex
+from grocy_telegram_bot.grocy_client import InstrumentedGrocyApiClient
+from grocy_telegram_bot.stats import PREFETCH_COUNT, PREFETCH_HIT_COUNT, GROCY_CACHE_REQUEST_COUNT
+from grocy_telegram_bot.tracing import span
+from grocy_telegram_bot.util import timing, unique_by_key
 
 LOGGER = logging.getLogger(__name__)
 
-CONFIG = Config()
-# CACHE = LruCache(expires=CONFIG.GROCY_CACHE_DURATION.value.total_seconds(), concurrent=True)
-CACHE = ExpiringDict(max_len=100, max_age_seconds=CONFIG.GROCY_CACHE_DURATION.value.total_seconds())
-
 FUNCTIONS_TO_CACHE = [
     "Grocy.stock",
     "Grocy.volatile_stock",
@@ -28,9 +33,179 @@ FUNCTIONS_TO_CACHE = [
     "Grocy.expiring_products",
     "Grocy.missing_products",
     "GrocyCached.get_all_products",
+    "GrocyCached.get_unique_products",
+    "GrocyCached.get_product_index",
+    "GrocyCached.get_barcode_index",
+    "GrocyCached.get_product_picture_file_name",
+]
+
+# read-only functions whose responses are not cached, calling them doesn't invalidate the cache either
+FUNCTIONS_NOT_TO_CACHE = [
+    # pictures are only downloaded to upload them to telegram once, afterwards the file_id stored
+    # by the ProductImageCache is used, so caching them would only push other responses out of the cache
+    "GrocyCached.download_product_picture",
 ]
 
 
+@functools.lru_cache(maxsize=None)
+def get_cache() -> ExpiringDict:
+    """
+    Creates the cache for Grocy api responses on first use
+    :return: the cache
+    """
+    # return LruCache(expires=get_config().GROCY_CACHE_DURATION.value.total_seconds(), concurrent=True)
+    return ExpiringDict(max_len=100, max_age_seconds=get_config().GROCY_CACHE_DURATION.value.total_seconds())
+
+
+# the deferred_cache_invalidation() block the current thread is executing write calls for, if any
+_invalidation_state = threading.local()
+# functions called after write calls have invalidated the cache
+_invalidation_listeners: List[Callable[[], None]] = []
+
+# used to tell apart responses cached by a prefetch, and whether they have been used afterwards
+_prefetch_state = threading.local()
+_prefetch_lock = threading.Lock()
+# cache key -> function name, of prefetched responses which have not been used yet
+_prefetched_keys: Dict[str, str] = {}
+
+
+def add_invalidation_listener(listener: Callable[[], None]):
+    """
+    Registers a function to call after write calls have invalidated the cache
+    :param listener: the function to call
+    """
+    _invalidation_listeners.append(listener)
+
+
+def remove_invalidation_listener(listener: Callable[[], None]):
+    """
+    Removes a previously registered invalidation listener
+    :param listener: the function to remove
+    """
+    if listener in _invalidation_listeners:
+        _invalidation_listeners.remove(listener)
+
+
+def invalidate_cache():
+    """
+    Clears the cache, or remembers to clear it at the end of the deferred_cache_invalidation() block
+    the current thread is executing write calls for
+    """
+    deferral = _current_deferral()
+    if deferral is not None:
+        deferral.pending = True
+        return
+    _clear_cache()
+
+
+class InvalidationDeferral:
+    """
+    A deferred_cache_invalidation() block, which write calls of the current thread,
+    or functions wrapped with wrap(), are deferred to
+    """
+
+    def __init__(self):
+        self.pending = False
+
+    def wrap(self, func: Callable) -> Callable:
+        """
+        Wraps a function, so that write calls executed by it on another thread (f.ex. a worker pool)
+        are deferred to this block as well
+        :param func: the function to wrap
+        :return: wrapped function
+        """
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            previous = _current_deferral()
+            _invalidation_state.deferral = self
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _invalidation_state.deferral = previous
+
+        return wrapper
+
+
+@contextmanager
+def deferred_cache_invalidation():
+    """
+    Context manager to clear the cache only once at the end of the block, instead of on every write call within it.
+    This only applies to write calls of the current thread, and of functions wrapped with the yielded
+    InvalidationDeferral, so write calls of other chats are not affected.
+    """
+    deferral = _current_deferral()
+    if deferral is not None:
+        # nested block, the cache is cleared at the end of the outermost one
+        yield deferral
+        return
+
+    deferral = InvalidationDeferral()
+    _invalidation_state.deferral = deferral
+    try:
+        yield deferral
+    finally:
+        _invalidation_state.deferral = None
+        if deferral.pending:
+            LOGGER.debug("Clearing cache after deferred invalidation")
+            _clear_cache()
+            _notify_invalidation_listeners()
+
+
+def _current_deferral() -> InvalidationDeferral or None:
+    return getattr(_invalidation_state, "deferral", None)
+
+
+@contextmanager
+def prefetching():
+    """
+    Context manager to mark the responses cached by the current thread within the block as prefetched,
+    to measure how many of them are actually used afterwards
+    """
+    _prefetch_state.active = True
+    try:
+        yield
+    finally:
+        _prefetch_state.active = False
+
+
+def _clear_cache():
+    with _prefetch_lock:
+        _prefetched_keys.clear()
+    get_cache().clear()
+
+
+def _notify_invalidation_listeners():
+    if _current_deferral() is not None:
+        # listeners are notified at the end of the deferred_cache_invalidation() block
+        return
+    for listener in _invalidation_listeners:
+        try:
+            listener()
+        except Exception:
+            LOGGER.exception("Error in cache invalidation listener")
+
+
+def _on_cache_hit(key: str):
+    if getattr(_prefetch_state, "active", False):
+        return
+    with _prefetch_lock:
+        function_name = _prefetched_keys.pop(key, None)
+    if function_name is not None:
+        PREFETCH_HIT_COUNT.labels(function=function_name).inc()
+
+
+def _on_cache_fill(function_name: str, key: str):
+    with _prefetch_lock:
+        # only count responses the prefetching code asked for, not the calls made by those functions internally
+        if getattr(_prefetch_state, "active", False) and getattr(_prefetch_state, "depth", 0) <= 0:
+            _prefetched_keys[key] = function_name
+            PREFETCH_COUNT.labels(function=function_name).inc()
+        else:
+            # the prefetched response has expired without being used
+            _prefetched_keys.pop(key, None)
+
+
 def cache_decorator(func: classmethod):
     """
     Decorator to cache the result of a function call
@@ -43,21 +218,40 @@ def cache_decorator(func: classmethod):
             LOGGER.warning("Using cache on other object than Grocy, ignoring cache")
             return func(*args, **kwargs)
 
+        if func.__qualname__ in FUNCTIONS_NOT_TO_CACHE:
+            with span("grocy", function=func.__qualname__, cache="none"):
+                return func(*args, **kwargs)
+
         if func.__qualname__ not in FUNCTIONS_TO_CACHE:
             LOGGER.debug(f"Clearing cache because of non-whitelisted function call: {func.__qualname__}")
             # clear existing cache since the data will probably change
-            CACHE.clear()
+            invalidate_cache()
             # don't cache if not whitelisted
-            return func(*args, **kwargs)
+            try:
+                with span("grocy", function=func.__qualname__, cache="none"):
+                    return func(*args, **kwargs)
+            finally:
+                _notify_invalidation_listeners()
 
         key = f"{func.__qualname__}_{args}_{kwargs}"
 
-        if key in CACHE:
-            return CACHE[key]
+        cache = get_cache()
+        if key in cache:
+            GROCY_CACHE_REQUEST_COUNT.labels(function=func.__qualname__, result="hit").inc()
+            _on_cache_hit(key)
+            with span("grocy", function=func.__qualname__, cache="hit"):
+                return cache[key]
 
-        response = func(*args, **kwargs)
+        GROCY_CACHE_REQUEST_COUNT.labels(function=func.__qualname__, result="miss").inc()
+        _prefetch_state.depth = getattr(_prefetch_state, "depth", 0) + 1
+        try:
+            with span("grocy", function=func.__qualname__, cache="miss"):
+                response = func(*args, **kwargs)
+        finally:
+            _prefetch_state.depth -= 1
         LOGGER.debug(f"Caching function response: {key}")
-        CACHE[key] = response
+        cache[key] = response
+        _on_cache_fill(func.__qualname__, key)
         return response
 
     return wrapper
@@ -65,6 +259,12 @@ def cache_decorator(func: classmethod):
 
 class GrocyCached(Grocy):
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._api_client = InstrumentedGrocyApiClient(*args, **kwargs)
+        self._product_index = FuzzySearchIndex(key=lambda x: x.name)
+        self._barcode_index = BarcodeIndex()
+
     def __getattribute__(self, name):
         ret = super(Grocy, self).__getattribute__(name)
         if callable(ret):
@@ -85,3 +285,63 @@ class GrocyCached(Grocy):
         ex2_stock = self.expired_products(True)
         m_stock = self.missing_products(True)
         return stock + m_stock + ex_stock + ex2_stock
+
+    def get_unique_products(self) -> List[Product]:
+        """
+        Get a list of all products, containing every product only once.
+        A product in stock is also part of the missing, expiring or expired products, if it is one of them,
+        the stock entry (including all details) is kept.
+        :return: products
+        """
+        return unique_by_key(self.get_all_products(), key=lambda x: x.id)
+
+    @property
+    def product_index(self) -> FuzzySearchIndex:
+        """
+        The product search index, as of the last call to get_product_index()
+        """
+        return self._product_index
+
+    def get_product_index(self) -> FuzzySearchIndex:
+        """
+        Get a search index of all products, which is updated with the current list of all products
+        :return: product search index
+        """
+        self._product_index.update(self.get_unique_products())
+        return self._product_index
+
+    def get_barcode_index(self) -> BarcodeIndex:
+        """
+        Get a barcode index of all products, which is updated with the current list of all products
+        :return: barcode index
+        """
+        self._barcode_index.update(self.get_unique_products())
+        return self._barcode_index
+
+    def get_product_picture_file_name(self, product_id: int) -> str or None:
+        """
+        Get the file name of the picture of a product
+        :param product_id: product id
+        :return: the picture file name, or None if the product has no picture
+        """
+        product = self._api_client._do_get_request(f"objects/products/{product_id}")
+        if product is None:
+            return None
+        return product.get("picture_file_name", None) or None
+
+    def download_product_picture(self, picture_file_name: str, max_size: int) -> bytes:
+        """
+        Downloads a product picture, downscaled by Grocy to fit into a square of the given size
+        :param picture_file_name: the picture file name of the product
+        :param max_size: maximum width and height in pixels
+        :return: the image data
+        """
+        encoded_file_name = base64.b64encode(picture_file_name.encode()).decode()
+        return self._api_client.download_file(
+            f"files/productpictures/{encoded_file_name}",
+            params={
+                "force_serve_as": "picture",
+                "best_fit_width": max_size,
+                "best_fit_height": max_size,
+            },
+            timeout=REQUESTS_TIMEOUT)
@@ -1,23 +1,34 @@
 from typing import List
 
+from pygrocy.grocy import Product
 from telegram.ext import Handler
 
 from grocy_telegram_bot.bot import ReplyKeyboardHandler, InlineKeyboardHandler
 from grocy_telegram_bot.cache import GrocyCached
 from grocy_telegram_bot.config import Config
+from grocy_telegram_bot.write_queue import GrocyWriteQueue
 
 
 class GrocyCommandHandler:
 
     def __init__(self, config: Config, grocy: GrocyCached, reply_keyboard_handler: ReplyKeyboardHandler,
-                 inline_keyboard_handler: InlineKeyboardHandler):
+                 inline_keyboard_handler: InlineKeyboardHandler, write_queue: GrocyWriteQueue):
         self._config = config
         self._grocy = grocy
         self._reply_keyboard_handler = reply_keyboard_handler
         self._inline_keyboard_handler = inline_keyboard_handler
+        self._write_queue = write_queue
 
     def command_handlers(self) -> List[Handler]:
         """
         :return: a list of all command handlers
         """
         raise NotImplementedError()
+
+    def _find_product(self, product_id: int) -> Product or None:
+        """
+        Finds a product by its id
+        :param product_id: the product id
+        :return: the product, or None if it doesn't exist (anymore)
+        """
+        return next(filter(lambda x: x.id == product_id, self._grocy.get_all_products()), None)
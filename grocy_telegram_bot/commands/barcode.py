@@ -0,0 +1,100 @@
+from pygrocy.grocy import Product
+from telegram import Update, ParseMode
+from telegram.ext import Filters, CommandHandler, CallbackContext, MessageHandler
+from telegram_click.argument import Argument
+from telegram_click.decorator import command
+
+from grocy_telegram_bot.barcode import decode_barcodes, is_barcode_decoding_available
+from grocy_telegram_bot.commands import GrocyCommandHandler
+from grocy_telegram_bot.commands.product_action import create_product_action_keyboard
+from grocy_telegram_bot.const import COMMAND_BARCODE
+from grocy_telegram_bot.permissions import CONFIG_ADMINS
+from grocy_telegram_bot.stats import COMMAND_TIME_BARCODE
+from grocy_telegram_bot.util import send_message, product_to_str
+
+
+class BarcodeCommandHandler(GrocyCommandHandler):
+    """
+    Looks up products by barcode, either given as text or decoded from a photo sent in a private chat.
+    """
+
+    def command_handlers(self):
+        return [
+            CommandHandler(COMMAND_BARCODE,
+                           filters=(~ Filters.reply) & (~ Filters.forwarded),
+                           callback=self._barcode_callback),
+            MessageHandler(
+                filters=Filters.photo & Filters.private & (~ Filters.forwarded),
+                callback=self._photo_callback),
+        ]
+
+    @command(
+        name=COMMAND_BARCODE,
+        description="Find a product by its barcode.",
+        arguments=[
+            Argument(name=["code"], description="Barcode", example="4006381333931"),
+        ],
+        permissions=CONFIG_ADMINS
+    )
+    @COMMAND_TIME_BARCODE.time()
+    def _barcode_callback(self, update: Update, context: CallbackContext, code: str) -> None:
+        """
+        Show the product with the given barcode
+        :param update: the chat update object
+        :param context: telegram context
+        :param code: the barcode
+        """
+        product = self._grocy.get_barcode_index().lookup(code)
+        self._send_product(update, context, code, product)
+
+    @COMMAND_TIME_BARCODE.time()
+    def _photo_callback(self, update: Update, context: CallbackContext) -> None:
+        """
+        Show the products of all barcodes found in a photo
+        :param update: the chat update object
+        :param context: telegram context
+        """
+        bot = context.bot
+        chat_id = update.effective_chat.id
+        message = update.effective_message
+
+        if not CONFIG_ADMINS.evaluate(update, context):
+            return
+
+        if not is_barcode_decoding_available():
+            send_message(bot, chat_id, "Barcode decoding is not available, "
+                                       "please install the 'pyzbar' and 'Pillow' packages.",
+                         reply_to=message.message_id)
+            return
+
+        # the last photo size is the largest one
+        image_data = bytes(message.photo[-1].get_file().download_as_bytearray())
+        barcodes = decode_barcodes(image_data)
+        if len(barcodes) <= 0:
+            send_message(bot, chat_id, "No barcode found.", reply_to=message.message_id)
+            return
+
+        index = self._grocy.get_barcode_index()
+        for code in barcodes:
+            self._send_product(update, context, code, index.lookup(code))
+
+    @staticmethod
+    def _send_product(update: Update, context: CallbackContext, code: str, product: Product or None):
+        """
+        Sends a product along with buttons to add it to the inventory or shopping list, or to consume it
+        :param update: the chat update object
+        :param context: telegram context
+        :param code: the barcode
+        :param product: the product, or None if no product with this barcode exists
+        """
+        bot = context.bot
+        chat_id = update.effective_chat.id
+        message_id = update.effective_message.message_id
+
+        if product is None:
+            send_message(bot, chat_id, f"No product found for barcode `{code}`",
+                         parse_mode=ParseMode.MARKDOWN, reply_to=message_id)
+            return
+
+        send_message(bot, chat_id, product_to_str(product), reply_to=message_id,
+                     menu=create_product_action_keyboard(product.id))
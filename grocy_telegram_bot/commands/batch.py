@@ -0,0 +1,295 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Tuple, Dict
+
+from telegram import Update, ParseMode, InlineKeyboardMarkup, InlineKeyboardButton
+from telegram.ext import Filters, CommandHandler, CallbackContext
+from telegram.utils.helpers import escape_markdown
+
+from grocy_telegram_bot.cache import deferred_cache_invalidation
+from grocy_telegram_bot.commands import GrocyCommandHandler
+from grocy_telegram_bot.const import COMMAND_INVENTORY_ADD, COMMAND_INVENTORY_REMOVE, COMMAND_SHOPPING_LIST_ADD, \
+    NEVER_EXPIRES_DATE
+from grocy_telegram_bot.permissions import CONFIG_ADMINS
+from grocy_telegram_bot.stats import COMMAND_TIME_INVENTORY, COMMAND_TIME_SHOPPING_LIST_ADD
+from grocy_telegram_bot.telegram_util import BatchItemSelectionCallbackData
+from grocy_telegram_bot.util import send_message, parse_batch_items, parse_expiration_date
+
+LOGGER = logging.getLogger(__name__)
+
+BATCH_ACTION_INVENTORY_ADD = "inventory_add"
+BATCH_ACTION_INVENTORY_REMOVE = "inventory_remove"
+BATCH_ACTION_SHOPPING_LIST_ADD = "shopping_list_add"
+
+# maximum number of suggestions offered for an ambiguous item
+BATCH_SUGGESTION_LIMIT = 3
+# maximum number of Grocy writes executed at the same time
+BATCH_WRITE_WORKERS = 4
+# product id of the button to skip an ambiguous item
+SKIP_PRODUCT_ID = -1
+# maximum number of ambiguous items asked for at once, to stay below the button limit of inline keyboards
+BATCH_SELECTION_MAX_ITEMS = 10
+# options of the single item commands, which can be given for all items after the command, f.ex. "/sla id=2"
+BATCH_OPTIONS = {
+    BATCH_ACTION_INVENTORY_ADD: ["exp", "price"],
+    BATCH_ACTION_INVENTORY_REMOVE: [],
+    BATCH_ACTION_SHOPPING_LIST_ADD: ["id"],
+}
+
+
+class BatchCommandHandler(GrocyCommandHandler):
+    """
+    Handles inventory and shopping list commands with multiple items, one item per line below the command, f.ex.:
+    "/sla id=2\n2 milk\neggs\n3 bread".
+    All items are resolved in a single pass over the product index, ambiguous items are asked for
+    in one combined keyboard and the resulting Grocy writes are executed concurrently.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._inline_keyboard_handler.register_callback(
+            BatchItemSelectionCallbackData.command_id, self._item_selection_callback)
+
+    def command_handlers(self):
+        # commands are only handled here if they contain a list of items on separate lines,
+        # so these handlers have to be registered before the single item command handlers
+        batch_filter = (~ Filters.reply) & (~ Filters.forwarded) & Filters.regex(r"\n\s*\S")
+        return [
+            CommandHandler(COMMAND_INVENTORY_ADD,
+                           filters=batch_filter,
+                           callback=self._inventory_add_callback),
+            CommandHandler(COMMAND_INVENTORY_REMOVE,
+                           filters=batch_filter,
+                           callback=self._inventory_remove_callback),
+            CommandHandler(COMMAND_SHOPPING_LIST_ADD,
+                           filters=batch_filter,
+                           callback=self._shopping_list_add_callback),
+        ]
+
+    @COMMAND_TIME_INVENTORY.time()
+    def _inventory_add_callback(self, update: Update, context: CallbackContext):
+        self._batch_callback(update, context, BATCH_ACTION_INVENTORY_ADD)
+
+    @COMMAND_TIME_INVENTORY.time()
+    def _inventory_remove_callback(self, update: Update, context: CallbackContext):
+        self._batch_callback(update, context, BATCH_ACTION_INVENTORY_REMOVE)
+
+    @COMMAND_TIME_SHOPPING_LIST_ADD.time()
+    def _shopping_list_add_callback(self, update: Update, context: CallbackContext):
+        self._batch_callback(update, context, BATCH_ACTION_SHOPPING_LIST_ADD)
+
+    def _batch_callback(self, update: Update, context: CallbackContext, action: str):
+        """
+        Resolves the items of a batch command and either executes it right away,
+        or asks the user to select the products of ambiguous items first
+        :param update: the chat update object
+        :param context: telegram context
+        :param action: the batch action to execute
+        """
+        bot = context.bot
+        chat_id = update.effective_chat.id
+        message_id = update.effective_message.message_id
+
+        if not CONFIG_ADMINS.evaluate(update, context):
+            send_message(bot, chat_id, "Sorry, you do not have permissions to use this command.",
+                         reply_to=message_id)
+            return
+
+        # the first line contains the command and its options, the items follow on separate lines
+        lines = update.effective_message.text.split("\n", maxsplit=1)
+        try:
+            options = self._parse_options(action, lines[0])
+        except ValueError as ex:
+            send_message(bot, chat_id, str(ex), reply_to=message_id)
+            return
+        items = parse_batch_items(lines[1] if len(lines) > 1 else "")
+        if len(items) <= 0:
+            send_message(bot, chat_id, "Please specify at least one item.", reply_to=message_id)
+            return
+
+        index = self._grocy.get_product_index()
+        resolved = []
+        ambiguous = {}
+        for item_index, (amount, name) in enumerate(items):
+            matches = index.search(name, limit=BATCH_SUGGESTION_LIMIT)
+            perfect_matches = list(filter(lambda x: x[1] == 100, matches))
+            if len(perfect_matches) == 1:
+                resolved.append([perfect_matches[0][0].id, amount])
+            else:
+                ambiguous[str(item_index)] = {
+                    "name": name,
+                    "amount": amount,
+                    "options": list(map(lambda x: [x[0].id, x[0].name], matches)),
+                }
+
+        if len(ambiguous) <= 0:
+            text = self._execute(action, resolved, options)
+            send_message(bot, chat_id, text, parse_mode=ParseMode.MARKDOWN, reply_to=message_id)
+            return
+
+        data = {
+            "action": action,
+            "options": options,
+            "resolved": resolved,
+            "ambiguous": ambiguous,
+        }
+        message = send_message(bot, chat_id, self._create_selection_text(data), parse_mode=ParseMode.MARKDOWN,
+                               reply_to=message_id, menu=self._create_selection_keyboard(ambiguous))
+        self._inline_keyboard_handler.register_listener(
+            chat_id=chat_id,
+            message_id=message.message_id,
+            command_id=BatchItemSelectionCallbackData.command_id,
+            callback_data=data)
+
+    def _item_selection_callback(self, update: Update, context: CallbackContext, button_data: str, data: dict):
+        """
+        Called when the product of an ambiguous item was selected
+        :param update: the chat update object
+        :param context: telegram context
+        :param button_data: callback data of the pressed button
+        :param data: the stored state of the batch
+        """
+        bot = context.bot
+        chat_id = update.effective_chat.id
+        message_id = update.effective_message.message_id
+        query_id = update.callback_query.id
+
+        if not CONFIG_ADMINS.evaluate(update, context):
+            bot.answer_callback_query(query_id, text="Sorry, you do not have permissions to do this.")
+            return
+
+        button_data = BatchItemSelectionCallbackData.decode(button_data)
+        item = data["ambiguous"].pop(str(button_data.item_index), None)
+        if item is None:
+            bot.answer_callback_query(query_id, text="This item was already selected.")
+            return
+        if button_data.product_id != SKIP_PRODUCT_ID:
+            data["resolved"].append([button_data.product_id, item["amount"]])
+        bot.answer_callback_query(query_id)
+
+        if len(data["ambiguous"]) > 0:
+            bot.edit_message_text(self._create_selection_text(data), chat_id=chat_id, message_id=message_id,
+                                  parse_mode=ParseMode.MARKDOWN,
+                                  reply_markup=self._create_selection_keyboard(data["ambiguous"]))
+            return
+
+        text = self._execute(data["action"], data["resolved"], data.get("options", {}))
+        bot.edit_message_text(text, chat_id=chat_id, message_id=message_id, parse_mode=ParseMode.MARKDOWN)
+
+    @staticmethod
+    def _parse_options(action: str, command_line: str) -> dict:
+        """
+        Parses the options given after the command, which apply to all items of the batch
+        :param action: the batch action
+        :param command_line: the line of the command, f.ex. "/ia exp=2w price=2.80"
+        :return: json serializable options
+        """
+        command, *args = command_line.split()
+        allowed = BATCH_OPTIONS[action]
+        raw = {}
+        for arg in args:
+            key, _, value = arg.partition("=")
+            if key not in allowed or len(value) <= 0:
+                text = f"Please put every item on a separate line below the command, f.ex.:\n{command}\n2 milk\neggs"
+                if len(allowed) > 0:
+                    text += "\nOptions for all items can be given after the command: {}".format(
+                        " ".join(map(lambda x: f"{x}=...", allowed)))
+                raise ValueError(text)
+            raw[key] = value
+
+        options = {}
+        try:
+            if action == BATCH_ACTION_INVENTORY_ADD:
+                exp = parse_expiration_date(raw.get("exp", "Never"))
+                options["exp"] = None if exp == NEVER_EXPIRES_DATE else exp.isoformat()
+                options["price"] = float(raw["price"]) if "price" in raw else None
+                if options["price"] is not None and options["price"] <= 0:
+                    raise ValueError(f"Invalid price: {raw['price']}")
+            elif action == BATCH_ACTION_SHOPPING_LIST_ADD:
+                options["shopping_list_id"] = int(raw.get("id", 1))
+        except ValueError as ex:
+            raise ValueError(f"Invalid option: {ex}") from ex
+        return options
+
+    def _execute(self, action: str, items: List[List[int]], options: dict) -> str:
+        """
+        Executes the Grocy writes of a batch concurrently
+        :param action: the batch action
+        :param items: list of [product id, amount] items
+        :param options: the options of the batch
+        :return: summary of the results
+        """
+        if len(items) <= 0:
+            return "Nothing to do."
+
+        exp = options.get("exp", None)
+        exp = NEVER_EXPIRES_DATE if exp is None else datetime.fromisoformat(exp)
+        write = {
+            BATCH_ACTION_INVENTORY_ADD: lambda product_id, amount: self._grocy.add_product(
+                product_id=product_id, amount=amount, price=options.get("price", None), best_before_date=exp),
+            BATCH_ACTION_INVENTORY_REMOVE: lambda product_id, amount: self._grocy.add_product(
+                product_id=product_id, amount=-amount, price=None),
+            BATCH_ACTION_SHOPPING_LIST_ADD: lambda product_id, amount: self._grocy.add_product_to_shopping_list(
+                product_id, options.get("shopping_list_id", 1), amount),
+        }[action]
+
+        products = dict(map(lambda x: (x.id, x), self._grocy.get_all_products()))
+
+        def execute(item: List[int]) -> Tuple[List[int], Exception or None]:
+            try:
+                write(*item)
+                return item, None
+            except Exception as ex:
+                LOGGER.exception(f"Error executing batch item {item}")
+                return item, ex
+
+        with deferred_cache_invalidation() as deferral:
+            with ThreadPoolExecutor(max_workers=min(BATCH_WRITE_WORKERS, len(items)),
+                                    thread_name_prefix="batch") as executor:
+                results = list(executor.map(deferral.wrap(execute), items))
+
+        verb = {
+            BATCH_ACTION_INVENTORY_ADD: "Added",
+            BATCH_ACTION_INVENTORY_REMOVE: "Removed",
+            BATCH_ACTION_SHOPPING_LIST_ADD: "Added",
+        }[action]
+        lines = []
+        for (product_id, amount), ex in results:
+            product = products.get(product_id, None)
+            name = escape_markdown(product.name) if product is not None else f"product {product_id}"
+            if ex is None:
+                lines.append(f"{verb} {amount}x {name}")
+            else:
+                lines.append(f"Failed: {amount}x {name}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _create_selection_text(data: dict) -> str:
+        ambiguous = list(data["ambiguous"].values())
+        lines = ["No unique perfect match found for some items, please select the matching products:"]
+        for item in ambiguous[:BATCH_SELECTION_MAX_ITEMS]:
+            # entities can't contain escaped characters, so names are not formatted
+            lines.append(f"  {item['amount']}x {escape_markdown(item['name'])}")
+        if len(ambiguous) > BATCH_SELECTION_MAX_ITEMS:
+            lines.append(f"  ...and {len(ambiguous) - BATCH_SELECTION_MAX_ITEMS} more afterwards")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _create_selection_keyboard(ambiguous: Dict[str, dict]) -> InlineKeyboardMarkup:
+        """
+        Creates a keyboard with the suggestions of the first ambiguous items,
+        the remaining items are shown once these have been selected
+        :param ambiguous: item index -> item
+        :return: reply markup
+        """
+        buttons = []
+        for item_index, item in list(ambiguous.items())[:BATCH_SELECTION_MAX_ITEMS]:
+            for product_id, product_name in item["options"]:
+                buttons.append(InlineKeyboardButton(
+                    f"{item['name']}: {product_name}",
+                    callback_data=BatchItemSelectionCallbackData(int(item_index), product_id).encode()))
+            buttons.append(InlineKeyboardButton(
+                f"{item['name']}: ✖ skip",
+                callback_data=BatchItemSelectionCallbackData(int(item_index), SKIP_PRODUCT_ID).encode()))
+        return InlineKeyboardMarkup.from_column(buttons)
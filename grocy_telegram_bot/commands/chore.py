@@ -1,19 +1,28 @@
 from datetime import datetime
+from typing import List, Any
 
 from telegram import ParseMode, Update
 from telegram.ext import Filters, CommandHandler, CallbackContext
 from telegram_click.argument import Flag
 from telegram_click.decorator import command
 
+from grocy_telegram_bot.bot.paginated_list import PaginatedList
 from grocy_telegram_bot.commands import GrocyCommandHandler
 from grocy_telegram_bot.const import COMMAND_CHORES
 from grocy_telegram_bot.permissions import CONFIG_ADMINS
+from grocy_telegram_bot.render import chore_to_row, render_chore_rows
 from grocy_telegram_bot.stats import COMMAND_TIME_CHORES
-from grocy_telegram_bot.util import send_message, filter_overdue_chores, chore_to_str
+from grocy_telegram_bot.util import filter_overdue_chores
 
 
 class ChoreCommandHandler(GrocyCommandHandler):
 
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._chore_list = PaginatedList(
+            self._inline_keyboard_handler, COMMAND_CHORES[0], self._load_chore_rows, render_chore_rows,
+            page_size=self._config.BOT_LIST_PAGE_SIZE.value, cache_rows=self._config.BOT_LIST_CACHE_ROWS.value)
+
     def command_handlers(self):
         return [
             CommandHandler(COMMAND_CHORES,
@@ -39,6 +48,13 @@ class ChoreCommandHandler(GrocyCommandHandler):
         bot = context.bot
         chat_id = update.effective_chat.id
 
+        self._chore_list.send(bot, chat_id, "*=> Chores <=*", {"all": all}, parse_mode=ParseMode.MARKDOWN)
+
+    def _load_chore_rows(self, query: dict) -> List[Any]:
+        """
+        :param query: {"all": whether to list all chores, instead of only overdue ones}
+        :return: rows of the chore list
+        """
         chores = self._grocy.chores(True)
         chores = sorted(
             chores,
@@ -49,22 +65,18 @@ class ChoreCommandHandler(GrocyCommandHandler):
         overdue_chores = filter_overdue_chores(chores)
         other = [item for item in chores if item not in overdue_chores]
 
-        overdue_item_texts = list(map(chore_to_str, overdue_chores))
-        other_item_texts = list(map(chore_to_str, other))
-
-        lines = ["*=> Chores <=*"]
-        if all and len(other_item_texts) > 0:
-            lines.extend([
+        # section headers are kept as plain strings
+        rows = []
+        if query["all"] and len(other) > 0:
+            rows.extend([
                 "",
-                *other_item_texts
+                *map(chore_to_row, other)
             ])
 
-        if len(overdue_item_texts) > 0:
-            lines.extend([
+        if len(overdue_chores) > 0:
+            rows.extend([
                 "",
                 "*Overdue:*",
-                *overdue_item_texts
+                *map(chore_to_row, overdue_chores)
             ])
-
-        text = "\n".join(lines).strip()
-        send_message(bot, chat_id, text, parse_mode=ParseMode.MARKDOWN)
+        return rows
@@ -0,0 +1,66 @@
+from telegram import Update
+from telegram.ext import Filters, CommandHandler, CallbackContext
+from telegram_click.argument import Argument
+from telegram_click.decorator import command
+
+from grocy_telegram_bot.commands import GrocyCommandHandler
+from grocy_telegram_bot.const import COMMAND_EXPORT
+from grocy_telegram_bot.export import create_export, EXPORT_FORMATS, EXPORT_FORMAT_CSV
+from grocy_telegram_bot.permissions import CONFIG_ADMINS
+from grocy_telegram_bot.render import product_to_row, chore_to_row, shopping_list_item_to_row
+from grocy_telegram_bot.stats import COMMAND_TIME_EXPORT
+
+EXPORT_LIST_INVENTORY = "inventory"
+EXPORT_LIST_CHORES = "chores"
+EXPORT_LIST_SHOPPING_LIST = "shopping_list"
+EXPORT_LISTS = [EXPORT_LIST_INVENTORY, EXPORT_LIST_CHORES, EXPORT_LIST_SHOPPING_LIST]
+
+
+class ExportCommandHandler(GrocyCommandHandler):
+
+    def command_handlers(self):
+        return [
+            CommandHandler(COMMAND_EXPORT,
+                           filters=(~ Filters.reply) & (~ Filters.forwarded),
+                           callback=self._export_callback),
+        ]
+
+    @command(
+        name=COMMAND_EXPORT,
+        description="Export a list as a file.",
+        arguments=[
+            Argument(name=["list"], description="The list to export", example=EXPORT_LIST_INVENTORY,
+                     validator=lambda x: x in EXPORT_LISTS, optional=True, default=EXPORT_LIST_INVENTORY),
+            Argument(name=["format"], description="File format", example=EXPORT_FORMAT_CSV,
+                     validator=lambda x: x in EXPORT_FORMATS, optional=True, default=EXPORT_FORMAT_CSV),
+        ],
+        permissions=CONFIG_ADMINS
+    )
+    @COMMAND_TIME_EXPORT.time()
+    def _export_callback(self, update: Update, context: CallbackContext, list: str, format: str) -> None:
+        """
+        Sends a list as a document
+        :param update: the chat update object
+        :param context: telegram context
+        :param list: the list to export
+        :param format: the file format
+        """
+        bot = context.bot
+        chat_id = update.effective_chat.id
+        message_id = update.effective_message.message_id
+
+        # rows are generated lazily while the file is written
+        if list == EXPORT_LIST_INVENTORY:
+            products = sorted(self._grocy.get_unique_products(), key=lambda x: x.name.lower())
+            columns = ["amount", "name", "best_before_date"]
+            rows = map(product_to_row, products)
+        elif list == EXPORT_LIST_CHORES:
+            columns = ["name", "next_estimated_execution_time"]
+            rows = map(chore_to_row, self._grocy.chores(True))
+        else:
+            shopping_list_items = sorted(self._grocy.shopping_list(True), key=lambda x: x.product.name.lower())
+            columns = ["amount", "name"]
+            rows = map(shopping_list_item_to_row, shopping_list_items)
+
+        with create_export(columns, rows, format) as file:
+            bot.send_document(chat_id, document=file, filename=f"{list}.{format}", reply_to_message_id=message_id)
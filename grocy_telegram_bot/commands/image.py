@@ -0,0 +1,98 @@
+import logging
+
+from pygrocy.grocy import Product
+from telegram import Update, ReplyKeyboardRemove
+from telegram.error import BadRequest
+from telegram.ext import Filters, CommandHandler, CallbackContext
+from telegram_click.argument import Argument
+from telegram_click.decorator import command
+
+from grocy_telegram_bot.commands import GrocyCommandHandler
+from grocy_telegram_bot.const import COMMAND_IMAGE
+from grocy_telegram_bot.images import ProductImageCache, create_thumbnail
+from grocy_telegram_bot.permissions import CONFIG_ADMINS
+from grocy_telegram_bot.stats import COMMAND_TIME_IMAGE
+from grocy_telegram_bot.util import send_message, send_photo
+
+LOGGER = logging.getLogger(__name__)
+
+CALLBACK_ID_IMAGE = "image"
+
+
+class ImageCommandHandler(GrocyCommandHandler):
+    """
+    Shows product pictures from Grocy. Every picture is downloaded and uploaded to telegram only once,
+    afterwards the telegram file_id of the upload is sent instead.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._image_cache = ProductImageCache(self._config.BOT_IMAGES_CACHE_FILE.value)
+        self._reply_keyboard_handler.register_callback(
+            CALLBACK_ID_IMAGE, self._image_keyboard_response_callback, self._find_product)
+
+    def command_handlers(self):
+        return [
+            CommandHandler(COMMAND_IMAGE,
+                           filters=(~ Filters.reply) & (~ Filters.forwarded),
+                           callback=self._image_callback),
+        ]
+
+    @command(
+        name=COMMAND_IMAGE,
+        description="Show the picture of a product.",
+        arguments=[
+            Argument(name=["name"], description="Product name", example="Banana"),
+        ],
+        permissions=CONFIG_ADMINS
+    )
+    @COMMAND_TIME_IMAGE.time()
+    def _image_callback(self, update: Update, context: CallbackContext, name: str) -> None:
+        """
+        Show the picture of a product
+        :param update: the chat update object
+        :param context: telegram context
+        :param name: product name
+        """
+        self._reply_keyboard_handler.await_user_selection(
+            update, context, name, index=self._grocy.get_product_index(),
+            callback_id=CALLBACK_ID_IMAGE,
+            callback_data={}
+        )
+
+    def _image_keyboard_response_callback(self, update: Update, context: CallbackContext,
+                                          product: Product, data: dict):
+        """
+        Called when the user has selected the product to show the picture of
+        :param update: the chat update object
+        :param context: telegram context
+        :param product: the selected product
+        :param data: callback data
+        """
+        bot = context.bot
+        chat_id = update.effective_chat.id
+        message_id = update.effective_message.message_id
+        menu = ReplyKeyboardRemove(selective=True)
+
+        picture_file_name = self._grocy.get_product_picture_file_name(product.id)
+        if picture_file_name is None:
+            send_message(bot, chat_id, f"{product.name} has no picture.", reply_to=message_id, menu=menu)
+            return
+
+        file_id = self._image_cache.get(product.id, picture_file_name)
+        if file_id is not None:
+            try:
+                send_photo(bot, chat_id, file_id=file_id, caption=product.name, reply_to=message_id, menu=menu)
+                return
+            except BadRequest as ex:
+                # f.ex. when the bot token has changed, file_id's are only valid for the bot that uploaded them
+                LOGGER.warning(f"Uploading picture of product {product.id} again, file_id was rejected: {ex}")
+                self._image_cache.remove(product.id)
+
+        max_size = self._config.BOT_IMAGES_THUMBNAIL_SIZE.value
+        image_data = self._grocy.download_product_picture(picture_file_name, max_size)
+        image_data = create_thumbnail(image_data, max_size)
+        file_ids = send_photo(bot, chat_id, image_data=image_data, caption=product.name, reply_to=message_id,
+                              menu=menu)
+        # reuse the largest size, which is the thumbnail we uploaded
+        self._image_cache.put(product.id, picture_file_name, file_ids[-1])
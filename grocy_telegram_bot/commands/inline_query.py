@@ -0,0 +1,106 @@
+import logging
+import threading
+from typing import List
+
+from expiringdict import ExpiringDict
+from pygrocy.grocy import Product
+from telegram import Update, InlineQueryResultArticle, InputTextMessageContent
+from telegram.ext import CallbackContext, InlineQueryHandler
+
+from grocy_telegram_bot.commands import GrocyCommandHandler
+from grocy_telegram_bot.commands.product_action import create_product_action_keyboard
+from grocy_telegram_bot.permissions import CONFIG_ADMINS
+from grocy_telegram_bot.search import normalize
+from grocy_telegram_bot.stats import COMMAND_TIME_INLINE_QUERY
+
+LOGGER = logging.getLogger(__name__)
+
+# maximum number of suggestions per inline query
+INLINE_QUERY_RESULT_LIMIT = 10
+# time in seconds telegram clients may cache the results of an inline query
+INLINE_QUERY_CACHE_TIME = 10
+
+
+class InlineQueryCommandHandler(GrocyCommandHandler):
+    """
+    Answers inline queries (f.ex. "@bot milk") with product suggestions,
+    which can be added to the inventory or shopping list or consumed with a single button press.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        # (index version, normalized query) -> results
+        self._results_cache = ExpiringDict(max_len=1000, max_age_seconds=600)
+        # held while the product index is refreshed in the background
+        self._refresh_lock = threading.Lock()
+
+    def command_handlers(self):
+        return [
+            InlineQueryHandler(callback=self._inline_query_callback),
+        ]
+
+    @COMMAND_TIME_INLINE_QUERY.time()
+    def _inline_query_callback(self, update: Update, context: CallbackContext) -> None:
+        """
+        Answers an inline query with matching products
+        :param update: the chat update object
+        :param context: telegram context
+        """
+        query = update.inline_query
+        if not CONFIG_ADMINS.evaluate(update, context):
+            context.bot.answer_inline_query(query.id, results=[], cache_time=INLINE_QUERY_CACHE_TIME,
+                                            is_personal=True)
+            return
+
+        # only use the index in memory, to answer as fast as possible
+        index = self._grocy.product_index
+        # the index hasn't been loaded yet, telegram must not cache the (empty) results
+        cache_time = INLINE_QUERY_CACHE_TIME if index.version > 0 else 0
+        term = normalize(query.query)
+        cache_key = (index.version, term)
+        results = self._results_cache.get(cache_key, None)
+        if results is None:
+            if len(term) <= 0:
+                matches = []
+            else:
+                matches = list(map(lambda x: x[0], index.search(term, limit=INLINE_QUERY_RESULT_LIMIT)))
+            results = self._create_results(matches)
+            self._results_cache[cache_key] = results
+
+        context.bot.answer_inline_query(query.id, results=results, cache_time=cache_time, is_personal=True)
+
+        # refresh the index for upcoming queries, without blocking them
+        self._refresh_index()
+
+    def _refresh_index(self):
+        """
+        Refreshes the product index on a background thread, unless a refresh is already running
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+
+        def refresh():
+            try:
+                self._grocy.get_product_index()
+            except Exception as ex:
+                LOGGER.warning(f"Error refreshing product index: {ex}")
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=refresh, name="product-index-refresh", daemon=True).start()
+
+    @staticmethod
+    def _create_results(products: List[Product]) -> List[InlineQueryResultArticle]:
+        """
+        Creates inline query results for the given products
+        :param products: products
+        :return: inline query results
+        """
+        return list(map(lambda x: InlineQueryResultArticle(
+            id=str(x.id),
+            title=x.name,
+            description=f"In stock: {x.available_amount}",
+            input_message_content=InputTextMessageContent(x.name),
+            reply_markup=create_product_action_keyboard(x.id),
+        ), products))
+
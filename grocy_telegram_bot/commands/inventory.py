@@ -1,4 +1,5 @@
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import List
 
 from pygrocy.grocy import Product
 from telegram import ParseMode, Update, ReplyKeyboardRemove
@@ -6,16 +7,32 @@ from telegram.ext import Filters, CommandHandler, CallbackContext
 from telegram_click.argument import Flag, Argument
 from telegram_click.decorator import command
 
+from grocy_telegram_bot.bot.paginated_list import PaginatedList
 from grocy_telegram_bot.commands import GrocyCommandHandler
 from grocy_telegram_bot.const import COMMAND_INVENTORY, COMMAND_INVENTORY_ADD, NEVER_EXPIRES_DATE, \
     COMMAND_INVENTORY_REMOVE
 from grocy_telegram_bot.permissions import CONFIG_ADMINS
 from grocy_telegram_bot.stats import COMMAND_TIME_INVENTORY
-from grocy_telegram_bot.util import send_message, product_to_str, timing
+from grocy_telegram_bot.render import product_to_row, render_product_rows
+from grocy_telegram_bot.util import send_message, timing, parse_expiration_date
+
+
+CALLBACK_ID_INVENTORY_ADD = "inventory_add"
+CALLBACK_ID_INVENTORY_REMOVE = "inventory_remove"
 
 
 class InventoryCommandHandler(GrocyCommandHandler):
 
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._reply_keyboard_handler.register_callback(
+            CALLBACK_ID_INVENTORY_ADD, self._add_product_keyboard_response_callback, self._find_product)
+        self._reply_keyboard_handler.register_callback(
+            CALLBACK_ID_INVENTORY_REMOVE, self._remove_product_keyboard_response_callback, self._find_product)
+        self._inventory_list = PaginatedList(
+            self._inline_keyboard_handler, COMMAND_INVENTORY[0], self._load_inventory_rows, render_product_rows,
+            page_size=self._config.BOT_LIST_PAGE_SIZE.value, cache_rows=self._config.BOT_LIST_CACHE_ROWS.value)
+
     def command_handlers(self):
         return [
             CommandHandler(COMMAND_INVENTORY,
@@ -47,23 +64,24 @@ class InventoryCommandHandler(GrocyCommandHandler):
         bot = context.bot
         chat_id = update.effective_chat.id
 
+        self._inventory_list.send(bot, chat_id, "*=> Inventory <=*", {"missing": missing},
+                                  parse_mode=ParseMode.MARKDOWN)
+
+    def _load_inventory_rows(self, query: dict) -> List[list]:
+        """
+        :param query: {"missing": whether to only list missing products}
+        :return: rows of the inventory list
+        """
         products = self._grocy.get_all_products()
-        if missing:
+        if query["missing"]:
             products = list(filter(lambda x: x.amount == 0, products))
 
         products = sorted(products, key=lambda x: x.name.lower())
-
-        item_texts = list(list(map(product_to_str, products)))
-        text = "\n".join([
-            "*=> Inventory <=*",
-            *item_texts,
-        ]).strip()
-
-        send_message(bot, chat_id, text, parse_mode=ParseMode.MARKDOWN)
+        return list(map(product_to_row, products))
 
     @command(
         name=COMMAND_INVENTORY_REMOVE,
-        description="Remove a product from inventory.",
+        description="Remove a product from inventory. Put multiple products on separate lines below the command",
         arguments=[
             Argument(name=["name"], description="Product name", example="Banana"),
             Argument(name=["amount"], description="Product amount", type=int, example="2",
@@ -79,10 +97,9 @@ class InventoryCommandHandler(GrocyCommandHandler):
         :param update: the chat update object
         :param context: telegram context
         """
-        products = self._grocy.get_all_products()
         self._reply_keyboard_handler.await_user_selection(
-            update, context, name, choices=products, key=lambda x: x.name,
-            callback=self._remove_product_keyboard_response_callback,
+            update, context, name, index=self._grocy.get_product_index(),
+            callback_id=CALLBACK_ID_INVENTORY_REMOVE,
             callback_data={
                 "product_name": name,
                 "amount": amount,
@@ -91,7 +108,7 @@ class InventoryCommandHandler(GrocyCommandHandler):
 
     @command(
         name=COMMAND_INVENTORY_ADD,
-        description="Add a product to inventory.",
+        description="Add a product to inventory. Put multiple products on separate lines below the command",
         arguments=[
             Argument(name=["name"], description="Product name", example="Banana"),
             Argument(name=["amount"], description="Product amount", type=int, example="2",
@@ -111,28 +128,15 @@ class InventoryCommandHandler(GrocyCommandHandler):
         :param update: the chat update object
         :param context: telegram context
         """
-        # parse the expiration date input
-        if exp.casefold() == "never".casefold():
-            exp = NEVER_EXPIRES_DATE
-        else:
-            try:
-                from dateutil import parser
-                exp = parser.parse(exp)
-            except:
-                from pytimeparse import parse
-                parsed = parse(exp)
-                if parsed is None:
-                    raise ValueError("Cannot parse the given time format: {}".format(exp))
-                exp = datetime.now() + timedelta(seconds=parsed)
+        exp = parse_expiration_date(exp)
 
-        products = self._grocy.get_all_products()
         self._reply_keyboard_handler.await_user_selection(
-            update, context, name, choices=products, key=lambda x: x.name,
-            callback=self._add_product_keyboard_response_callback,
+            update, context, name, index=self._grocy.get_product_index(),
+            callback_id=CALLBACK_ID_INVENTORY_ADD,
             callback_data={
                 "product_name": name,
                 "amount": amount,
-                "exp": exp,
+                "exp": None if exp == NEVER_EXPIRES_DATE else exp.isoformat(),
                 "price": price
             }
         )
@@ -147,7 +151,7 @@ class InventoryCommandHandler(GrocyCommandHandler):
         :param data: callback data
         """
         amount = data["amount"]
-        exp = data["exp"]
+        exp = NEVER_EXPIRES_DATE if data["exp"] is None else datetime.fromisoformat(data["exp"])
         price = data["price"]
 
         self._inventory_add_execute(update, context, product, amount, exp, price)
@@ -0,0 +1,76 @@
+from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
+from telegram.ext import CallbackContext
+
+from grocy_telegram_bot.commands import GrocyCommandHandler
+from grocy_telegram_bot.const import NEVER_EXPIRES_DATE
+from grocy_telegram_bot.permissions import CONFIG_ADMINS
+from grocy_telegram_bot.telegram_util import ProductActionCallbackData, PRODUCT_ACTION_ADD_TO_SHOPPING_LIST, \
+    PRODUCT_ACTION_CONSUME, PRODUCT_ACTION_INVENTORY_ADD
+
+
+class ProductActionCommandHandler(GrocyCommandHandler):
+    """
+    Handles the buttons created by create_product_action_keyboard(), which can be attached to any message
+    (including inline messages) since they don't need any stored state.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._inline_keyboard_handler.register_stateless_callback(
+            ProductActionCallbackData.command_id, self._product_action_callback)
+
+    def command_handlers(self):
+        return []
+
+    def _product_action_callback(self, update: Update, context: CallbackContext,
+                                 data: ProductActionCallbackData):
+        """
+        Called when a product action button is pressed
+        :param update: the chat update object
+        :param context: telegram context
+        :param data: callback data of the pressed button
+        """
+        bot = context.bot
+        query_id = update.callback_query.id
+
+        if not CONFIG_ADMINS.evaluate(update, context):
+            bot.answer_callback_query(query_id, text="Sorry, you do not have permissions to do this.")
+            return
+
+        product = self._find_product(data.product_id)
+        if product is None:
+            bot.answer_callback_query(query_id, text="The product doesn't exist anymore")
+            return
+
+        if data.action == PRODUCT_ACTION_ADD_TO_SHOPPING_LIST:
+            self._grocy.add_product_to_shopping_list(product.id, 1, 1)
+            text = f"Added 1x {product.name} to the shopping list"
+        elif data.action == PRODUCT_ACTION_CONSUME:
+            self._grocy.add_product(product_id=product.id, amount=-1, price=None)
+            text = f"Removed 1x {product.name}"
+        elif data.action == PRODUCT_ACTION_INVENTORY_ADD:
+            self._grocy.add_product(product_id=product.id, amount=1, price=None, best_before_date=NEVER_EXPIRES_DATE)
+            text = f"Added 1x {product.name}"
+        else:
+            raise ValueError(f"Unknown product action: {data.action}")
+
+        bot.answer_callback_query(query_id, text=text)
+
+
+def create_product_action_keyboard(product_id: int) -> InlineKeyboardMarkup:
+    """
+    Creates buttons to execute actions on a product
+    :param product_id: the product id
+    :return: reply markup
+    """
+    return InlineKeyboardMarkup.from_row([
+        InlineKeyboardButton(
+            "➕ Add",
+            callback_data=ProductActionCallbackData(product_id, PRODUCT_ACTION_INVENTORY_ADD).encode()),
+        InlineKeyboardButton(
+            "🍽 Consume",
+            callback_data=ProductActionCallbackData(product_id, PRODUCT_ACTION_CONSUME).encode()),
+        InlineKeyboardButton(
+            "🛒 Shopping list",
+            callback_data=ProductActionCallbackData(product_id, PRODUCT_ACTION_ADD_TO_SHOPPING_LIST).encode()),
+    ])
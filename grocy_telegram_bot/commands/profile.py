@@ -0,0 +1,88 @@
+from io import BytesIO
+
+from telegram import Update
+from telegram.ext import Filters, CommandHandler, CallbackContext
+from telegram_click.argument import Argument
+from telegram_click.decorator import command
+from telegram_click.permission import PRIVATE_CHAT
+
+from grocy_telegram_bot.commands import GrocyCommandHandler
+from grocy_telegram_bot.const import COMMAND_PROFILE
+from grocy_telegram_bot.permissions import CONFIG_ADMINS
+from grocy_telegram_bot.profiling import sample_stacks, format_collapsed_stacks, format_top_functions, \
+    trace_allocations, ProfilerBusyError
+from grocy_telegram_bot.stats import COMMAND_TIME_PROFILE
+from grocy_telegram_bot.util import send_message
+
+PROFILE_MODE_CPU = "cpu"
+PROFILE_MODE_MEMORY = "memory"
+
+PROFILE_FORMAT_TOP = "top"
+PROFILE_FORMAT_COLLAPSED = "collapsed"
+
+# upper bound of the profiling duration, to limit the impact on the running bot
+MAX_PROFILE_SECONDS = 60
+
+
+class ProfileCommandHandler(GrocyCommandHandler):
+    """
+    Profiles the running bot, to find out where cpu time and memory is spent in production
+    """
+
+    def command_handlers(self):
+        return [
+            CommandHandler(COMMAND_PROFILE,
+                           filters=(~ Filters.reply) & (~ Filters.forwarded),
+                           callback=self._profile_callback),
+        ]
+
+    @command(
+        name=COMMAND_PROFILE,
+        description="Profile the dispatcher, handler and watcher threads of the bot for a couple of seconds.",
+        arguments=[
+            Argument(name=["mode"], description="What to profile", example=PROFILE_MODE_CPU,
+                     validator=lambda x: x in [PROFILE_MODE_CPU, PROFILE_MODE_MEMORY],
+                     optional=True, default=PROFILE_MODE_CPU),
+            Argument(name=["seconds"], description="Profiling duration", type=int, example="10",
+                     validator=lambda x: 0 < x <= MAX_PROFILE_SECONDS, optional=True, default=10),
+            Argument(name=["format"], description="Report format of a cpu profile", example=PROFILE_FORMAT_TOP,
+                     validator=lambda x: x in [PROFILE_FORMAT_TOP, PROFILE_FORMAT_COLLAPSED],
+                     optional=True, default=PROFILE_FORMAT_TOP),
+        ],
+        permissions=PRIVATE_CHAT & CONFIG_ADMINS
+    )
+    @COMMAND_TIME_PROFILE.time()
+    def _profile_callback(self, update: Update, context: CallbackContext, mode: str, seconds: int,
+                          format: str) -> None:
+        """
+        Profiles the bot and sends the report as a document
+        :param update: the chat update object
+        :param context: telegram context
+        :param mode: "cpu" to sample stacks, "memory" to trace allocations
+        :param seconds: profiling duration
+        :param format: "top" for a list of the most expensive functions,
+                       "collapsed" for collapsed stacks which can be rendered as a flamegraph
+        """
+        bot = context.bot
+        chat_id = update.effective_chat.id
+        message_id = update.effective_message.message_id
+
+        send_message(bot, chat_id, f"Profiling {mode} for {seconds}s...", reply_to=message_id)
+        try:
+            if mode == PROFILE_MODE_MEMORY:
+                report = trace_allocations(seconds)
+                file_name = "memory.txt"
+            else:
+                stacks = sample_stacks(seconds)
+                if format == PROFILE_FORMAT_COLLAPSED:
+                    report = format_collapsed_stacks(stacks)
+                    file_name = "cpu.collapsed"
+                else:
+                    report = format_top_functions(stacks)
+                    file_name = "cpu.txt"
+        except ProfilerBusyError:
+            send_message(bot, chat_id, "Another profile is already running.", reply_to=message_id)
+            return
+
+        with BytesIO(report.encode()) as file:
+            bot.send_document(chat_id, document=file, filename=file_name, reply_to_message_id=message_id)
@@ -1,23 +1,54 @@
+import functools
+import threading
 from collections import OrderedDict
-from typing import Tuple, List, Dict
+from typing import Tuple, Dict, List
 
 from pygrocy.grocy import ShoppingListProduct, Product
-from telegram import Update, ParseMode, ReplyKeyboardRemove
+from telegram import Update, ParseMode, ReplyKeyboardRemove, Bot
 from telegram.ext import Filters, CommandHandler, CallbackContext
 from telegram_click.argument import Argument, Flag
 from telegram_click.decorator import command
 
+from grocy_telegram_bot.bot.paginated_list import PaginatedList
 from grocy_telegram_bot.commands import GrocyCommandHandler
 from grocy_telegram_bot.const import COMMAND_SHOPPING_LIST, COMMAND_SHOPPING, NEVER_EXPIRES_DATE, \
     COMMAND_SHOPPING_LIST_ADD
 from grocy_telegram_bot.permissions import CONFIG_ADMINS
 from grocy_telegram_bot.stats import COMMAND_TIME_SHOPPING_LIST, COMMAND_TIME_SHOPPING, COMMAND_TIME_SHOPPING_LIST_ADD
 from grocy_telegram_bot.telegram_util import ShoppingListItemButtonCallbackData
-from grocy_telegram_bot.util import send_message, shopping_list_item_to_str
+from grocy_telegram_bot.render import shopping_list_item_to_row, render_shopping_list_item_rows
+from grocy_telegram_bot.util import send_message
+
+
+CALLBACK_ID_SHOPPING_LIST_ADD = "shopping_list_add"
+
+
+class AddToInventoryError(Exception):
+    """
+    Raised when a checked off product has been removed from the shopping list,
+    but adding it to the inventory has failed
+    """
+
+    def __init__(self, cause: Exception):
+        super().__init__(str(cause))
+        self.cause = cause
 
 
 class ShoppingListCommandHandler(GrocyCommandHandler):
 
+    def __init__(self, *args):
+        super().__init__(*args)
+        # guards the check off state of shopping list messages
+        self._check_off_lock = threading.Lock()
+        self._reply_keyboard_handler.register_callback(
+            CALLBACK_ID_SHOPPING_LIST_ADD, self._add_product_keyboard_response_callback, self._find_product)
+        self._inline_keyboard_handler.register_callback(
+            ShoppingListItemButtonCallbackData.command_id, self._shopping_button_pressed_callback)
+        self._shopping_list = PaginatedList(
+            self._inline_keyboard_handler, COMMAND_SHOPPING_LIST[0], self._load_shopping_list_rows,
+            render_shopping_list_item_rows, page_size=self._config.BOT_LIST_PAGE_SIZE.value,
+            cache_rows=self._config.BOT_LIST_CACHE_ROWS.value)
+
     def command_handlers(self):
         return [
             CommandHandler(COMMAND_SHOPPING,
@@ -33,7 +64,7 @@ class ShoppingListCommandHandler(GrocyCommandHandler):
 
     @command(
         name=COMMAND_SHOPPING_LIST_ADD,
-        description="Add an item to a shopping list.",
+        description="Add an item to a shopping list. Put multiple items on separate lines below the command",
         arguments=[
             Argument(name=["name"], description="Product name", example="Banana"),
             Argument(name=["amount"], description="Product amount", type=int, example="2",
@@ -54,10 +85,9 @@ class ShoppingListCommandHandler(GrocyCommandHandler):
         :param amount: product amount
         :param id: shopping list id
         """
-        products = self._grocy.get_all_products()
         self._reply_keyboard_handler.await_user_selection(
-            update, context, name, choices=products, key=lambda x: x.name,
-            callback=self._add_product_keyboard_response_callback,
+            update, context, name, index=self._grocy.get_product_index(),
+            callback_id=CALLBACK_ID_SHOPPING_LIST_ADD,
             callback_data={
                 "product_name": name,
                 "amount": amount,
@@ -106,11 +136,13 @@ class ShoppingListCommandHandler(GrocyCommandHandler):
         # TODO: let the user specify the order of product categories, according to the grocery store of his choice
         shopping_list_items = sorted(shopping_list_items, key=lambda x: x.product.name.lower())
 
+        # only remember what is necessary to regenerate the keyboard
+        items = OrderedDict(map(lambda x: (str(x.id), self._create_shopping_list_item_state(x)), shopping_list_items))
+
         # generate message
         text = "*=> Shopping List <=*"
         # generate keyboard
-        initial_button_tuples = self._create_shopping_list_item_button_tuples(shopping_list_items)
-        inline_keyboard_items = self._create_shopping_list_keyboard_items(initial_button_tuples)
+        inline_keyboard_items = self._create_shopping_list_keyboard_items(items)
         inline_keyboard_markup = self._inline_keyboard_handler.build_inline_keyboard(inline_keyboard_items)
 
         # send message
@@ -120,74 +152,97 @@ class ShoppingListCommandHandler(GrocyCommandHandler):
             chat_id=chat_id,
             message_id=result.message_id,
             command_id=ShoppingListItemButtonCallbackData.command_id,
-            callback=self._shopping_button_pressed_callback,
             callback_data={
-                "shopping_list_items": shopping_list_items,
-                "initial_keyboard_items": initial_button_tuples
+                "items": items
             }
         )
 
     def _shopping_button_pressed_callback(self, update: Update, context: CallbackContext, button_data: str, data: Dict):
-        button_data = ShoppingListItemButtonCallbackData.parse(button_data)
+        button_data = ShoppingListItemButtonCallbackData.decode(button_data)
         query = update.callback_query
         query_id = query.id
 
         # TODO: there is currently no way to query shopping list ids, so this is hardcoded for now
         shopping_list_id = 1
 
-        # retrieve shopping list from grocy
-        # TODO: use list in store or from api?
-        #  using old one for now since it should be way faster
-        # shopping_list_items = self._grocy.shopping_list(True)
-        shopping_list_items = data["shopping_list_items"]
-        # find the matching item
-        matching_items = list(filter(lambda x: x.id == button_data.shopping_list_item_id, shopping_list_items))
-        if len(matching_items) <= 0:
+        # find the matching item in the state of this message
+        #  (instead of querying the api, since it should be way faster)
+        item = data["items"].get(str(button_data.shopping_list_item_id), None)
+        if item is None:
             # if the item is not on the shopping list anymore, show a message
             context.bot.answer_callback_query(query_id, text=f"The item is not on the shopping list anymore.")
             return
 
-        # if the item is still on the shopping list, remove one item
-        item = matching_items[0]
-        response = self._grocy.remove_product_in_shopping_list(item.product_id, shopping_list_id, amount=1)
-        if response is not None:
-            response.raise_for_status()
-
-        # add one item to the inventory
-        product = item.product
-        response = self._grocy.add_product(
-            product_id=product.id, amount=1, price=None, best_before_date=NEVER_EXPIRES_DATE)
-        if response is not None:
-            response.raise_for_status()
+        with self._check_off_lock:
+            # optimistically increase its "clicked" counter
+            item["button_click_count"] += 1
+            answer_text = f"Checked off '{item['product_name']}' ({item['button_click_count']}/{item['amount']})"
+            keyboard_items = self._create_shopping_list_keyboard_items(data["items"])
 
+        # give feedback to the user right away
+        context.bot.answer_callback_query(query_id, text=answer_text)
         # then update the keyboard (list of buttons)
-        stored_button_tuples = data["initial_keyboard_items"]
-        # find the item in button tuples
-        stored_item_title, stored_item_data = \
-            list(filter(lambda x: x[1].shopping_list_item_id == item.id, stored_button_tuples.items()))[0]
-        # increase its "clicked" counter
-        stored_item_data.button_click_count += 1
-        # generate the new button text
-        stored_item_title_new = self._generate_button_title(item, stored_item_data)
-        # remove the old data
-        stored_button_tuples.pop(stored_item_title)
-        if (stored_item_data.button_click_count >= stored_item_data.shopping_list_amount
-                and self._config.BOT_SHOPPING_REMOVE_BUTTON_WHEN_COMPLETE.value):
-            # if all items were checked off, we are done here
-            pass
-        else:
-            # otherwise put the modified data back in the dictionary
-            stored_button_tuples[stored_item_title_new] = stored_item_data
-
-        # regenerate keyboard
-        keyboard_items = self._create_shopping_list_keyboard_items(stored_button_tuples)
-        # we need to re-sort since the items have changed
-        keyboard_items = OrderedDict(sorted(keyboard_items.items(), key=lambda x: x[0].lower()))
         inline_keyboard_markup = self._inline_keyboard_handler.build_inline_keyboard(keyboard_items)
-
         query.edit_message_reply_markup(reply_markup=inline_keyboard_markup)
-        answer_text = f"Checked off '{product.name}' ({stored_item_data.button_click_count}/{stored_item_data.shopping_list_amount})"
-        context.bot.answer_callback_query(query_id, text=answer_text)
+
+        # the actual grocy api calls are delayed, so multiple check offs of the same item are combined
+        self._write_queue.enqueue(
+            key=f"shopping_list_check_off_{shopping_list_id}_{item['product_id']}",
+            amount=1,
+            write=functools.partial(self._check_off_shopping_list_product, item["product_id"], shopping_list_id),
+            on_failure=functools.partial(self._undo_check_off, context.bot, update.effective_chat.id,
+                                         update.effective_message.message_id, button_data.shopping_list_item_id)
+        )
+
+    def _check_off_shopping_list_product(self, product_id: int, shopping_list_id: int, amount: int):
+        """
+        Removes a product from the shopping list and adds it to the inventory
+        :param product_id: product id
+        :param shopping_list_id: shopping list id
+        :param amount: the amount to check off
+        """
+        # the api client raises on http errors
+        self._grocy.remove_product_in_shopping_list(product_id, shopping_list_id, amount=amount)
+        try:
+            self._grocy.add_product(
+                product_id=product_id, amount=amount, price=None, best_before_date=NEVER_EXPIRES_DATE)
+        except Exception as ex:
+            # the product is not on the shopping list anymore, so the check off itself must not be reverted
+            raise AddToInventoryError(ex) from ex
+
+    def _undo_check_off(self, bot: Bot, chat_id: int, message_id: int, shopping_list_item_id: int, amount: int,
+                        error: Exception):
+        """
+        Reverts an optimistic check off, after writing it to grocy has failed
+        :param bot: the bot
+        :param chat_id: chat id of the shopping list message
+        :param message_id: message id of the shopping list message
+        :param shopping_list_item_id: the shopping list item id
+        :param amount: the amount to revert
+        :param error: the error that occurred
+        """
+        if isinstance(error, AddToInventoryError):
+            data = self._inline_keyboard_handler.get_listener_data(chat_id, message_id)
+            product_name = "" if data is None else data["items"][str(shopping_list_item_id)]["product_name"]
+            send_message(bot, chat_id,
+                         f"Checked off {amount}x {product_name}, but failed to add it to the inventory: {error}",
+                         reply_to=message_id)
+            return
+
+        with self._check_off_lock:
+            data = self._inline_keyboard_handler.get_listener_data(chat_id, message_id)
+            if data is None:
+                return
+            item = data["items"][str(shopping_list_item_id)]
+            item["button_click_count"] = max(0, item["button_click_count"] - amount)
+            self._inline_keyboard_handler.register_listener(
+                chat_id, message_id, ShoppingListItemButtonCallbackData.command_id, data)
+            keyboard_items = self._create_shopping_list_keyboard_items(data["items"])
+
+        inline_keyboard_markup = self._inline_keyboard_handler.build_inline_keyboard(keyboard_items)
+        bot.edit_message_reply_markup(chat_id=chat_id, message_id=message_id, reply_markup=inline_keyboard_markup)
+        send_message(bot, chat_id, f"Failed to check off {amount}x {item['product_name']}: {error}",
+                     reply_to=message_id)
 
     @command(
         name=COMMAND_SHOPPING_LIST,
@@ -216,51 +271,70 @@ class ShoppingListCommandHandler(GrocyCommandHandler):
         if add_missing:
             self._grocy.add_missing_product_to_shopping_list(shopping_list_id=id)
 
+        self._shopping_list.send(bot, chat_id, "*=> Shopping List <=*", {"id": id}, parse_mode=ParseMode.MARKDOWN)
+
+    def _load_shopping_list_rows(self, query: dict) -> List[list]:
+        """
+        :param query: {"id": shopping list id}
+        :return: rows of the shopping list
+        """
         # TODO: when supported, pass shopping list id here
         shopping_list_items = self._grocy.shopping_list(True)
         shopping_list_items = sorted(shopping_list_items, key=lambda x: x.product.name.lower())
+        return list(map(shopping_list_item_to_row, shopping_list_items))
 
-        item_texts = list(list(map(shopping_list_item_to_str, shopping_list_items)))
-        text = "\n".join([
-            "*=> Shopping List <=*",
-            *item_texts,
-        ]).strip()
-
-        send_message(bot, chat_id, text, parse_mode=ParseMode.MARKDOWN)
-
-    def _create_shopping_list_keyboard_items(self, items: Dict[str, ShoppingListItemButtonCallbackData]) -> Dict[
-        str, str]:
-        return OrderedDict(list(map(lambda x: (x[0], x[1].minify()), items.items())))
+    def _create_shopping_list_keyboard_items(self, items: Dict[str, Dict]) -> Dict[str, str]:
+        """
+        Creates the inline keyboard items for the given shopping list item states
+        :param items: shopping list item states
+        :return: button title -> encoded callback data
+        """
+        button_tuples = self._create_shopping_list_item_button_tuples(items)
+        keyboard_items = map(lambda x: (x[0], x[1].encode()), button_tuples.items())
+        return OrderedDict(sorted(keyboard_items, key=lambda x: x[0].lower()))
 
-    def _create_shopping_list_item_button_tuples(self, items: List[ShoppingListProduct]) -> Dict[
+    def _create_shopping_list_item_button_tuples(self, items: Dict[str, Dict]) -> Dict[
         str, ShoppingListItemButtonCallbackData]:
         """
-        Creates the data required for generating a keyboard button from shopping list items
-        :param items: shopping list items
+        Creates the data required for generating a keyboard button from shopping list item states
+        :param items: shopping list item states
         :return : button title, button callback data
         """
-        return OrderedDict(list(map(self._create_shopping_list_item_button_tuple, items)))
+        if self._config.BOT_SHOPPING_REMOVE_BUTTON_WHEN_COMPLETE.value:
+            # if all items were checked off, there is no need for a button anymore
+            items = dict(filter(lambda x: x[1]["button_click_count"] < x[1]["amount"], items.items()))
+        return OrderedDict(list(map(lambda x: self._create_shopping_list_item_button_tuple(*x), items.items())))
 
-    def _create_shopping_list_item_button_tuple(self, item: ShoppingListProduct) -> Tuple[
+    def _create_shopping_list_item_button_tuple(self, item_id: str, item: Dict) -> Tuple[
         str, ShoppingListItemButtonCallbackData]:
         """
-        Creates the data required for generating a keyboard button from a shopping list item
-        :param item: shopping list item
+        Creates the data required for generating a keyboard button from a shopping list item state
+        :param item_id: shopping list item id
+        :param item: shopping list item state
         :return : button title, button callback data
         """
-        button_data = self._create_shopping_list_item_button_data(item)
-        button_title = self._generate_button_title(item, button_data)
+        button_data = ShoppingListItemButtonCallbackData(
+            shopping_list_item_id=int(item_id),
+            button_click_count=item["button_click_count"],
+            shopping_list_amount=item["amount"]
+        )
+        button_title = self._generate_button_title(item)
         return button_title, button_data
 
     @staticmethod
-    def _generate_button_title(item, stored_item_data) -> str:
-        return f"{item.product.name} ({stored_item_data.button_click_count}/{int(item.amount)})"
+    def _generate_button_title(item: Dict) -> str:
+        return f"{item['product_name']} ({item['button_click_count']}/{item['amount']})"
 
     @staticmethod
-    def _create_shopping_list_item_button_data(item: ShoppingListProduct,
-                                               count: int = 0) -> ShoppingListItemButtonCallbackData:
-        return ShoppingListItemButtonCallbackData(
-            shopping_list_item_id=item.id,
-            button_click_count=count,
-            shopping_list_amount=int(item.amount)
-        )
+    def _create_shopping_list_item_state(item: ShoppingListProduct) -> Dict:
+        """
+        Creates the (json serializable) state of a shopping list item, required to check it off
+        :param item: shopping list item
+        :return: item state
+        """
+        return {
+            "product_id": item.product_id,
+            "product_name": item.product.name,
+            "amount": int(item.amount),
+            "button_click_count": 0
+        }
@@ -0,0 +1,78 @@
+from telegram import Update, ParseMode
+from telegram.ext import Filters, CommandHandler, CallbackContext
+from telegram_click.argument import Argument
+from telegram_click.decorator import command
+
+from grocy_telegram_bot.commands import GrocyCommandHandler
+from grocy_telegram_bot.const import COMMAND_TRACE
+from grocy_telegram_bot.permissions import CONFIG_ADMINS
+from grocy_telegram_bot.stats import COMMAND_TIME_TRACE
+from grocy_telegram_bot.tracing import RingBufferExporter, format_trace
+from grocy_telegram_bot.util import send_message
+
+TRACE_LAST = "last"
+TRACE_SLOWEST = "slowest"
+
+# maximum length of a trace message, leaving room for the markdown code block
+TRACE_MESSAGE_LENGTH_LIMIT = 4000
+
+
+class TraceCommandHandler(GrocyCommandHandler):
+    """
+    Shows recent traces of the processing of updates, to find out why a command was slow
+    """
+
+    def __init__(self, *args, trace_buffer: RingBufferExporter or None):
+        """
+        :param trace_buffer: buffer of the most recent traces, or None if tracing is disabled
+        """
+        super().__init__(*args)
+        self._trace_buffer = trace_buffer
+
+    def command_handlers(self):
+        return [
+            CommandHandler(COMMAND_TRACE,
+                           filters=(~ Filters.reply) & (~ Filters.forwarded),
+                           callback=self._trace_callback),
+        ]
+
+    @command(
+        name=COMMAND_TRACE,
+        description="Show the trace of a recently processed update.",
+        arguments=[
+            Argument(name=["which"], description="Which trace to show", example=TRACE_LAST,
+                     validator=lambda x: x in [TRACE_LAST, TRACE_SLOWEST], optional=True, default=TRACE_LAST),
+        ],
+        permissions=CONFIG_ADMINS
+    )
+    @COMMAND_TIME_TRACE.time()
+    def _trace_callback(self, update: Update, context: CallbackContext, which: str) -> None:
+        """
+        Show a recent trace
+        :param update: the chat update object
+        :param context: telegram context
+        :param which: "last" for the most recent trace, "slowest" for the slowest buffered trace
+        """
+        bot = context.bot
+        chat_id = update.effective_chat.id
+        message_id = update.effective_message.message_id
+
+        if self._trace_buffer is None:
+            send_message(bot, chat_id, "Tracing is disabled.", reply_to=message_id)
+            return
+
+        traces = self._trace_buffer.traces()
+        if len(traces) <= 0:
+            send_message(bot, chat_id, "No traces recorded yet.", reply_to=message_id)
+            return
+
+        if which == TRACE_SLOWEST:
+            spans = max(traces, key=lambda x: x[0].duration)
+        else:
+            spans = traces[-1]
+
+        text = format_trace(spans)
+        if len(text) > TRACE_MESSAGE_LENGTH_LIMIT:
+            text = text[:TRACE_MESSAGE_LENGTH_LIMIT] + "\n…"
+        send_message(bot, chat_id, f"```\n{text}\n```", parse_mode=ParseMode.MARKDOWN, reply_to=message_id,
+                     expand_emoji=False)
@@ -1,8 +1,11 @@
+import functools
 import logging
 import re
 
 from container_app_conf import ConfigBase
 from container_app_conf.entry.bool import BoolConfigEntry
+from container_app_conf.entry.file import FileConfigEntry
+from container_app_conf.entry.float import FloatConfigEntry
 from container_app_conf.entry.int import IntConfigEntry
 from container_app_conf.entry.list import ListConfigEntry
 from container_app_conf.entry.string import StringConfigEntry
@@ -17,15 +20,20 @@ NODE_MAIN = "grocy_telegram_bot"
 NODE_BOT = "bot"
 
 NODE_SHOPPING = "shopping"
+NODE_STATE = "state"
+NODE_IMAGES = "images"
 
 NODE_NOTIFICATION = "notification"
 NODE_TELEGRAM = "telegram"
+NODE_WEBHOOK = "webhook"
 
 NODE_GROCY = "grocy"
 NODE_HOST = "host"
 NODE_API_KEY = "api_key"
 
 NODE_STATS = "stats"
+NODE_API = "api"
+NODE_TRACING = "tracing"
 NODE_ENABLED = "enabled"
 NODE_PORT = "port"
 
@@ -85,6 +93,103 @@ class Config(ConfigBase):
         ]
     )
 
+    TELEGRAM_BASE_URL = StringConfigEntry(
+        description="Base url of the Telegram Bot API, f.ex. to use a local Bot API server",
+        key_path=[
+            NODE_MAIN,
+            NODE_TELEGRAM,
+            "base_url"
+        ],
+        example="http://127.0.0.1:8081/bot",
+        required=False
+    )
+
+    TELEGRAM_WEBHOOK_ENABLED = BoolConfigEntry(
+        description="Whether to receive updates via webhook instead of long polling",
+        key_path=[
+            NODE_MAIN,
+            NODE_TELEGRAM,
+            NODE_WEBHOOK,
+            NODE_ENABLED
+        ],
+        default=False
+    )
+
+    TELEGRAM_WEBHOOK_URL = StringConfigEntry(
+        description="The public url Telegram should send updates to, "
+                    "f.ex. the url of a reverse proxy in front of the bot",
+        key_path=[
+            NODE_MAIN,
+            NODE_TELEGRAM,
+            NODE_WEBHOOK,
+            "url"
+        ],
+        example="https://bot.example.com/telegram",
+        required=False
+    )
+
+    TELEGRAM_WEBHOOK_LISTEN = StringConfigEntry(
+        description="The address the local webhook http server listens on",
+        key_path=[
+            NODE_MAIN,
+            NODE_TELEGRAM,
+            NODE_WEBHOOK,
+            "listen"
+        ],
+        default="0.0.0.0"
+    )
+
+    TELEGRAM_WEBHOOK_PORT = IntConfigEntry(
+        description="The port the local webhook http server listens on",
+        key_path=[
+            NODE_MAIN,
+            NODE_TELEGRAM,
+            NODE_WEBHOOK,
+            NODE_PORT
+        ],
+        range=Range(1, 65535),
+        default=8443
+    )
+
+    TELEGRAM_WEBHOOK_PATH = StringConfigEntry(
+        description="The url path the local webhook http server accepts updates on",
+        key_path=[
+            NODE_MAIN,
+            NODE_TELEGRAM,
+            NODE_WEBHOOK,
+            "path"
+        ],
+        regex=re.compile(r"^/.*"),
+        default="/telegram"
+    )
+
+    TELEGRAM_WEBHOOK_SECRET_TOKEN = StringConfigEntry(
+        description="Secret token Telegram sends with every webhook request, "
+                    "requests without a matching token are rejected",
+        key_path=[
+            NODE_MAIN,
+            NODE_TELEGRAM,
+            NODE_WEBHOOK,
+            "secret_token"
+        ],
+        regex=re.compile(r"^[A-Za-z0-9_-]{1,256}$"),
+        example="my-webhook-secret",
+        required=False,
+        secret=True
+    )
+
+    TELEGRAM_WEBHOOK_WORKERS = IntConfigEntry(
+        description="Number of threads used to process incoming webhook requests",
+        key_path=[
+            NODE_MAIN,
+            NODE_TELEGRAM,
+            NODE_WEBHOOK,
+            "workers"
+        ],
+        range=Range(1, 64),
+        default=4
+    )
+
     GROCY_CACHE_DURATION = TimeDeltaConfigEntry(
         description="Duration to cache Grocy REST api call responses",
         key_path=[
@@ -96,6 +201,28 @@ class Config(ConfigBase):
         default="60s",
     )
 
+    GROCY_CACHE_PREWARM = BoolConfigEntry(
+        description="Whether to fill the cache in the background at startup and after writes, "
+                    "so commands don't have to wait for Grocy",
+        key_path=[
+            NODE_MAIN,
+            NODE_GROCY,
+            "cache_prewarm"
+        ],
+        default=True
+    )
+
+    GROCY_REQUEST_TIME_BUCKETS = ListConfigEntry(
+        description="Upper bounds in seconds of the buckets of the Grocy api request latency histogram",
+        item_type=FloatConfigEntry,
+        key_path=[
+            NODE_MAIN,
+            NODE_GROCY,
+            "request_time_buckets"
+        ],
+        default=[0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+    )
+
     NOTIFICATION_CHAT_IDS = ListConfigEntry(
         item_type=StringConfigEntry,
         key_path=[
@@ -140,6 +267,53 @@ class Config(ConfigBase):
         secret=True
     )
 
+    BOT_WORKERS = IntConfigEntry(
+        description="Number of threads used to execute command handlers. "
+                    "Updates of the same chat are always processed in order.",
+        key_path=[
+            NODE_MAIN,
+            NODE_BOT,
+            "workers"
+        ],
+        range=Range(1, 64),
+        default=4
+    )
+
+    BOT_STATE_MAX_ENTRIES = IntConfigEntry(
+        description="Maximum number of pending interactions (f.ex. shopping list keyboards) to remember",
+        key_path=[
+            NODE_MAIN,
+            NODE_BOT,
+            NODE_STATE,
+            "max_entries"
+        ],
+        range=Range(1, 100000),
+        default=1000
+    )
+
+    BOT_STATE_TIME_TO_LIVE = TimeDeltaConfigEntry(
+        description="Time after which unused pending interactions are forgotten",
+        key_path=[
+            NODE_MAIN,
+            NODE_BOT,
+            NODE_STATE,
+            "time_to_live"
+        ],
+        default="7d"
+    )
+
+    BOT_STATE_FILE = FileConfigEntry(
+        description="File to persist pending interactions to, so they survive a restart",
+        key_path=[
+            NODE_MAIN,
+            NODE_BOT,
+            NODE_STATE,
+            "file"
+        ],
+        example="/app/state.json",
+        required=False
+    )
+
     BOT_SHOPPING_REMOVE_BUTTON_WHEN_COMPLETE = BoolConfigEntry(
         description="Whether to remove buttons of complete items "
                     "from the telegram shopping list (not the one in Grocy!)",
@@ -152,6 +326,98 @@ class Config(ConfigBase):
         default=True
     )
 
+    BOT_SHOPPING_WRITE_DELAY = TimeDeltaConfigEntry(
+        description="Time to wait for further check offs of the same shopping list item, "
+                    "before the change is written to Grocy",
+        key_path=[
+            NODE_MAIN,
+            NODE_BOT,
+            NODE_SHOPPING,
+            "write_delay"
+        ],
+        default="3s"
+    )
+
+    BOT_LIST_PAGE_SIZE = IntConfigEntry(
+        description="Number of items shown per page of list messages (f.ex. /inventory)",
+        key_path=[
+            NODE_MAIN,
+            NODE_BOT,
+            "list_page_size"
+        ],
+        range=Range(1, 200),
+        default=30
+    )
+
+    BOT_LIST_CACHE_ROWS = IntConfigEntry(
+        description="Maximum number of rows of list messages kept in memory per list type, to navigate between "
+                    "pages without querying Grocy again",
+        key_path=[
+            NODE_MAIN,
+            NODE_BOT,
+            "list_cache_rows"
+        ],
+        range=Range(0, 1000000),
+        default=10000
+    )
+
+    BOT_IMAGES_THUMBNAIL_SIZE = IntConfigEntry(
+        description="Maximum width and height in pixels of product pictures sent by the bot",
+        key_path=[
+            NODE_MAIN,
+            NODE_BOT,
+            NODE_IMAGES,
+            "thumbnail_size"
+        ],
+        range=Range(32, 2560),
+        default=512
+    )
+
+    BOT_IMAGES_CACHE_FILE = FileConfigEntry(
+        description="File to persist the telegram file ids of uploaded product pictures to, "
+                    "so they don't have to be uploaded again after a restart",
+        key_path=[
+            NODE_MAIN,
+            NODE_BOT,
+            NODE_IMAGES,
+            "cache_file"
+        ],
+        example="/app/images.json",
+        required=False
+    )
+
+    TRACING_ENABLED = BoolConfigEntry(
+        description="Whether to trace the processing of updates, the most recent traces can be shown using /trace",
+        key_path=[
+            NODE_MAIN,
+            NODE_TRACING,
+            NODE_ENABLED
+        ],
+        default=True
+    )
+
+    TRACING_BUFFER_SIZE = IntConfigEntry(
+        description="Number of most recent traces kept in memory",
+        key_path=[
+            NODE_MAIN,
+            NODE_TRACING,
+            "buffer_size"
+        ],
+        range=Range(1, 1000),
+        default=50
+    )
+
+    TRACING_FILE = FileConfigEntry(
+        description="File to append all traces to, as one json object per span and line",
+        key_path=[
+            NODE_MAIN,
+            NODE_TRACING,
+            "file"
+        ],
+        example="/app/traces.jsonl",
+        required=False
+    )
+
     STATS_ENABLED = BoolConfigEntry(
         description="Whether to enable prometheus statistics or not.",
         key_path=[
@@ -163,7 +429,7 @@ class Config(ConfigBase):
     )
 
     STATS_PORT = IntConfigEntry(
-        description="The port to expose statistics on.",
+        description="The port to expose statistics, as well as the /healthz and /readyz endpoints on.",
         key_path=[
             NODE_MAIN,
             NODE_STATS,
@@ -171,3 +437,44 @@ class Config(ConfigBase):
         ],
         default=8000
     )
+
+    API_ENABLED = BoolConfigEntry(
+        description="Whether to serve a read-only json api of the inventory, chores and shopping list or not.",
+        key_path=[
+            NODE_MAIN,
+            NODE_API,
+            NODE_ENABLED
+        ],
+        default=False
+    )
+
+    API_LISTEN = StringConfigEntry(
+        description="The address the local api http server listens on",
+        key_path=[
+            NODE_MAIN,
+            NODE_API,
+            "listen"
+        ],
+        default="127.0.0.1"
+    )
+
+    API_PORT = IntConfigEntry(
+        description="The port the local api http server listens on",
+        key_path=[
+            NODE_MAIN,
+            NODE_API,
+            NODE_PORT
+        ],
+        range=Range(0, 65535),
+        default=8001
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_config() -> Config:
+    """
+    Loads the configuration on first use, later calls return the same instance
+    without reading environment variables and config files again
+    :return: the configuration
+    """
+    return Config()
@@ -17,6 +17,16 @@ COMMAND_SHOPPING = ["shopping", "s"]
 COMMAND_SHOPPING_LIST = ["shopping_list", "sl"]
 COMMAND_SHOPPING_LIST_ADD = ["shopping_list_add", "sla"]
 
+COMMAND_INLINE_QUERY = "inline_query"
+COMMAND_BATCH = "batch"
+COMMAND_PRODUCT_ACTION = "product_action"
+COMMAND_PAGE = "page"
+COMMAND_BARCODE = ["barcode", "b"]
+COMMAND_EXPORT = ["export", "e"]
+COMMAND_IMAGE = ["image", "img"]
+COMMAND_TRACE = ["trace", "t"]
+COMMAND_PROFILE = ["profile", "p"]
+
 COMMAND_STATS = 'stats'
 
 COMMAND_HELP = ['help', 'h']
@@ -0,0 +1,188 @@
+import logging
+import threading
+from collections import deque
+from time import time
+from typing import List, Tuple
+
+from grocy_telegram_bot.health import format_time
+from grocy_telegram_bot.stats import EVENT_COUNT, EVENT_SUBSCRIBER_COUNT, EVENT_SUBSCRIBER_OVERFLOW_COUNT
+
+LOGGER = logging.getLogger(__name__)
+
+EVENT_PRODUCT_AMOUNT_CHANGED = "product_amount_changed"
+EVENT_PRODUCT_EXPIRED = "product_expired"
+EVENT_CHORE_OVERDUE = "chore_overdue"
+EVENT_SHOPPING_ITEM_ADDED = "shopping_item_added"
+EVENT_TYPES = [EVENT_PRODUCT_AMOUNT_CHANGED, EVENT_PRODUCT_EXPIRED, EVENT_CHORE_OVERDUE, EVENT_SHOPPING_ITEM_ADDED]
+
+# number of past events kept to resume a subscription from
+DEFAULT_HISTORY_SIZE = 1000
+# number of events buffered per subscriber, a subscriber falling further behind is disconnected
+DEFAULT_SUBSCRIBER_BUFFER_SIZE = 1000
+
+
+class Event:
+    """
+    A change of the state of Grocy
+    """
+
+    def __init__(self, seq: int, type: str, data: dict, created_at: float):
+        """
+        :param seq: sequence number, increasing by one with every published event
+        :param type: one of EVENT_TYPES
+        :param data: json serializable details
+        :param created_at: time the event has been published at
+        """
+        self.seq = seq
+        self.type = type
+        self.data = data
+        self.created_at = created_at
+
+    def to_json(self) -> dict:
+        """
+        :return: json serializable representation of the event
+        """
+        return {"seq": self.seq, "type": self.type, "time": format_time(self.created_at), "data": self.data}
+
+
+class Subscription:
+    """
+    Buffers the events published after subscribing, until the subscriber takes them
+    """
+
+    def __init__(self, broker: "EventBroker", buffer_size: int):
+        self._broker = broker
+        self._buffer_size = buffer_size
+        self._events = deque()
+        self._condition = threading.Condition()
+        self.closed = False
+        # whether the subscriber has been disconnected for not keeping up with the published events
+        self.overflowed = False
+
+    def get(self, timeout: float = None) -> List[Event]:
+        """
+        Waits for events
+        :param timeout: maximum time to wait in seconds
+        :return: all buffered events, empty if there were none within the timeout or the subscription is closed
+        """
+        with self._condition:
+            if len(self._events) <= 0 and not self.closed:
+                self._condition.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+    def close(self):
+        """
+        Stops receiving events
+        """
+        self._broker.unsubscribe(self)
+
+    def _put(self, event: Event) -> bool:
+        """
+        :return: false if the buffer is full, true otherwise
+        """
+        with self._condition:
+            if len(self._events) >= self._buffer_size:
+                return False
+            self._events.append(event)
+            self._condition.notify_all()
+            return True
+
+    def _close(self, overflowed: bool = False):
+        with self._condition:
+            self.closed = True
+            self.overflowed = self.overflowed or overflowed
+            self._condition.notify_all()
+
+
+class EventBroker:
+    """
+    Publishes events to all subscribers and keeps a history of recent events,
+    so subscribers can resume from the sequence number of the last event they have received.
+    """
+
+    def __init__(self, history_size: int = DEFAULT_HISTORY_SIZE,
+                 subscriber_buffer_size: int = DEFAULT_SUBSCRIBER_BUFFER_SIZE):
+        """
+        :param history_size: number of past events to keep
+        :param subscriber_buffer_size: maximum number of events buffered per subscriber
+        """
+        self._subscriber_buffer_size = subscriber_buffer_size
+        self._history = deque(maxlen=history_size)
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    @property
+    def last_seq(self) -> int:
+        """
+        Sequence number of the last published event, 0 if there was none
+        """
+        return self._seq
+
+    def publish(self, type: str, data: dict) -> Event:
+        """
+        Publishes an event to all subscribers.
+        Subscribers with a full buffer are disconnected instead of blocking the publisher.
+        :param type: one of EVENT_TYPES
+        :param data: json serializable details
+        :return: the event
+        """
+        with self._lock:
+            self._seq += 1
+            event = Event(self._seq, type, data, time())
+            self._history.append(event)
+            for subscription in list(self._subscriptions):
+                if not subscription._put(event):
+                    LOGGER.warning("Disconnecting event subscriber which doesn't keep up")
+                    EVENT_SUBSCRIBER_OVERFLOW_COUNT.inc()
+                    self._remove(subscription, overflowed=True)
+        EVENT_COUNT.labels(type=type).inc()
+        return event
+
+    def subscribe(self, after: int = None) -> Tuple[Subscription, List[Event], bool]:
+        """
+        Subscribes to events
+        :param after: sequence number of the last event received by the subscriber, None to receive new events only
+        :return: the subscription,
+                 past events published after the given sequence number,
+                 false if some of them aren't in the history anymore (or the sequence number is unknown), true otherwise
+        """
+        subscription = Subscription(self, self._subscriber_buffer_size)
+        with self._lock:
+            self._subscriptions.append(subscription)
+            EVENT_SUBSCRIBER_COUNT.set(len(self._subscriptions))
+            if after is None:
+                return subscription, [], True
+
+            if after > self._seq:
+                # f.ex. the sequence number of a previous run
+                return subscription, list(self._history), False
+
+            missed = [event for event in self._history if event.seq > after]
+            oldest = self._history[0].seq if len(self._history) > 0 else self._seq + 1
+            complete = after >= oldest - 1
+            return subscription, missed, complete
+
+    def unsubscribe(self, subscription: Subscription):
+        """
+        Removes a subscription
+        :param subscription: the subscription
+        """
+        with self._lock:
+            self._remove(subscription)
+
+    def close(self):
+        """
+        Closes all subscriptions
+        """
+        with self._lock:
+            for subscription in list(self._subscriptions):
+                self._remove(subscription)
+
+    def _remove(self, subscription: Subscription, overflowed: bool = False):
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+            EVENT_SUBSCRIBER_COUNT.set(len(self._subscriptions))
+        subscription._close(overflowed)
@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+from tempfile import SpooledTemporaryFile
+from typing import Iterable, List, Any, BinaryIO
+
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_JSON = "json"
+EXPORT_FORMATS = [EXPORT_FORMAT_CSV, EXPORT_FORMAT_JSON]
+
+# exports larger than this are written to disk instead of being kept in memory
+EXPORT_SPOOL_MAX_SIZE = 1024 * 1024
+
+
+def create_export(columns: List[str], rows: Iterable[List[Any]], export_format: str) -> BinaryIO:
+    """
+    Writes rows to a temporary file, which is only kept in memory as long as it is small.
+    Rows are consumed one by one, so they can (and should) be generated lazily.
+    :param columns: column names
+    :param rows: rows, each containing one value per column
+    :param export_format: one of EXPORT_FORMATS
+    :return: binary file (positioned at the start), which has to be closed by the caller
+    """
+    file = SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE)
+    text_file = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    try:
+        if export_format == EXPORT_FORMAT_CSV:
+            _write_csv(text_file, columns, rows)
+        elif export_format == EXPORT_FORMAT_JSON:
+            _write_json(text_file, columns, rows)
+        else:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        text_file.flush()
+    except Exception:
+        file.close()
+        raise
+    # don't close the underlying file together with the wrapper
+    text_file.detach()
+    file.seek(0)
+    return file
+
+
+def _write_csv(file: io.TextIOBase, columns: List[str], rows: Iterable[List[Any]]):
+    writer = csv.writer(file)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+
+
+def _write_json(file: io.TextIOBase, columns: List[str], rows: Iterable[List[Any]]):
+    """
+    Writes a json array of objects, one row at a time
+    """
+    file.write("[")
+    separator = "\n"
+    for row in rows:
+        file.write(separator)
+        file.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+        separator = ",\n"
+    file.write("\n]\n")
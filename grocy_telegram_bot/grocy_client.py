@@ -0,0 +1,128 @@
+import json
+import logging
+import threading
+from time import perf_counter, time
+from typing import Any
+from urllib.parse import urljoin
+
+import requests
+from pygrocy.grocy_api_client import GrocyApiClient
+
+from grocy_telegram_bot.stats import GROCY_REQUESTS_IN_PROGRESS, GROCY_RESPONSE_SIZE, GROCY_REQUEST_ERROR_COUNT, \
+    get_grocy_request_time
+from grocy_telegram_bot.tracing import span
+
+LOGGER = logging.getLogger(__name__)
+
+# outcome of the most recent requests, used to report whether Grocy is reachable without sending a request
+_status_lock = threading.Lock()
+_status = {"last_success": None, "last_latency": None, "last_error": None, "last_error_time": None}
+
+
+def grocy_status() -> dict:
+    """
+    :return: time and latency of the last successful request, time and description of the last failed request
+    """
+    with _status_lock:
+        return dict(_status)
+
+
+def _record_status(latency: float, error: str or None):
+    with _status_lock:
+        if error is None:
+            _status["last_success"] = time()
+            _status["last_latency"] = latency
+        else:
+            _status["last_error"] = error
+            _status["last_error_time"] = time()
+
+
+def endpoint_label(end_url: str) -> str:
+    """
+    Converts the url of a Grocy api request into an endpoint name, by replacing ids and file names with placeholders,
+    so every endpoint only results in a single metric label value
+    :param end_url: the url relative to the api base url, f.ex. "stock/products/12"
+    :return: the endpoint, f.ex. "stock/products/{id}"
+    """
+    segments = end_url.split("?", 1)[0].strip("/").split("/")
+    if len(segments) > 2 and segments[0] == "files":
+        # files/{group}/{base64 encoded file name}
+        segments = segments[:2] + ["{file_name}"]
+    return "/".join(map(lambda x: "{id}" if x.isdigit() else x, segments))
+
+
+class InstrumentedGrocyApiClient(GrocyApiClient):
+    """
+    Grocy api client which records the latency, response size and errors of every request it makes
+    """
+
+    def _do_get_request(self, end_url: str):
+        return self._parse_response(self._request("GET", end_url, headers=self._headers))
+
+    def _do_post_request(self, end_url: str, data: dict):
+        return self._parse_response(self._request("POST", end_url, headers=self._headers, data=data))
+
+    def _do_put_request(self, end_url: str, data):
+        headers = self._headers.copy()
+        headers['accept'] = '*/*'
+        if isinstance(data, dict):
+            headers['Content-Type'] = 'application/json'
+            data = json.dumps(data)
+        else:
+            headers['Content-Type'] = 'application/octet-stream'
+        return self._parse_response(self._request("PUT", end_url, headers=headers, data=data))
+
+    def download_file(self, end_url: str, params: dict = None, timeout: Any = None) -> bytes:
+        """
+        Downloads a file, f.ex. a product picture
+        :param end_url: the url relative to the api base url
+        :param params: query parameters
+        :param timeout: request timeout, see requests.request()
+        :return: the file content
+        """
+        headers = self._headers.copy()
+        headers['accept'] = '*/*'
+        return self._request("GET", end_url, headers=headers, params=params, timeout=timeout).content
+
+    def _request(self, method: str, end_url: str, **kwargs) -> requests.Response:
+        """
+        Executes a request and records its metrics
+        :param method: http method
+        :param end_url: the url relative to the api base url
+        :param kwargs: arguments passed to requests.request()
+        :return: the response
+        """
+        endpoint = endpoint_label(end_url)
+        in_progress = GROCY_REQUESTS_IN_PROGRESS.labels(endpoint=endpoint, method=method)
+        in_progress.inc()
+        start = perf_counter()
+        try:
+            with span("http", method=method, endpoint=endpoint) as s:
+                response = requests.request(method, urljoin(self._base_url, end_url), verify=self._verify_ssl,
+                                            **kwargs)
+                s.set(status=response.status_code, size=len(response.content))
+                response.raise_for_status()
+        except requests.HTTPError as ex:
+            error = str(ex.response.status_code) if ex.response is not None else type(ex).__name__
+            GROCY_REQUEST_ERROR_COUNT.labels(endpoint=endpoint, method=method, error=error).inc()
+            # client errors are caused by the request, the server itself is fine
+            server_error = ex.response is None or ex.response.status_code >= 500
+            _record_status(perf_counter() - start, f"HTTP {error}" if server_error else None)
+            raise
+        except Exception as ex:
+            GROCY_REQUEST_ERROR_COUNT.labels(endpoint=endpoint, method=method, error=type(ex).__name__).inc()
+            _record_status(perf_counter() - start, f"{type(ex).__name__}: {ex}")
+            raise
+        finally:
+            get_grocy_request_time().labels(endpoint=endpoint, method=method).observe(perf_counter() - start)
+            in_progress.dec()
+
+        _record_status(perf_counter() - start, None)
+
+        GROCY_RESPONSE_SIZE.labels(endpoint=endpoint, method=method).observe(len(response.content))
+        return response
+
+    @staticmethod
+    def _parse_response(response: requests.Response):
+        if len(response.content) > 0:
+            return response.json()
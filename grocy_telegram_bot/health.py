@@ -0,0 +1,122 @@
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer
+from typing import Callable, Dict, Tuple
+
+from prometheus_client.exposition import MetricsHandler
+
+LOGGER = logging.getLogger(__name__)
+
+HEALTH_PATH = "/healthz"
+READINESS_PATH = "/readyz"
+
+# name -> function returning whether the check passed and details about it
+_readiness_checks: Dict[str, Callable[[], Tuple[bool, dict]]] = {}
+
+
+def add_readiness_check(name: str, check: Callable[[], Tuple[bool, dict]]):
+    """
+    Registers a check which has to pass for the bot to be ready.
+    Checks are executed on every readiness probe, so they must only look at in-memory state.
+    :param name: name of the check
+    :param check: function returning whether the check passed and a json serializable dict with details
+    """
+    _readiness_checks[name] = check
+
+
+def remove_readiness_check(name: str):
+    """
+    Removes a previously registered readiness check
+    :param name: name of the check
+    """
+    _readiness_checks.pop(name, None)
+
+
+def readiness() -> Tuple[bool, Dict[str, dict]]:
+    """
+    Executes all readiness checks
+    :return: whether all checks passed, check name -> result
+    """
+    ready = True
+    results = {}
+    for name, check in list(_readiness_checks.items()):
+        try:
+            ok, details = check()
+        except Exception as ex:
+            LOGGER.exception(f"Error in readiness check {name}")
+            ok, details = False, {"error": str(ex)}
+        results[name] = {"ok": ok, **details}
+        ready = ready and ok
+    return ready, results
+
+
+def format_time(timestamp: float or None) -> str or None:
+    """
+    :param timestamp: time as returned by time.time()
+    :return: ISO 8601 representation of the time in UTC
+    """
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+class _StatsRequestHandler(MetricsHandler):
+    """
+    Serves the liveness and readiness endpoints in addition to the prometheus metrics
+    """
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == HEALTH_PATH:
+            self._respond(HTTPStatus.OK, {"status": "ok"})
+        elif path == READINESS_PATH:
+            ready, checks = readiness()
+            status = HTTPStatus.OK if ready else HTTPStatus.SERVICE_UNAVAILABLE
+            self._respond(status, {"status": "ok" if ready else "unavailable", "checks": checks})
+        else:
+            super().do_GET()
+
+    def _respond(self, status: HTTPStatus, data: dict):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StatsServer(ThreadingHTTPServer):
+    """
+    HTTP server serving prometheus metrics, as well as the /healthz and /readyz endpoints
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port: int, listen: str = ""):
+        """
+        :param port: port to listen on
+        :param listen: address to listen on
+        """
+        self._thread = None
+        super().__init__((listen, port), _StatsRequestHandler)
+
+    def start(self):
+        """
+        Starts serving requests on a background thread
+        """
+        LOGGER.debug(f"Serving metrics and health endpoints on {self.server_address}")
+        self._thread = threading.Thread(target=self.serve_forever, name="stats", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        """
+        Stops serving requests and releases all resources
+        """
+        if self._thread is not None:
+            super().shutdown()
+            self._thread = None
+        self.server_close()
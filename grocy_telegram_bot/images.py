@@ -0,0 +1,115 @@
+import importlib.util
+import json
+import logging
+import os
+import threading
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List
+
+LOGGER = logging.getLogger(__name__)
+
+
+def is_thumbnail_creation_available() -> bool:
+    """
+    :return: True if the optional dependency to downscale images (Pillow) is installed
+    """
+    return importlib.util.find_spec("PIL") is not None
+
+
+def create_thumbnail(image_data: bytes, max_size: int) -> bytes:
+    """
+    Downscales an image, so it fits into a square of the given size.
+    If Pillow is not installed or the image can not be read, the image data is returned as it is.
+    :param image_data: the image data
+    :param max_size: maximum width and height in pixels
+    :return: jpeg encoded thumbnail
+    """
+    if not is_thumbnail_creation_available():
+        return image_data
+
+    from PIL import Image
+    try:
+        image = Image.open(BytesIO(image_data))
+        if image.width <= max_size and image.height <= max_size and image.format == "JPEG":
+            return image_data
+        image.thumbnail((max_size, max_size))
+        output = BytesIO()
+        image.convert("RGB").save(output, format="JPEG", quality=85)
+        return output.getvalue()
+    except Exception as ex:
+        LOGGER.warning(f"Unable to create thumbnail, using original image: {ex}")
+        return image_data
+
+
+class ProductImageCache:
+    """
+    Remembers the telegram file_id of uploaded product pictures, so every picture only has to be
+    downloaded from Grocy and uploaded to telegram once. Entries are bound to the picture file name
+    of the product, so changing the picture in Grocy causes a new upload.
+    """
+
+    def __init__(self, file_path: Path or None = None):
+        """
+        Creates a product image cache
+        :param file_path: optional file to persist the cache to
+        """
+        self._file_path = file_path
+        self._lock = threading.Lock()
+        # product id -> [picture file name, telegram file_id]
+        self._entries: Dict[str, List[str]] = {}
+        self._load()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, product_id: int, picture_file_name: str) -> str or None:
+        """
+        :param product_id: product id
+        :param picture_file_name: the current picture file name of the product
+        :return: the telegram file_id of the picture, or None if it has not been uploaded yet
+        """
+        with self._lock:
+            entry = self._entries.get(str(product_id), None)
+        if entry is None or entry[0] != picture_file_name:
+            return None
+        return entry[1]
+
+    def put(self, product_id: int, picture_file_name: str, file_id: str):
+        """
+        Stores the telegram file_id of an uploaded picture
+        :param product_id: product id
+        :param picture_file_name: the picture file name of the product
+        :param file_id: telegram file_id of the uploaded picture
+        """
+        with self._lock:
+            self._entries[str(product_id)] = [picture_file_name, file_id]
+            self._save()
+
+    def remove(self, product_id: int):
+        """
+        Removes the entry of a product, f.ex. when telegram doesn't accept its file_id anymore
+        :param product_id: product id
+        """
+        with self._lock:
+            if self._entries.pop(str(product_id), None) is not None:
+                self._save()
+
+    def _load(self):
+        if self._file_path is None or not self._file_path.exists():
+            return
+        try:
+            with open(self._file_path) as file:
+                self._entries.update(json.load(file))
+        except Exception as ex:
+            LOGGER.warning(f"Ignoring unreadable image cache file {self._file_path}: {ex}")
+
+    def _save(self):
+        if self._file_path is None:
+            return
+        # write to a temporary file first, so a crash never leaves a corrupt cache file behind
+        temp_file_path = self._file_path.with_name(f"{self._file_path.name}.tmp")
+        with open(temp_file_path, "w") as file:
+            json.dump(self._entries, file, separators=(',', ':'))
+        os.replace(temp_file_path, self._file_path)
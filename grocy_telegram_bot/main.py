@@ -3,10 +3,10 @@ import os
 import sys
 
 from container_app_conf.formatter.toml import TomlFormatter
-from prometheus_client import start_http_server
 
 from grocy_telegram_bot.bot import GrocyTelegramBot
-from grocy_telegram_bot.config import Config
+from grocy_telegram_bot.config import get_config
+from grocy_telegram_bot.health import StatsServer
 
 parent_dir = os.path.abspath(os.path.join(os.path.abspath(__file__), "..", ".."))
 sys.path.append(parent_dir)
@@ -16,16 +16,16 @@ LOGGER = logging.getLogger(__name__)
 
 
 def main():
-    config = Config()
+    config = get_config()
 
     log_level = logging._nameToLevel.get(str(config.LOG_LEVEL.value).upper(), config.LOG_LEVEL.default)
     logging.getLogger("grocy_telegram_bot").setLevel(log_level)
 
     LOGGER.debug("Config:\n{}".format(config.print(TomlFormatter())))
 
-    # start prometheus server
+    # start prometheus server, which also serves the health endpoints
     if config.STATS_ENABLED.value:
-        start_http_server(config.STATS_PORT.value)
+        StatsServer(config.STATS_PORT.value).start()
 
     grocy_telegram_bot = GrocyTelegramBot(config)
     grocy_telegram_bot.start()
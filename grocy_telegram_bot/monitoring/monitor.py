@@ -1,26 +1,38 @@
 from datetime import timedelta
-from typing import List, Any
+from typing import List, Any, Iterable
 
 from pygrocy import Grocy
 from pygrocy.grocy import Chore, Product
 from pygrocy.grocy_api_client import ShoppingListItem
+from pygrocy.utils import parse_float
 
+from grocy_telegram_bot.api import chore_to_json, product_to_json, shopping_list_item_to_json
+from grocy_telegram_bot.events import EventBroker, EVENT_CHORE_OVERDUE, EVENT_PRODUCT_EXPIRED, \
+    EVENT_PRODUCT_AMOUNT_CHANGED, EVENT_SHOPPING_ITEM_ADDED
 from grocy_telegram_bot.monitoring.watcher.chore import ChoreWatcher
 from grocy_telegram_bot.monitoring.watcher.inventory import StockWatcher, VolatileStockWatcher
 from grocy_telegram_bot.monitoring.watcher.shopping_list import ShoppingListWatcher
 from grocy_telegram_bot.monitoring.watcher.task import TaskWatcher
 from grocy_telegram_bot.notifier import Notifier
+from grocy_telegram_bot.render import render_chores, render_products
 from grocy_telegram_bot.stats import TOTAL_CHORES_COUNT, OVERDUE_CHORES_COUNT, PRODUCT_INVENTORY_COUNT, \
     EXPIRED_PRODUCTS_COUNT, SHOPPING_LIST_ITEM_COUNT, TASK_COUNT
-from grocy_telegram_bot.util import product_to_str, chore_to_str, filter_overdue_chores, filter_expired_products, \
-    filter_expiring_products, filter_new_by_key
+from grocy_telegram_bot.util import filter_overdue_chores, filter_expired_products, filter_expiring_products, \
+    filter_new_by_key
 
 
 class Monitor:
 
-    def __init__(self, interval: timedelta, notifier: Notifier, grocy: Grocy):
+    def __init__(self, interval: timedelta, notifier: Notifier, grocy: Grocy, events: EventBroker = None):
+        """
+        :param interval: time between two runs of a watcher
+        :param notifier: used to notify chats about changes
+        :param grocy: the Grocy client
+        :param events: optional broker to publish the changes to
+        """
         self._notifier = notifier
         self._grocy = grocy
+        self._events = events
 
         interval_seconds = interval.total_seconds()
 
@@ -54,13 +66,13 @@ class Monitor:
 
         if old is not None:
             old_overdue = filter_overdue_chores(old)
-            self._notify_about_new_overdue_chores(old_overdue, new_overdue)
-
-    def _notify_about_new_overdue_chores(self, old: List[Chore], new: List[Chore]):
-        # check if a new chore is due
-        new_overdue = filter_new_by_key(old, new, key=lambda x: x.id)
+            # check if a new chore is due
+            new_overdue = filter_new_by_key(old_overdue, new_overdue, key=lambda x: x.id)
+            self._notify_about_new_overdue_chores(new_overdue)
+            self._publish(EVENT_CHORE_OVERDUE, map(chore_to_json, new_overdue))
 
-        lines = list(map(chore_to_str, new_overdue))
+    def _notify_about_new_overdue_chores(self, new_overdue: List[Chore]):
+        lines = render_chores(new_overdue)
         # send notification if required
         if len(lines) > 0:
             message = "\n".join([
@@ -74,6 +86,25 @@ class Monitor:
             amount = product.available_amount if product.available_amount else 0
             PRODUCT_INVENTORY_COUNT.labels(product_name=product.name).set(amount)
 
+        if old is not None and self._events is not None:
+            self._publish_amount_changes(old, new)
+
+    def _publish_amount_changes(self, old: List[Product], new: List[Product]):
+        old_products = {product.id: product for product in old}
+        new_products = {product.id: product for product in new}
+        for product_id in sorted(old_products.keys() | new_products.keys()):
+            old_product = old_products.get(product_id, None)
+            new_product = new_products.get(product_id, None)
+            old_amount = parse_float(old_product.available_amount, 0) if old_product is not None else 0
+            new_amount = parse_float(new_product.available_amount, 0) if new_product is not None else 0
+            if old_amount == new_amount:
+                continue
+            # products which are not in stock anymore are missing from the new list
+            data = product_to_json(new_product if new_product is not None else old_product)
+            data["amount"] = new_amount
+            data["previous_amount"] = old_amount
+            self._publish(EVENT_PRODUCT_AMOUNT_CHANGED, [data])
+
     def on_volatile_stock_update(self, old: List[Product], new: List[Product]):
         for product in new:
             amount = product.available_amount if product.available_amount else 0
@@ -85,6 +116,8 @@ class Monitor:
         if old is not None:
             old_expired = filter_expired_products(old)
             self._notify_about_new_expired_products(old_expired, new_expired)
+            self._publish(EVENT_PRODUCT_EXPIRED,
+                          map(product_to_json, filter_new_by_key(old_expired, new_expired, key=lambda x: x.id)))
 
             old_expiring = filter_expiring_products(old)
             new_expiring = filter_expiring_products(new)
@@ -93,7 +126,7 @@ class Monitor:
     def _notify_about_new_expiring_products(self, old: List[Product], new: List[Product]):
         new_expiring = filter_new_by_key(old, new, key=lambda x: x.id)
 
-        lines = list(map(product_to_str, new_expiring))
+        lines = render_products(new_expiring)
         if len(lines) > 0:
             message = "\n".join([
                 "Product(s) expiring soon:",
@@ -104,7 +137,7 @@ class Monitor:
     def _notify_about_new_expired_products(self, old: List[Product], new: List[Product]):
         new_expired = filter_new_by_key(old, new, key=lambda x: x.id)
 
-        lines = list(map(product_to_str, new_expired))
+        lines = render_products(new_expired)
         if len(lines) > 0:
             message = "\n".join([
                 "Product(s) expired:",
@@ -116,5 +149,20 @@ class Monitor:
         # TODO: when pygrocy supports multiple shopping lists, this has to be updated
         SHOPPING_LIST_ITEM_COUNT.labels(name="Shopping List").set(len(new))
 
+        if old is not None:
+            new_items = sorted(filter_new_by_key(old, new, key=lambda x: x.id), key=lambda x: x.id)
+            self._publish(EVENT_SHOPPING_ITEM_ADDED, map(shopping_list_item_to_json, new_items))
+
     def on_task_update(self, old: List[Any], new: List[Any]):
         TASK_COUNT.set(len(new))
+
+    def _publish(self, type: str, items: Iterable[dict]):
+        """
+        Publishes one event per item, if an event broker is set
+        :param type: the event type
+        :param items: the event data of each event
+        """
+        if self._events is None:
+            return
+        for data in items:
+            self._events.publish(type, data)
@@ -1,5 +1,6 @@
 import logging
 import threading
+from time import time
 from typing import List
 
 from pygrocy import Grocy
@@ -15,24 +16,41 @@ class RegularIntervalWorker:
     def __init__(self, interval: float):
         self._interval = interval
         self._timer = None
+        self._lock = threading.Lock()
+        self.started_at = None
+        # time of the last run that completed without an error
+        self.last_success = None
 
     def start(self):
         """
         Starts the worker
         """
-        if self._timer is None:
-            LOGGER.debug(f"Starting worker: {self.__class__.__name__}")
-            self._schedule_next_run(0)
-        else:
-            LOGGER.debug("Already running, ignoring start() call")
+        with self._lock:
+            if self._timer is None:
+                LOGGER.debug(f"Starting worker: {self.__class__.__name__}")
+                self.started_at = time()
+                self._schedule_next_run(0)
+            else:
+                LOGGER.debug("Already running, ignoring start() call")
 
     def stop(self):
         """
         Stops the worker
         """
-        if self._timer is not None:
-            self._timer.cancel()
-        self._timer = None
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = None
+
+    def is_alive(self, missed_runs: int = 3) -> bool:
+        """
+        :param missed_runs: number of consecutive runs which may fail or be delayed
+        :return: true if the worker is running and has completed a run recently, false otherwise
+        """
+        if self._timer is None:
+            return False
+        last_success = self.last_success if self.last_success is not None else self.started_at
+        return time() - last_success <= self._interval * missed_runs
 
     def _schedule_next_run(self, interval: int = None):
         """
@@ -42,6 +60,9 @@ class RegularIntervalWorker:
             self._timer.cancel()
         interval = interval if interval is not None else self._interval
         self._timer = threading.Timer(interval, self._worker_job)
+        # matched by the profiler
+        self._timer.name = f"watcher-{self.__class__.__name__}"
+        self._timer.daemon = True
         self._timer.start()
 
     def _worker_job(self):
@@ -50,10 +71,14 @@ class RegularIntervalWorker:
         """
         try:
             self._run()
+            self.last_success = time()
         except Exception as e:
             LOGGER.error(e, exc_info=True)
         finally:
-            self._schedule_next_run()
+            with self._lock:
+                # don't reschedule if the worker has been stopped during this run
+                if self._timer is not None:
+                    self._schedule_next_run()
 
     def _run(self):
         """
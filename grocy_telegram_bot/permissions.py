@@ -2,17 +2,15 @@ from telegram import Update
 from telegram.ext import CallbackContext
 from telegram_click.permission.base import Permission
 
-from grocy_telegram_bot.config import Config
+from grocy_telegram_bot.config import get_config
 
 
 class _ConfigAdmins(Permission):
 
-    def __init__(self):
-        self._config = Config()
-
     def evaluate(self, update: Update, context: CallbackContext) -> bool:
-        from_user = update.effective_message.from_user
-        return from_user.username in self._config.TELEGRAM_ADMIN_USERNAMES.value
+        # not every update has a message (f.ex. inline queries), but all of them have a user
+        from_user = update.effective_user
+        return from_user is not None and from_user.username in get_config().TELEGRAM_ADMIN_USERNAMES.value
 
 
 CONFIG_ADMINS = _ConfigAdmins()
@@ -0,0 +1,90 @@
+import logging
+import threading
+from datetime import timedelta
+
+from grocy_telegram_bot.cache import GrocyCached, prefetching, add_invalidation_listener, \
+    remove_invalidation_listener
+from grocy_telegram_bot.stats import CACHE_PREWARMED
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CachePrewarmer:
+    """
+    Fills the cache with the product catalog, its search indices and the stock in the background,
+    once at startup and again whenever a write has invalidated the cache.
+    This way the next command (f.ex. /ia, /sla or /i) finds everything it needs already loaded,
+    instead of waiting for Grocy while the user waits for a reply.
+    """
+
+    def __init__(self, grocy: GrocyCached, retry_interval: timedelta = timedelta(seconds=10)):
+        """
+        Creates a prewarmer
+        :param grocy: the cached Grocy client
+        :param retry_interval: time to wait before trying again, if the initial prewarming failed
+        """
+        self._grocy = grocy
+        self._retry_interval = retry_interval.total_seconds()
+        # set once the cache has been filled for the first time
+        self.ready = threading.Event()
+        self._prefetch_requested = threading.Event()
+        self._stop_requested = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Starts prewarming in the background
+        """
+        if self._thread is not None:
+            return
+        add_invalidation_listener(self.prefetch)
+        self._thread = threading.Thread(target=self._run, name="prewarmer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops prewarming and waits for the current run to finish
+        """
+        remove_invalidation_listener(self.prefetch)
+        self._stop_requested.set()
+        self._prefetch_requested.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def prefetch(self):
+        """
+        Requests to refill the cache in the background. Requests made while a refill is running are
+        combined into a single refill afterwards.
+        """
+        self._prefetch_requested.set()
+
+    def _run(self):
+        while not self._warm():
+            if self._stop_requested.wait(self._retry_interval):
+                return
+        self.ready.set()
+        CACHE_PREWARMED.set(1)
+        LOGGER.debug("Cache prewarmed")
+
+        while True:
+            self._prefetch_requested.wait()
+            if self._stop_requested.is_set():
+                return
+            self._prefetch_requested.clear()
+            self._warm()
+
+    def _warm(self) -> bool:
+        """
+        Fills the cache
+        :return: True if successful, false otherwise
+        """
+        try:
+            with prefetching():
+                self._grocy.get_all_products()
+                self._grocy.get_product_index()
+                self._grocy.get_barcode_index()
+            return True
+        except Exception as ex:
+            LOGGER.warning(f"Error prewarming cache: {ex}")
+            return False
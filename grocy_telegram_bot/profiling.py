@@ -0,0 +1,158 @@
+import logging
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from time import time, sleep
+from typing import Dict
+
+LOGGER = logging.getLogger(__name__)
+
+# maximum number of frames recorded per sample, deeper stacks are cut off at the root
+MAX_STACK_DEPTH = 64
+# minimum time between two samples, to bound the overhead of the profiler
+MIN_SAMPLE_INTERVAL = 0.005
+# names of the threads doing the actual work of the bot: the dispatcher (named "Bot:<id>:dispatcher" when polling),
+# the handler executor and the watchers of the monitor
+PROFILED_THREAD_NAMES = r"(Bot:\d+:)?dispatcher|handler_\d+|watcher-.+"
+# innermost frames of threads blocked on a lock, a queue or i/o, these samples don't use any cpu time
+IDLE_FRAMES = {
+    "threading.py:wait",
+    "threading.py:_wait_for_tstate_lock",
+    "queue.py:get",
+    "selectors.py:select",
+    "socket.py:accept",
+    "socket.py:readinto",
+    "ssl.py:read",
+    "ssl.py:recv_into",
+}
+
+# only a single profiler may run at a time
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusyError(Exception):
+    """
+    Raised when a profile is requested while another one is still running
+    """
+    pass
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def sample_stacks(duration: float, interval: float = 0.01,
+                  thread_names: str = PROFILED_THREAD_NAMES) -> Dict[str, int]:
+    """
+    Profiles the cpu usage of threads by periodically sampling their stacks.
+    Samples of threads waiting for a lock, a queue or i/o are dropped, so they don't hide the actual hot spots.
+    :param duration: profiling duration in seconds
+    :param interval: time between two samples in seconds
+    :param thread_names: regular expression matching the names of the threads to profile
+    :return: collapsed stacks ("thread;outer;...;inner") -> number of samples
+    """
+    thread_name_pattern = re.compile(thread_names)
+    interval = max(interval, MIN_SAMPLE_INTERVAL)
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("Another profile is already running")
+    try:
+        own_thread_id = threading.get_ident()
+        stacks = Counter()
+        end = time() + duration
+        while time() < end:
+            thread_names = dict(map(lambda x: (x.ident, x.name), threading.enumerate()))
+            for thread_id, frame in sys._current_frames().items():
+                thread_name = thread_names.get(thread_id, str(thread_id))
+                if thread_id == own_thread_id or not thread_name_pattern.fullmatch(thread_name):
+                    continue
+                if _frame_name(frame) in IDLE_FRAMES:
+                    continue
+                names = []
+                while frame is not None and len(names) < MAX_STACK_DEPTH:
+                    names.append(_frame_name(frame))
+                    frame = frame.f_back
+                names.append(thread_name)
+                stacks[";".join(reversed(names))] += 1
+            sleep(interval)
+        return dict(stacks)
+    finally:
+        _profile_lock.release()
+
+
+def format_collapsed_stacks(stacks: Dict[str, int]) -> str:
+    """
+    Formats collapsed stacks in the format used by flamegraph tools (f.ex. flamegraph.pl or speedscope)
+    :param stacks: collapsed stack -> number of samples
+    :return: one "stack count" line per stack
+    """
+    return "\n".join(map(lambda x: f"{x[0]} {x[1]}", sorted(stacks.items())))
+
+
+def format_top_functions(stacks: Dict[str, int], limit: int = 30) -> str:
+    """
+    Formats a report of the functions most samples were taken in
+    :param stacks: collapsed stack -> number of samples
+    :param limit: number of functions to list
+    :return: the report
+    """
+    total = max(1, sum(stacks.values()))
+    own = Counter()
+    cumulative = Counter()
+    for stack, count in stacks.items():
+        # the first element is the thread name
+        frames = stack.split(";")[1:]
+        if len(frames) <= 0:
+            continue
+        own[frames[-1]] += count
+        for frame in set(frames):
+            cumulative[frame] += count
+
+    lines = [f"{total} samples", "", "own %   total %  function"]
+    for frame, count in own.most_common(limit):
+        lines.append(f"{count / total * 100:6.1f}  {cumulative[frame] / total * 100:7.1f}  {frame}")
+    return "\n".join(lines)
+
+
+def trace_allocations(duration: float, limit: int = 30, frames: int = 10) -> str:
+    """
+    Traces memory allocations of all threads using tracemalloc
+    :param duration: tracing duration in seconds
+    :param limit: number of allocation sites to list
+    :param frames: number of frames stored per allocation, more frames increase the overhead
+    :return: report of the allocation sites with the largest growth and the largest total size
+    """
+    import tracemalloc
+
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("Another profile is already running")
+    try:
+        # don't interfere with tracing enabled at startup (f.ex. using PYTHONTRACEMALLOC)
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start(frames)
+        try:
+            start_snapshot = tracemalloc.take_snapshot()
+            sleep(duration)
+            end_snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+    finally:
+        _profile_lock.release()
+
+    snapshot_filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ]
+    start_snapshot = start_snapshot.filter_traces(snapshot_filters)
+    end_snapshot = end_snapshot.filter_traces(snapshot_filters)
+
+    lines = [f"traced memory: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB", "", "Largest growth:"]
+    lines.extend(map(str, end_snapshot.compare_to(start_snapshot, "lineno")[:limit]))
+    lines.extend(["", "Largest total size:"])
+    lines.extend(map(str, end_snapshot.statistics("lineno")[:limit]))
+    return "\n".join(lines)
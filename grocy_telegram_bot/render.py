@@ -0,0 +1,247 @@
+import functools
+from datetime import datetime, date, timezone
+from typing import List
+
+from pygrocy.grocy import Product, Chore, ShoppingListProduct
+from pygrocy.utils import parse_int
+
+from grocy_telegram_bot.config import get_config
+from grocy_telegram_bot.const import NEVER_EXPIRES_DATE
+
+
+class Template:
+    """
+    Text template using str.format() syntax.
+    Emoji aliases are expanded once when the template is first rendered, instead of every time a message is sent.
+    """
+
+    def __init__(self, text: str):
+        self._raw_text = text
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            from emoji import emojize
+            self._text = emojize(self._raw_text, use_aliases=True)
+        return self._text
+
+    def render(self, **kwargs) -> str:
+        # replace this method with the bound format method of the expanded text, so later calls skip all of this
+        self.render = self.text.format
+        return self.render(**kwargs)
+
+
+PRODUCT_TEMPLATE = Template("{amount}x\t{name}")
+PRODUCT_EXPIRY_TEMPLATE = Template("{amount}x\t{name} (Exp: {date})")
+CHORE_TEMPLATE = Template("{name}")
+CHORE_DUE_TEMPLATE = Template("{name}\n  Due: {days} days ({date})")
+SHOPPING_LIST_ITEM_TEMPLATE = Template("{amount}x {name}")
+
+
+@functools.lru_cache(maxsize=None)
+def _get_date_pattern(locale: str) -> tuple:
+    """
+    :param locale: locale identifier
+    :return: the parsed babel locale and its date format
+    """
+    from babel import Locale
+    from babel.dates import get_date_format
+    locale = Locale.parse(locale)
+    return locale, get_date_format(locale=locale)
+
+
+@functools.lru_cache(maxsize=4096)
+def format_iso_date(d: str, locale: str = None) -> str:
+    """
+    Formats a date given in iso format
+    :param d: the date to format
+    :param locale: locale identifier, defaults to the configured locale
+    :return: formatted date
+    """
+    return format_date(date.fromisoformat(d), locale)
+
+
+@functools.lru_cache(maxsize=4096)
+def format_date(d: date, locale: str = None) -> str:
+    """
+    Formats a date, results are memoized since lists usually contain the same dates over and over again
+    :param d: the date to format
+    :param locale: locale identifier, defaults to the configured locale
+    :return: formatted date
+    """
+    if locale is None:
+        locale = get_config().LOCALE.value
+    locale, pattern = _get_date_pattern(locale)
+    return pattern.apply(d, locale)
+
+
+def product_to_row(item: Product) -> list:
+    """
+    Converts a product into a json serializable row, containing only what is needed to render it
+    :param item: the product
+    :return: [amount, name, expiration date (iso format) or None]
+    """
+    amount = parse_int(item.available_amount, 0)
+    expire_date = None
+    if item.best_before_date is not None and item.best_before_date.date() < NEVER_EXPIRES_DATE:
+        expire_date = item.best_before_date.astimezone().date().isoformat()
+    return [amount, item.name, expire_date]
+
+
+def render_product_row(row: list, locale: str = None) -> str:
+    """
+    Converts a product row into a string representation
+    :param row: the product row, see product_to_row()
+    :param locale: locale identifier, defaults to the configured locale
+    :return: a text representation
+    """
+    amount, name, expire_date = row
+    if expire_date is None:
+        return PRODUCT_TEMPLATE.render(amount=amount, name=name)
+    return PRODUCT_EXPIRY_TEMPLATE.render(amount=amount, name=name, date=format_iso_date(expire_date, locale))
+
+
+def render_product_rows(rows: List[list]) -> List[str]:
+    """
+    Converts a list of product rows into their string representations
+    :param rows: the product rows
+    :return: text representations
+    """
+    locale = get_config().LOCALE.value
+    return list(map(lambda x: render_product_row(x, locale), rows))
+
+
+def render_product(item: Product, locale: str = None) -> str:
+    """
+    Converts a product object into a string representation
+    :param item: the product
+    :param locale: locale identifier, defaults to the configured locale
+    :return: a text representation
+    """
+    return render_product_row(product_to_row(item), locale)
+
+
+def render_products(items: List[Product]) -> List[str]:
+    """
+    Converts a list of products into their string representations
+    :param items: the products
+    :return: text representations
+    """
+    locale = get_config().LOCALE.value
+    return list(map(lambda x: render_product(x, locale), items))
+
+
+def chore_to_row(chore: Chore) -> list:
+    """
+    Converts a chore into a json serializable row, containing only what is needed to render it
+    :param chore: the chore
+    :return: [name, next estimated execution time (iso format) or None]
+    """
+    next_execution_time = chore.next_estimated_execution_time
+    return [chore.name, None if next_execution_time is None else next_execution_time.isoformat()]
+
+
+def render_chore_row(row: list, now: datetime = None, locale: str = None) -> str:
+    """
+    Converts a chore row into a string representation
+    :param row: the chore row, see chore_to_row()
+    :param now: the current time (in UTC)
+    :param locale: locale identifier, defaults to the configured locale
+    :return: a text representation
+    """
+    name, next_execution_time = row
+    if next_execution_time is not None:
+        next_execution_time = datetime.fromisoformat(next_execution_time)
+    return _render_chore(name, next_execution_time, now, locale)
+
+
+def render_chore_rows(rows: List[list]) -> List[str]:
+    """
+    Converts a list of chore rows into their string representations
+    :param rows: the chore rows
+    :return: text representations
+    """
+    now = datetime.today().astimezone(tz=timezone.utc)
+    locale = get_config().LOCALE.value
+    return list(map(lambda x: render_chore_row(x, now, locale), rows))
+
+
+def render_chore(chore: Chore, now: datetime = None, locale: str = None) -> str:
+    """
+    Converts a chore object into a string representation
+    :param chore: the chore item
+    :param now: the current time (in UTC)
+    :param locale: locale identifier, defaults to the configured locale
+    :return: a text representation
+    """
+    return _render_chore(chore.name, chore.next_estimated_execution_time, now, locale)
+
+
+def render_chores(chores: List[Chore]) -> List[str]:
+    """
+    Converts a list of chores into their string representations
+    :param chores: the chores
+    :return: text representations
+    """
+    now = datetime.today().astimezone(tz=timezone.utc)
+    locale = get_config().LOCALE.value
+    return list(map(lambda x: render_chore(x, now, locale), chores))
+
+
+def _render_chore(name: str, next_execution_time: datetime or None, now: datetime or None,
+                  locale: str or None) -> str:
+    if next_execution_time is None:
+        return CHORE_TEMPLATE.render(name=name)
+
+    if now is None:
+        now = datetime.today().astimezone(tz=timezone.utc)
+    days_off = abs((next_execution_time - now).days)
+    date_str = format_date(next_execution_time.astimezone().date(), locale)
+    return CHORE_DUE_TEMPLATE.render(name=name, days=days_off, date=date_str)
+
+
+def shopping_list_item_to_row(item: ShoppingListProduct) -> list:
+    """
+    Converts a shopping list item into a json serializable row, containing only what is needed to render it
+    :param item: the shopping list item
+    :return: [amount, name]
+    """
+    return [parse_int(item.amount, item.amount), item.product.name]
+
+
+def render_shopping_list_item_row(row: list) -> str:
+    """
+    Converts a shopping list item row into a string representation
+    :param row: the shopping list item row, see shopping_list_item_to_row()
+    :return: a text representation
+    """
+    amount, name = row
+    return SHOPPING_LIST_ITEM_TEMPLATE.render(amount=amount, name=name)
+
+
+def render_shopping_list_item_rows(rows: List[list]) -> List[str]:
+    """
+    Converts a list of shopping list item rows into their string representations
+    :param rows: the shopping list item rows
+    :return: text representations
+    """
+    return list(map(render_shopping_list_item_row, rows))
+
+
+def render_shopping_list_item(item: ShoppingListProduct) -> str:
+    """
+    Converts a shopping list item object into a string representation
+    :param item: the shopping list item
+    :return: a text representation
+    """
+    return render_shopping_list_item_row(shopping_list_item_to_row(item))
+
+
+def render_shopping_list_items(items: List[ShoppingListProduct]) -> List[str]:
+    """
+    Converts a list of shopping list items into their string representations
+    :param items: the shopping list items
+    :return: text representations
+    """
+    return list(map(render_shopping_list_item, items))
@@ -0,0 +1,232 @@
+import bisect
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Tuple, Set
+
+from grocy_telegram_bot.tracing import traced
+
+LOGGER = logging.getLogger(__name__)
+
+# terms shorter than this are only matched against the start of names
+MIN_FUZZY_TERM_LENGTH = 3
+# number of prefiltered candidates per requested result that are actually scored
+CANDIDATES_PER_RESULT = 20
+# minimum number of prefiltered candidates that are scored
+MIN_CANDIDATES = 100
+
+
+def normalize(text: str) -> str:
+    """
+    Normalizes a string for matching, the same way fuzzywuzzy processes its inputs
+    :param text: the text to normalize
+    :return: normalized text
+    """
+    from fuzzywuzzy import utils
+    return utils.full_process(text.casefold(), force_ascii=False)
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    :param text: normalized text
+    :return: set of all trigrams of the given text, padded with whitespace at start and end
+    """
+    padded = f" {text} "
+    return set(map(lambda i: padded[i:i + 3], range(len(padded) - 2)))
+
+
+class FuzzySearchIndex:
+    """
+    Search index for fuzzy matching a term against a (possibly large) list of choices,
+    f.ex. the product catalog.
+
+    Instead of scoring every choice on every search, the index keeps the normalized keys of all choices
+    along with a trigram index, which is used to prefilter the candidates that are actually scored.
+    Exact matches skip scoring entirely, short terms are only matched against the start of keys.
+    """
+
+    def __init__(self, key: callable = lambda x: x):
+        """
+        Creates an empty index
+        :param key: function to turn a choice into a string
+        """
+        self.key = key
+        # incremented on every change of the indexed choices
+        self.version = 0
+        self._lock = threading.RLock()
+        # the list of choices the index was last updated with
+        self._source = None
+        # normalized key -> choices with this key
+        self._choices: Dict[str, List[Any]] = {}
+        # sorted list of normalized keys, used for prefix lookups
+        self._sorted_keys: List[str] = []
+        # trigram -> normalized keys containing it
+        self._postings: Dict[str, Set[str]] = {}
+        # raw key -> normalized key, to avoid normalizing unchanged keys again
+        self._normalized: Dict[str, str] = {}
+
+    def __len__(self):
+        return len(self._choices)
+
+    def update(self, choices: List[Any]):
+        """
+        Updates the index with the given choices.
+        Only keys that were added or removed since the last update are (re-)indexed.
+        :param choices: list of all choices
+        """
+        with self._lock:
+            if choices is self._source:
+                return
+
+            normalized = {}
+            new_choices = {}
+            for choice in choices:
+                raw_key = self.key(choice)
+                if raw_key is None:
+                    continue
+                key = self._normalized.get(raw_key, None)
+                if key is None:
+                    key = normalize(raw_key)
+                normalized[raw_key] = key
+                if len(key) <= 0:
+                    continue
+                new_choices.setdefault(key, []).append(choice)
+
+            removed = self._choices.keys() - new_choices.keys()
+            added = new_choices.keys() - self._choices.keys()
+            for key in removed:
+                self._remove_key(key)
+            for key in added:
+                self._add_key(key)
+
+            self._choices = new_choices
+            self._normalized = normalized
+            self._source = choices
+            self.version += 1
+            LOGGER.debug(f"Updated search index: {len(added)} keys added, {len(removed)} keys removed")
+
+    @traced("search")
+    def search(self, term: str, limit: int = None) -> List[Tuple[Any, int]]:
+        """
+        Does a fuzzy search on the indexed choices
+        :param term: the search term
+        :param limit: Optional maximum for the number of elements returned
+        :return: List of (choice, ratio) tuples, sorted by descending ratio
+        """
+        term = normalize(term)
+        with self._lock:
+            exact_matches = self._choices.get(term, None)
+            if exact_matches is not None:
+                return list(map(lambda x: (x, 100), exact_matches))[:limit]
+
+            if len(term) < MIN_FUZZY_TERM_LENGTH:
+                keys = self._find_prefix_matches(term)
+                if limit is not None:
+                    keys = keys[:max(limit * CANDIDATES_PER_RESULT, MIN_CANDIDATES)]
+            else:
+                keys = self._find_candidates(term, limit)
+                if len(keys) <= 0:
+                    keys = self._sorted_keys
+
+            from fuzzywuzzy import fuzz
+            scored = map(lambda x: (x, fuzz.UWRatio(term, x, full_process=False)), keys)
+            scored = sorted(scored, key=lambda x: x[1], reverse=True)
+
+            result = []
+            for key, ratio in scored:
+                result.extend(map(lambda x: (x, ratio), self._choices[key]))
+                if limit is not None and len(result) >= limit:
+                    break
+            return result[:limit]
+
+    def _find_prefix_matches(self, term: str) -> List[str]:
+        """
+        :param term: normalized term
+        :return: all keys starting with the given term
+        """
+        start = bisect.bisect_left(self._sorted_keys, term)
+        end = bisect.bisect_left(self._sorted_keys, term + "\uffff", lo=start)
+        return self._sorted_keys[start:end]
+
+    def _find_candidates(self, term: str, limit: int or None) -> List[str]:
+        """
+        Finds the keys sharing the most trigrams with the given term
+        :param term: normalized term
+        :param limit: the number of requested results
+        :return: candidate keys
+        """
+        overlap = Counter()
+        for trigram in trigrams(term):
+            overlap.update(self._postings.get(trigram, ()))
+
+        if limit is None:
+            return list(overlap.keys())
+        count = max(limit * CANDIDATES_PER_RESULT, MIN_CANDIDATES)
+        return list(map(lambda x: x[0], overlap.most_common(count)))
+
+    def _add_key(self, key: str):
+        bisect.insort(self._sorted_keys, key)
+        for trigram in trigrams(key):
+            self._postings.setdefault(trigram, set()).add(key)
+
+    def _remove_key(self, key: str):
+        index = bisect.bisect_left(self._sorted_keys, key)
+        del self._sorted_keys[index]
+        for trigram in trigrams(key):
+            keys = self._postings[trigram]
+            keys.discard(key)
+            if len(keys) <= 0:
+                self._postings.pop(trigram)
+
+
+def normalize_barcode(barcode: str) -> str:
+    """
+    Normalizes a barcode for lookups. Numeric codes are zero padded to the length of a GTIN-14,
+    so f.ex. the UPC-A and EAN-13 representation of the same product are equal.
+    :param barcode: the barcode
+    :return: normalized barcode
+    """
+    barcode = barcode.strip()
+    if barcode.isdigit():
+        return barcode.zfill(14)
+    return barcode
+
+
+class BarcodeIndex:
+    """
+    Hash index to look up a product by one of its barcodes
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # the list of products the index was last updated with
+        self._source = None
+        # normalized barcode -> product
+        self._products: Dict[str, Any] = {}
+
+    def __len__(self):
+        return len(self._products)
+
+    def update(self, products: List[Any]):
+        """
+        Rebuilds the index, if the given list differs from the one of the last update
+        :param products: list of all products
+        """
+        with self._lock:
+            if products is self._source:
+                return
+
+            index = {}
+            for product in products:
+                for barcode in product.barcodes or []:
+                    if len(barcode.strip()) > 0:
+                        index[normalize_barcode(barcode)] = product
+            self._products = index
+            self._source = products
+
+    def lookup(self, barcode: str) -> Any or None:
+        """
+        :param barcode: the barcode to look up
+        :return: the product with the given barcode, or None
+        """
+        return self._products.get(normalize_barcode(barcode), None)
@@ -1,6 +1,9 @@
-from prometheus_client import Summary, Gauge
+import functools
+
+from prometheus_client import Summary, Gauge, Counter, Histogram
 from prometheus_client.metrics import MetricWrapperBase
 
+from grocy_telegram_bot.config import get_config
 from grocy_telegram_bot.const import *
 
 COMMAND_TIME = Summary('command_processing_seconds', 'Time spent in a command handler', ['command'])
@@ -10,6 +13,139 @@ COMMAND_TIME_INVENTORY = COMMAND_TIME.labels(command=COMMAND_INVENTORY)
 COMMAND_TIME_SHOPPING = COMMAND_TIME.labels(command=COMMAND_SHOPPING)
 COMMAND_TIME_SHOPPING_LIST = COMMAND_TIME.labels(command=COMMAND_SHOPPING_LIST)
 COMMAND_TIME_SHOPPING_LIST_ADD = COMMAND_TIME.labels(command=COMMAND_SHOPPING_LIST_ADD)
+COMMAND_TIME_INLINE_QUERY = COMMAND_TIME.labels(command=COMMAND_INLINE_QUERY)
+COMMAND_TIME_BARCODE = COMMAND_TIME.labels(command=COMMAND_BARCODE)
+COMMAND_TIME_EXPORT = COMMAND_TIME.labels(command=COMMAND_EXPORT)
+COMMAND_TIME_IMAGE = COMMAND_TIME.labels(command=COMMAND_IMAGE)
+COMMAND_TIME_TRACE = COMMAND_TIME.labels(command=COMMAND_TRACE)
+COMMAND_TIME_PROFILE = COMMAND_TIME.labels(command=COMMAND_PROFILE)
+
+TELEGRAM_REQUEST_TIME = Histogram(
+    'telegram_request_seconds',
+    'Latency of Telegram Bot API calls',
+    ['method']
+)
+
+TELEGRAM_REQUEST_SIZE = Summary(
+    'telegram_request_size_bytes',
+    'Payload size of Telegram Bot API calls',
+    ['method']
+)
+
+TELEGRAM_RETRY_AFTER_COUNT = Counter(
+    'telegram_retry_after_count',
+    'Number of Telegram Bot API calls rejected because of flood limits (HTTP 429, RetryAfter)',
+    ['method']
+)
+
+TELEGRAM_REQUEST_ERROR_COUNT = Counter(
+    'telegram_request_error_count',
+    'Number of failed Telegram Bot API calls, by error type',
+    ['method', 'error']
+)
+
+UPDATE_REPLY_TIME = Histogram(
+    'update_reply_seconds',
+    'Time from receiving an update until the first reply to it was sent'
+)
+
+HANDLER_QUEUE_DEPTH = Gauge(
+    'handler_queue_depth',
+    'Number of updates waiting to be processed, of all chats'
+)
+
+HANDLER_QUEUE_WAIT_TIME = Summary(
+    'handler_queue_wait_seconds',
+    'Time an update waited before its handler was executed'
+)
+
+GROCY_REQUESTS_IN_PROGRESS = Gauge(
+    'grocy_requests_in_progress',
+    'Number of Grocy api requests currently in progress',
+    ['endpoint', 'method']
+)
+
+GROCY_RESPONSE_SIZE = Summary(
+    'grocy_response_size_bytes',
+    'Size of Grocy api responses',
+    ['endpoint', 'method']
+)
+
+GROCY_REQUEST_ERROR_COUNT = Counter(
+    'grocy_request_error_count',
+    'Number of failed Grocy api requests, by http status code or exception type',
+    ['endpoint', 'method', 'error']
+)
+
+GROCY_CACHE_REQUEST_COUNT = Counter(
+    'grocy_cache_request_count',
+    'Number of cacheable Grocy calls, by whether they were answered from the cache',
+    ['function', 'result']
+)
+
+
+@functools.lru_cache(maxsize=None)
+def get_grocy_request_time() -> Histogram:
+    """
+    Creates the Grocy api request latency histogram on first use, since its buckets are configurable
+    :return: the histogram
+    """
+    return Histogram(
+        'grocy_request_seconds',
+        'Latency of Grocy api requests',
+        ['endpoint', 'method'],
+        buckets=get_config().GROCY_REQUEST_TIME_BUCKETS.value
+    )
+
+
+CACHE_PREWARMED = Gauge(
+    'cache_prewarmed',
+    'Whether the cache has been filled after startup'
+)
+
+PREFETCH_COUNT = Counter(
+    'cache_prefetch_count',
+    'Number of Grocy responses cached in advance by the prewarmer',
+    ['function']
+)
+
+PREFETCH_HIT_COUNT = Counter(
+    'cache_prefetch_hit_count',
+    'Number of prefetched Grocy responses which have been used afterwards',
+    ['function']
+)
+
+WRITE_QUEUE_PENDING_COUNT = Gauge(
+    'write_queue_pending_count',
+    'Number of items with pending Grocy writes'
+)
+
+WRITE_QUEUE_FAILURE_COUNT = Counter(
+    'write_queue_failure_count',
+    'Number of failed delayed Grocy writes'
+)
+
+API_REQUEST_COUNT = Counter(
+    'api_request_count',
+    'Number of requests to the json api',
+    ['endpoint', 'status']
+)
+
+EVENT_COUNT = Counter(
+    'event_count',
+    'Number of published events about changes in Grocy',
+    ['type']
+)
+
+EVENT_SUBSCRIBER_COUNT = Gauge(
+    'event_subscriber_count',
+    'Number of event stream subscribers'
+)
+
+EVENT_SUBSCRIBER_OVERFLOW_COUNT = Counter(
+    'event_subscriber_overflow_count',
+    'Number of event stream subscribers disconnected for not keeping up'
+)
 
 PRODUCT_INVENTORY_COUNT = Gauge(
     'product_inventory_count',
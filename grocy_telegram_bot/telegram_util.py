@@ -1,25 +1,30 @@
+import base64
 import json
-from typing import Dict
+from typing import Dict, Iterable, Tuple, NamedTuple, Any
 
-from grocy_telegram_bot.const import COMMAND_SHOPPING
+from grocy_telegram_bot.const import COMMAND_SHOPPING, COMMAND_PRODUCT_ACTION, COMMAND_BATCH, COMMAND_PAGE
 
 
 class MinifiableData:
+    # this map is used to remember the property name -> minified key mapping of each class,
+    # since it only depends on the property names
+    _name_to_minified_key_cache = {}
 
     def __init__(self, *args):
-        self._minified_key_to_name = {}
-        self._name_to_minified_key = {}
+        pass
 
     @classmethod
     def parse(cls, text: str):
         minified_dict = json.loads(text)
-        # create with random order first
-        # noinspection PyArgumentList
-        instance = cls(*minified_dict.values())
-        # then generate minified key mapping
-        instance._generate_minified_keys()
-        # and reassign all properties
-        for minified_key, name in instance._minified_key_to_name.items():
+        name_to_minified_key = cls._name_to_minified_key_cache.get(cls, None)
+        if name_to_minified_key is None:
+            # create with random order first, to generate the minified key mapping
+            # noinspection PyArgumentList
+            name_to_minified_key = cls(*minified_dict.values())._get_minified_keys()
+
+        # then assign all properties
+        instance = cls.__new__(cls)
+        for name, minified_key in name_to_minified_key.items():
             vars(instance)[name] = minified_dict[minified_key]
 
         return instance
@@ -32,11 +37,9 @@ class MinifiableData:
         Creates a minified json version of this object
         :return: minified json
         """
-        self._generate_minified_keys()
-
         properties = self._get_properties()
         minified_dict = {}
-        for name, minified_key in self._name_to_minified_key.items():
+        for name, minified_key in self._get_minified_keys().items():
             minified_dict[minified_key] = properties[name]
 
         minified = self._json_minified(minified_dict)
@@ -53,22 +56,161 @@ class MinifiableData:
         """
         return json.dumps(data, indent=None, separators=(',', ':'))
 
-    def _generate_minified_keys(self):
-        self._minified_key_to_name.clear()
-        self._name_to_minified_key.clear()
+    def _get_minified_keys(self) -> Dict[str, str]:
+        """
+        :return: property name -> minified key mapping of this class
+        """
+        name_to_minified_key = self._name_to_minified_key_cache.get(self.__class__, None)
+        if name_to_minified_key is None:
+            name_to_minified_key = self._generate_minified_keys(self._get_properties().keys())
+            self._name_to_minified_key_cache[self.__class__] = name_to_minified_key
+        return name_to_minified_key
 
-        properties = self._get_properties()
-        for name in properties.keys():
+    @staticmethod
+    def _generate_minified_keys(names: Iterable[str]) -> Dict[str, str]:
+        minified_key_to_name = {}
+        name_to_minified_key = {}
+        for name in names:
             max_len = len(name)
             length = 1
             while length <= max_len:
                 minified_key = name[0:length]
-                if minified_key in self._minified_key_to_name:
+                if minified_key in minified_key_to_name:
                     length += 1
                 else:
-                    self._minified_key_to_name[minified_key] = name
-                    self._name_to_minified_key[name] = minified_key
+                    minified_key_to_name[minified_key] = name
+                    name_to_minified_key[name] = minified_key
                     break
+        return name_to_minified_key
+
+
+FIELD_INT = "int"
+FIELD_STR = "str"
+
+# the first base85 character of data with a type tag above this value can be "{",
+# which would be mistaken for legacy minified json by CallbackData.decode()
+MAX_TYPE_TAG = 251
+
+
+def _encode_int(buffer: bytearray, value: int):
+    # zigzag encoding, so small negative numbers stay small too
+    value = value << 1 if value >= 0 else ((-value) << 1) - 1
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _decode_int(data: bytes, position: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (value >> 1) ^ -(value & 1), position
+
+
+def _encode_str(buffer: bytearray, value: str):
+    encoded = value.encode("utf-8")
+    _encode_int(buffer, len(encoded))
+    buffer.extend(encoded)
+
+
+def _decode_str(data: bytes, position: int) -> Tuple[str, int]:
+    length, position = _decode_int(data, position)
+    end = position + length
+    return data[position:end].decode("utf-8"), end
+
+
+_FIELD_CODERS = {
+    FIELD_INT: (_encode_int, _decode_int),
+    FIELD_STR: (_encode_str, _decode_str),
+}
+
+
+class _Schema(NamedTuple):
+    type_tag: int
+    data_type: type
+    names: Tuple[str, ...]
+    encoders: Tuple[callable, ...]
+    decoders: Tuple[callable, ...]
+
+
+class CallbackDataCodec:
+    """
+    Encodes objects into a compact text representation suitable for telegram callback data (max. 64 bytes).
+    The binary form consists of a one byte type tag, followed by the fields of the registered schema,
+    which is base85 encoded. Integers are zigzag varint encoded, strings are utf-8 encoded and length prefixed.
+    """
+
+    def __init__(self):
+        self._schemas_by_tag: Dict[int, _Schema] = {}
+        self._schemas_by_type: Dict[type, _Schema] = {}
+
+    def register(self, type_tag: int, *fields: Tuple[str, str]):
+        """
+        Class decorator to register the schema of a type
+        :param type_tag: unique tag of the type (0-MAX_TYPE_TAG)
+        :param fields: (property name, field type) tuples, in the order of the constructor parameters
+        """
+
+        def decorator(data_type: type) -> type:
+            if not 0 <= type_tag <= MAX_TYPE_TAG:
+                raise ValueError(f"Invalid type tag: {type_tag}")
+            if type_tag in self._schemas_by_tag:
+                raise ValueError(f"Type tag {type_tag} is already used by {self._schemas_by_tag[type_tag].data_type}")
+
+            schema = _Schema(
+                type_tag=type_tag,
+                data_type=data_type,
+                names=tuple(map(lambda x: x[0], fields)),
+                encoders=tuple(map(lambda x: _FIELD_CODERS[x[1]][0], fields)),
+                decoders=tuple(map(lambda x: _FIELD_CODERS[x[1]][1], fields)),
+            )
+            self._schemas_by_tag[type_tag] = schema
+            self._schemas_by_type[data_type] = schema
+            return data_type
+
+        return decorator
+
+    def encode(self, data: Any) -> str:
+        """
+        Encodes an object of a registered type
+        :param data: the object to encode
+        :return: encoded text
+        """
+        schema = self._schemas_by_type[type(data)]
+        buffer = bytearray((schema.type_tag,))
+        for name, encoder in zip(schema.names, schema.encoders):
+            encoder(buffer, getattr(data, name))
+
+        encoded = base64.b85encode(bytes(buffer)).decode("ascii")
+        if len(encoded) > 64:
+            raise ValueError(f"Cant encode object, because it would be to long: {data}")
+        return encoded
+
+    def decode(self, text: str) -> Any:
+        """
+        Decodes text created by encode()
+        :param text: encoded text
+        :return: decoded object
+        """
+        data = base64.b85decode(text)
+        schema = self._schemas_by_tag[data[0]]
+        position = 1
+        values = []
+        for decoder in schema.decoders:
+            value, position = decoder(data, position)
+            values.append(value)
+        # noinspection PyArgumentList
+        return schema.data_type(*values)
+
+
+CALLBACK_DATA_CODEC = CallbackDataCodec()
 
 
 class CallbackData(MinifiableData):
@@ -78,7 +220,35 @@ class CallbackData(MinifiableData):
         super().__init__(args)
         self.command_id = self.__class__.command_id
 
+    def encode(self) -> str:
+        """
+        :return: compact representation of this object, to be used as telegram callback data
+        """
+        return CALLBACK_DATA_CODEC.encode(self)
+
+    @classmethod
+    def decode(cls, text: str):
+        """
+        Decodes telegram callback data created by encode()
+        :param text: the callback data
+        :return: decoded object
+        """
+        if text.startswith("{"):
+            # created by minify(), f.ex. by a keyboard that was sent by an older version of this bot
+            return cls.parse(text)
+
+        result = CALLBACK_DATA_CODEC.decode(text)
+        if not isinstance(result, cls):
+            raise ValueError(f"Callback data of unexpected type: {type(result)}")
+        return result
 
+
+@CALLBACK_DATA_CODEC.register(
+    1,
+    ("shopping_list_item_id", FIELD_INT),
+    ("button_click_count", FIELD_INT),
+    ("shopping_list_amount", FIELD_INT),
+)
 class ShoppingListItemButtonCallbackData(CallbackData):
     command_id: str = COMMAND_SHOPPING[1]
 
@@ -88,3 +258,58 @@ class ShoppingListItemButtonCallbackData(CallbackData):
         self.shopping_list_item_id = shopping_list_item_id
         self.button_click_count = button_click_count
         self.shopping_list_amount = shopping_list_amount
+
+
+PRODUCT_ACTION_ADD_TO_SHOPPING_LIST = 1
+PRODUCT_ACTION_CONSUME = 2
+PRODUCT_ACTION_INVENTORY_ADD = 3
+
+
+@CALLBACK_DATA_CODEC.register(
+    2,
+    ("product_id", FIELD_INT),
+    ("action", FIELD_INT),
+)
+class ProductActionCallbackData(CallbackData):
+    """
+    Callback data of a button executing an action on a product, which doesn't need any additional state.
+    """
+    command_id: str = COMMAND_PRODUCT_ACTION
+
+    def __init__(self, product_id: int, action: int, *args):
+        super().__init__(args)
+        self.product_id = product_id
+        self.action = action
+
+
+@CALLBACK_DATA_CODEC.register(
+    3,
+    ("item_index", FIELD_INT),
+    ("product_id", FIELD_INT),
+)
+class BatchItemSelectionCallbackData(CallbackData):
+    """
+    Callback data of a button selecting the product of an ambiguous item of a batch command.
+    A product_id of -1 skips the item.
+    """
+    command_id: str = COMMAND_BATCH
+
+    def __init__(self, item_index: int, product_id: int, *args):
+        super().__init__(args)
+        self.item_index = item_index
+        self.product_id = product_id
+
+
+@CALLBACK_DATA_CODEC.register(
+    4,
+    ("page", FIELD_INT),
+)
+class PageCallbackData(CallbackData):
+    """
+    Callback data of a button navigating to a page of a paginated list
+    """
+    command_id: str = COMMAND_PAGE
+
+    def __init__(self, page: int, *args):
+        super().__init__(args)
+        self.page = page
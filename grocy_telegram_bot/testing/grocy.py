@@ -0,0 +1,503 @@
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from typing import Dict, List, Tuple, Any
+from urllib.parse import parse_qsl
+
+from grocy_telegram_bot.grocy_client import endpoint_label
+
+LOGGER = logging.getLogger(__name__)
+
+API_KEY_HEADER = "GROCY-API-KEY"
+
+# products with a best before date within this many days are "expiring"
+EXPIRING_DAYS = 5
+
+_ADJECTIVES = ["Fresh", "Organic", "Smoked", "Frozen", "Whole", "Light", "Spicy", "Sweet", "Dried", "Roasted"]
+_NOUNS = ["Milk", "Cheese", "Butter", "Bread", "Apple", "Tomato", "Coffee", "Rice", "Pasta", "Yoghurt", "Ham",
+          "Salmon", "Beans", "Honey", "Oats", "Juice", "Carrot", "Onion", "Garlic", "Flour"]
+_CHORES = ["Vacuum", "Water plants", "Clean", "Empty", "Descale", "Wash", "Tidy up", "Dust"]
+_ROOMS = ["kitchen", "bathroom", "living room", "bedroom", "hallway", "balcony", "office", "basement"]
+
+
+def _format_date(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d")
+
+
+def _format_timestamp(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class FakeGrocyDataset:
+    """
+    Generated, in-memory Grocy database, which is modified by write requests just like a real Grocy instance
+    """
+
+    def __init__(self, products: int = 100, chores: int = 20, shopping_list_items: int = 10, seed: int = 0):
+        """
+        Generates a dataset
+        :param products: number of products
+        :param chores: number of chores
+        :param shopping_list_items: number of items on the shopping list
+        :param seed: seed of the random generator, the same seed always results in the same dataset
+        """
+        self.lock = threading.RLock()
+        self.changed_time = datetime.now()
+        rnd = random.Random(seed)
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        self.products: Dict[int, dict] = {}
+        self.stock: Dict[int, dict] = {}
+        for product_id in range(1, products + 1):
+            name = f"{rnd.choice(_ADJECTIVES)} {rnd.choice(_NOUNS)} {product_id}"
+            self.products[product_id] = {
+                "id": product_id,
+                "name": name,
+                "description": None,
+                "location_id": 1,
+                "product_group_id": rnd.randint(1, 5),
+                "qu_id_stock": 1,
+                "qu_id_purchase": 1,
+                "qu_factor_purchase_to_stock": "1.0",
+                "picture_file_name": None,
+                "allow_partial_units_in_stock": "0",
+                "row_created_timestamp": _format_timestamp(today),
+                "min_stock_amount": str(rnd.choice([0, 0, 0, 1, 2])),
+                "default_best_before_days": str(rnd.choice([0, 7, 30])),
+                "barcode": str(4000000000000 + product_id),
+            }
+            if rnd.random() < 0.8:
+                self.stock[product_id] = {
+                    "product_id": product_id,
+                    "amount": str(rnd.randint(1, 10)),
+                    "amount_opened": "0",
+                    "best_before_date": _format_date(today + timedelta(days=rnd.randint(-10, 60))),
+                }
+
+        self.chores: Dict[int, dict] = {}
+        for chore_id in range(1, chores + 1):
+            last_tracked = today - timedelta(days=rnd.randint(0, 14))
+            period_days = rnd.choice([1, 3, 7, 14, 30])
+            self.chores[chore_id] = {
+                "id": chore_id,
+                "name": f"{rnd.choice(_CHORES)} {rnd.choice(_ROOMS)} {chore_id}",
+                "description": None,
+                "period_days": period_days,
+                "row_created_timestamp": _format_timestamp(today),
+                "last_tracked_time": last_tracked,
+            }
+
+        self.shopping_list: List[dict] = []
+        self._next_shopping_list_item_id = 1
+        for product_id in rnd.sample(list(self.products.keys()), min(shopping_list_items, products)):
+            self.add_to_shopping_list(product_id, 1, rnd.randint(1, 3))
+
+    def mark_changed(self):
+        """
+        Updates the time of the last database change, which is polled by the watchers
+        """
+        self.changed_time = datetime.now()
+
+    def require_product(self, product_id: int):
+        """
+        :param product_id: product id
+        :raises KeyError: if there is no product with the given id
+        """
+        if product_id not in self.products:
+            raise KeyError(product_id)
+
+    def stock_amount(self, product_id: int) -> float:
+        entry = self.stock.get(product_id, None)
+        return 0 if entry is None else float(entry["amount"])
+
+    def volatile_stock(self) -> dict:
+        today = _format_date(datetime.now())
+        expiring_limit = _format_date(datetime.now() + timedelta(days=EXPIRING_DAYS))
+        expiring = []
+        expired = []
+        for entry in self.stock.values():
+            if entry["best_before_date"] < today:
+                expired.append(entry)
+            elif entry["best_before_date"] <= expiring_limit:
+                expiring.append(entry)
+
+        missing = []
+        for product in self.products.values():
+            amount = self.stock_amount(product["id"])
+            amount_missing = float(product["min_stock_amount"]) - amount
+            if amount_missing > 0:
+                missing.append({
+                    "id": product["id"],
+                    "name": product["name"],
+                    "amount_missing": str(amount_missing),
+                    "is_partly_in_stock": "1" if amount > 0 else "0",
+                })
+
+        return {"expiring_products": expiring, "expired_products": expired, "missing_products": missing}
+
+    def product_details(self, product_id: int) -> dict:
+        product = self.products[product_id]
+        entry = self.stock.get(product_id, None)
+        quantity_unit = {"id": 1, "name": "Piece", "name_plural": "Pieces", "description": None,
+                         "row_created_timestamp": product["row_created_timestamp"]}
+        return {
+            "product": product,
+            "last_purchased": None,
+            "last_used": None,
+            "stock_amount": str(int(self.stock_amount(product_id))),
+            "stock_amount_opened": "0",
+            "next_best_before_date": None if entry is None else entry["best_before_date"],
+            "last_price": None,
+            "quantity_unit_purchase": quantity_unit,
+            "quantity_unit_stock": quantity_unit,
+            "location": {"id": 1, "name": "Fridge", "description": None,
+                         "row_created_timestamp": product["row_created_timestamp"]},
+        }
+
+    def chore_status(self, chore: dict) -> dict:
+        next_execution = chore["last_tracked_time"] + timedelta(days=chore["period_days"])
+        return {
+            "chore_id": chore["id"],
+            "last_tracked_time": _format_timestamp(chore["last_tracked_time"]),
+            "next_estimated_execution_time": _format_timestamp(next_execution),
+        }
+
+    def chore_details(self, chore_id: int) -> dict:
+        chore = self.chores[chore_id]
+        return {
+            "chore": {key: chore[key] for key in ["id", "name", "description", "row_created_timestamp"]},
+            "last_tracked": _format_timestamp(chore["last_tracked_time"]),
+            "last_done_by": {"id": 1, "username": "admin", "first_name": None, "last_name": None,
+                             "display_name": "admin"},
+        }
+
+    def add_stock(self, product_id: int, amount: float, best_before_date: str or None):
+        entry = self.stock.setdefault(product_id, {
+            "product_id": product_id,
+            "amount": "0",
+            "amount_opened": "0",
+            "best_before_date": best_before_date or "2999-12-31",
+        })
+        entry["amount"] = str(float(entry["amount"]) + amount)
+
+    def consume_stock(self, product_id: int, amount: float):
+        if self.stock_amount(product_id) < amount:
+            raise ValueError("Amount to be consumed cannot be > current stock amount")
+        remaining = self.stock_amount(product_id) - amount
+        if remaining <= 0:
+            self.stock.pop(product_id)
+        else:
+            self.stock[product_id]["amount"] = str(remaining)
+
+    def add_to_shopping_list(self, product_id: int, shopping_list_id: int, amount: float):
+        for item in self.shopping_list:
+            if item["product_id"] == product_id and item["shopping_list_id"] == shopping_list_id:
+                item["amount"] = str(float(item["amount"]) + amount)
+                return
+        self.shopping_list.append({
+            "id": self._next_shopping_list_item_id,
+            "product_id": product_id,
+            "note": None,
+            "amount": str(amount),
+            "row_created_timestamp": _format_timestamp(datetime.now()),
+            "shopping_list_id": shopping_list_id,
+            "done": "0",
+        })
+        self._next_shopping_list_item_id += 1
+
+    def remove_from_shopping_list(self, product_id: int, shopping_list_id: int, amount: float):
+        for item in list(self.shopping_list):
+            if item["product_id"] == product_id and item["shopping_list_id"] == shopping_list_id:
+                remaining = float(item["amount"]) - amount
+                if remaining <= 0:
+                    self.shopping_list.remove(item)
+                else:
+                    item["amount"] = str(remaining)
+
+
+class _FakeGrocyRequestHandler(BaseHTTPRequestHandler):
+    server: "FakeGrocyServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def _handle(self, method: str):
+        content_length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(content_length) if content_length > 0 else b""
+
+        path = self.path.split("?", 1)[0]
+        if not path.startswith("/api/"):
+            self._respond(HTTPStatus.NOT_FOUND, {"error_message": "Not found"})
+            return
+        end_url = path[len("/api/"):]
+
+        # pygrocy sends form encoded data, except for json put requests
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            data = json.loads(body.decode()) if len(body) > 0 else {}
+        else:
+            data = dict(parse_qsl(body.decode()))
+
+        status, data = self.server.handle_api_request(method, end_url, self.headers.get(API_KEY_HEADER, None),
+                                                      data)
+        self._respond(status, data)
+
+    def _respond(self, status: HTTPStatus, data: Any):
+        body = b"" if data is None else json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args):
+        LOGGER.debug(f"{self.address_string()} - {format % args}")
+
+
+class FakeGrocyServer(ThreadingHTTPServer):
+    """
+    HTTP server implementing the parts of the Grocy REST api used by pygrocy, backed by a generated dataset.
+    Can be used to run the bot, its tests and benchmarks without a real Grocy instance.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, dataset: FakeGrocyDataset, listen: str = "127.0.0.1", port: int = 0,
+                 api_key: str or None = None, latency: float = 0, jitter: float = 0, error_rate: float = 0,
+                 seed: int = 0):
+        """
+        Creates a fake Grocy server
+        :param dataset: the data to serve
+        :param listen: address to listen on
+        :param port: port to listen on, 0 to pick a free one
+        :param api_key: api key expected in the header of every request (if any)
+        :param latency: minimum time to wait before responding to a request in seconds
+        :param jitter: maximum additional random time to wait before responding to a request in seconds
+        :param error_rate: fraction of requests which fail with an internal server error
+        :param seed: seed of the random generator used for jitter and error injection
+        """
+        self.dataset = dataset
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._api_key = api_key
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._request_count = Counter()
+        self._request_count_lock = threading.Lock()
+        self._thread = None
+        self._routes = [
+            ("GET", r"stock", self._get_stock),
+            ("GET", r"stock/volatile", self._get_volatile_stock),
+            ("GET", r"stock/products/(\d+)", self._get_product_details),
+            ("POST", r"stock/products/(\d+)/add", self._add_product),
+            ("POST", r"stock/products/(\d+)/consume", self._consume_product),
+            ("POST", r"stock/shoppinglist/add-missing-products", self._add_missing_products),
+            ("POST", r"stock/shoppinglist/add-product", self._add_product_to_shopping_list),
+            ("POST", r"stock/shoppinglist/remove-product", self._remove_product_from_shopping_list),
+            ("POST", r"stock/shoppinglist/clear", self._clear_shopping_list),
+            ("GET", r"chores", self._get_chores),
+            ("GET", r"chores/(\d+)", self._get_chore),
+            ("POST", r"chores/(\d+)/execute", self._execute_chore),
+            ("GET", r"objects/shopping_list", self._get_shopping_list),
+            ("GET", r"objects/products/(\d+)", self._get_product),
+            ("GET", r"objects/product_groups", self._get_product_groups),
+            ("GET", r"system/db-changed-time", self._get_db_changed_time),
+        ]
+        super().__init__((listen, port), _FakeGrocyRequestHandler)
+
+    @property
+    def base_url(self) -> str:
+        """
+        :return: base url to pass to pygrocy, the port has to be passed separately
+        """
+        return f"http://{self.server_address[0]}"
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def request_count(self) -> Dict[Tuple[str, str], int]:
+        """
+        :return: (method, endpoint) -> number of requests received
+        """
+        with self._request_count_lock:
+            return dict(self._request_count)
+
+    def reset_request_count(self):
+        with self._request_count_lock:
+            self._request_count.clear()
+
+    def handle_api_request(self, method: str, end_url: str, api_key: str or None, data: dict) -> Tuple[int, Any]:
+        """
+        Handles a request to the api
+        :param method: http method
+        :param end_url: the url relative to the api base url
+        :param api_key: the api key send with the request
+        :param data: the request data
+        :return: status code and json response
+        """
+        with self._request_count_lock:
+            self._request_count[(method, endpoint_label(end_url))] += 1
+
+        with self._random_lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+        if delay > 0:
+            sleep(delay)
+
+        if self._api_key is not None and api_key != self._api_key:
+            return HTTPStatus.UNAUTHORIZED, {"error_message": "Unauthorized"}
+        if fail:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error_message": "Injected error"}
+
+        for route_method, pattern, handler in self._routes:
+            if route_method != method:
+                continue
+            match = re.fullmatch(pattern, end_url.strip("/"))
+            if match is None:
+                continue
+            args = list(map(int, match.groups()))
+            try:
+                with self.dataset.lock:
+                    return handler(*args, data)
+            except KeyError:
+                return HTTPStatus.NOT_FOUND, {"error_message": "Not found"}
+            except ValueError as ex:
+                return HTTPStatus.BAD_REQUEST, {"error_message": str(ex)}
+
+        return HTTPStatus.NOT_FOUND, {"error_message": f"Unknown endpoint: {method} {end_url}"}
+
+    def _get_stock(self, data: dict):
+        return HTTPStatus.OK, list(self.dataset.stock.values())
+
+    def _get_volatile_stock(self, data: dict):
+        return HTTPStatus.OK, self.dataset.volatile_stock()
+
+    def _get_product_details(self, product_id: int, data: dict):
+        return HTTPStatus.OK, self.dataset.product_details(product_id)
+
+    def _add_product(self, product_id: int, data: dict):
+        self.dataset.require_product(product_id)
+        amount = float(data.get("amount", 1))
+        self.dataset.add_stock(product_id, amount, data.get("best_before_date", None))
+        self.dataset.mark_changed()
+        # like Grocy, respond with the stock log entries of the booking
+        return HTTPStatus.OK, [{"product_id": product_id, "amount": str(amount), "transaction_type": "purchase"}]
+
+    def _consume_product(self, product_id: int, data: dict):
+        self.dataset.require_product(product_id)
+        amount = float(data.get("amount", 1))
+        self.dataset.consume_stock(product_id, amount)
+        self.dataset.mark_changed()
+        return HTTPStatus.OK, [{"product_id": product_id, "amount": str(-amount), "transaction_type": "consume"}]
+
+    def _add_missing_products(self, data: dict):
+        shopping_list_id = int(data.get("list_id", 1))
+        for product in self.dataset.volatile_stock()["missing_products"]:
+            self.dataset.remove_from_shopping_list(product["id"], shopping_list_id, float("inf"))
+            self.dataset.add_to_shopping_list(product["id"], shopping_list_id, float(product["amount_missing"]))
+        self.dataset.mark_changed()
+        return HTTPStatus.NO_CONTENT, None
+
+    def _add_product_to_shopping_list(self, data: dict):
+        product_id = int(data["product_id"])
+        self.dataset.require_product(product_id)
+        self.dataset.add_to_shopping_list(product_id, int(data.get("list_id", 1)),
+                                          float(data.get("product_amount", 1)))
+        self.dataset.mark_changed()
+        return HTTPStatus.NO_CONTENT, None
+
+    def _remove_product_from_shopping_list(self, data: dict):
+        self.dataset.remove_from_shopping_list(int(data["product_id"]), int(data.get("list_id", 1)),
+                                               float(data.get("product_amount", 1)))
+        self.dataset.mark_changed()
+        return HTTPStatus.NO_CONTENT, None
+
+    def _clear_shopping_list(self, data: dict):
+        shopping_list_id = int(data.get("list_id", 1))
+        self.dataset.shopping_list = list(
+            filter(lambda x: x["shopping_list_id"] != shopping_list_id, self.dataset.shopping_list))
+        self.dataset.mark_changed()
+        return HTTPStatus.NO_CONTENT, None
+
+    def _get_chores(self, data: dict):
+        return HTTPStatus.OK, list(map(self.dataset.chore_status, self.dataset.chores.values()))
+
+    def _get_chore(self, chore_id: int, data: dict):
+        return HTTPStatus.OK, self.dataset.chore_details(chore_id)
+
+    def _execute_chore(self, chore_id: int, data: dict):
+        self.dataset.chores[chore_id]["last_tracked_time"] = datetime.now()
+        self.dataset.mark_changed()
+        return HTTPStatus.OK, None
+
+    def _get_shopping_list(self, data: dict):
+        return HTTPStatus.OK, list(self.dataset.shopping_list)
+
+    def _get_product(self, product_id: int, data: dict):
+        return HTTPStatus.OK, self.dataset.products[product_id]
+
+    def _get_product_groups(self, data: dict):
+        return HTTPStatus.OK, list(map(lambda x: {"id": x, "name": f"Group {x}", "description": None,
+                                                  "row_created_timestamp": None}, range(1, 6)))
+
+    def _get_db_changed_time(self, data: dict):
+        return HTTPStatus.OK, {"changed_time": _format_timestamp(self.dataset.changed_time)}
+
+    def start(self):
+        """
+        Starts serving requests on a background thread
+        """
+        LOGGER.debug(f"Fake Grocy listening on {self.server_address}")
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-grocy", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        """
+        Stops serving requests and releases all resources
+        """
+        if self._thread is not None:
+            super().shutdown()
+            self._thread = None
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Grocy REST api server backed by a generated dataset")
+    parser.add_argument("--listen", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=9283, help="port to listen on")
+    parser.add_argument("--api-key", default=None, help="api key expected in every request")
+    parser.add_argument("--products", type=int, default=100, help="number of products")
+    parser.add_argument("--chores", type=int, default=20, help="number of chores")
+    parser.add_argument("--shopping-list-items", type=int, default=10, help="number of shopping list items")
+    parser.add_argument("--latency", type=float, default=0, help="minimum response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0, help="maximum additional random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests failing with status 500")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the dataset and error injection")
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.DEBUG)
+    dataset = FakeGrocyDataset(args.products, args.chores, args.shopping_list_items, seed=args.seed)
+    server = FakeGrocyServer(dataset, listen=args.listen, port=args.port, api_key=args.api_key,
+                             latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    LOGGER.info(f"Serving fake Grocy api on {server.base_url}:{server.port}/api/")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,349 @@
+import argparse
+import logging
+import math
+import os
+import random
+import threading
+from collections import Counter
+from time import time, sleep
+from typing import Dict, List, Tuple
+
+from container_app_conf.source.env_source import EnvSource
+
+from grocy_telegram_bot.bot import GrocyTelegramBot
+from grocy_telegram_bot.config import Config, get_config
+from grocy_telegram_bot.testing.grocy import FakeGrocyDataset, FakeGrocyServer
+from grocy_telegram_bot.testing.telegram import FakeTelegramServer, inline_keyboard_buttons
+
+LOGGER = logging.getLogger(__name__)
+
+# simulated users all share this username, since only admins are allowed to use most commands
+USERNAME = "loadtest"
+BOT_TOKEN = "123456:LOADTEST"
+GROCY_API_KEY = "loadtest"
+
+# action which presses a random button of the last inline keyboard sent to the chat
+ACTION_PRESS = "press"
+# methods which are considered a reply to a command, edits and callback answers belong to button presses
+COMMAND_REPLY_METHODS = {"sendMessage", "sendPhoto", "sendDocument"}
+
+DEFAULT_MIX = "inventory:4,chores:2,shopping:2,shopping_list:1,help:1,press:3"
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """
+    :param value: comma separated list of action:weight pairs, f.ex. "inventory:2,press:1"
+    :return: action -> weight
+    """
+    mix = {}
+    for item in value.split(","):
+        action, weight = item.strip().split(":", 1)
+        mix[action.strip()] = float(weight)
+    return mix
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    :param values: sorted values
+    :param p: percentile between 0 and 100
+    :return: the value at the given percentile (nearest rank)
+    """
+    if len(values) <= 0:
+        return float("nan")
+    index = max(0, min(len(values) - 1, math.ceil(p / 100 * len(values)) - 1))
+    return values[index]
+
+
+def peak_rss() -> int or None:
+    """
+    :return: peak resident set size of this process in bytes, None if unknown on this platform
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    # kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _SimulatedChat(threading.Thread):
+    """
+    A user issuing a random mix of commands and button presses in a private chat with the bot
+    """
+
+    def __init__(self, chat_id: int, telegram: FakeTelegramServer, mix: Dict[str, float], rate: float,
+                 end: float, timeout: float, seed: int):
+        """
+        :param chat_id: id of the chat and the user
+        :param telegram: the fake Bot API server used by the bot
+        :param mix: action -> weight
+        :param rate: average number of actions per second
+        :param end: time to stop at, as returned by time.time()
+        :param timeout: maximum time to wait for a reply in seconds
+        :param seed: seed of the random generator
+        """
+        super().__init__(name=f"chat-{chat_id}", daemon=True)
+        self.chat_id = chat_id
+        self.latencies: Dict[str, List[float]] = {}
+        self.timeouts = Counter()
+        self._telegram = telegram
+        self._actions = list(mix.keys())
+        self._weights = list(mix.values())
+        self._rate = rate
+        self._end = end
+        self._timeout = timeout
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._replied = threading.Event()
+        # (action, id of the sent message or callback query) of the update waiting for a reply
+        self._pending = None
+        self._reply_time = None
+        self._keyboard_message = None
+
+    def on_bot_call(self, method: str, data: dict, message: dict or None):
+        """
+        Called for every Bot API call concerning this chat
+        """
+        with self._lock:
+            if message is not None and len(inline_keyboard_buttons(message)) > 0:
+                self._keyboard_message = message
+            if self._pending is not None and self._is_reply(method, data, *self._pending):
+                self._reply_time = time()
+                self._pending = None
+                self._replied.set()
+
+    @staticmethod
+    def _is_reply(method: str, data: dict, action: str, update_ref: str) -> bool:
+        """
+        Tells whether a Bot API call replies to the pending update, and not to an earlier one,
+        f.ex. the edit of a shopping list message that follows answering an earlier button press
+        :param method: the Bot API method
+        :param data: the request data
+        :param action: the action of the pending update
+        :param update_ref: the id of the sent message or callback query of the pending update
+        """
+        if action == ACTION_PRESS:
+            return method == "answerCallbackQuery" and str(data.get("callback_query_id", None)) == update_ref
+        if method not in COMMAND_REPLY_METHODS:
+            return False
+        # not all replies to commands are sent as a reply to the command message
+        reply_to = data.get("reply_to_message_id", None)
+        return reply_to is None or str(reply_to) == update_ref
+
+    def run(self):
+        while True:
+            sleep(self._random.expovariate(self._rate))
+            if time() >= self._end:
+                return
+            action = self._random.choices(self._actions, self._weights)[0]
+
+            with self._lock:
+                keyboard_message = self._keyboard_message
+                if action == ACTION_PRESS and keyboard_message is None:
+                    # nothing to press yet, send a command instead
+                    commands = list(filter(lambda x: x[0] != ACTION_PRESS, zip(self._actions, self._weights)))
+                    if len(commands) <= 0:
+                        continue
+                    action = self._random.choices(*zip(*commands))[0]
+                self._replied.clear()
+                start = time()
+                # sent while holding the lock, so the reply can't be reported before the update is pending
+                if action == ACTION_PRESS:
+                    button = self._random.choice(inline_keyboard_buttons(keyboard_message))
+                    update_ref = self._telegram.press_button(self.chat_id, USERNAME, keyboard_message,
+                                                             button["callback_data"])
+                else:
+                    update_ref = self._telegram.send_command(self.chat_id, USERNAME, f"/{action}")
+                self._pending = (action, str(update_ref))
+
+            if self._replied.wait(self._timeout):
+                self.latencies.setdefault(action, []).append(self._reply_time - start)
+            else:
+                with self._lock:
+                    self._pending = None
+                self.timeouts[action] += 1
+
+
+class LoadTestResult:
+    """
+    Measurements of a load test run
+    """
+
+    def __init__(self, chats: int, duration: float, latencies: Dict[str, List[float]], timeouts: Dict[str, int],
+                 grocy_requests: Dict[Tuple[str, str], int], peak_rss: int or None):
+        """
+        :param chats: number of simulated chats
+        :param duration: duration of the run in seconds
+        :param latencies: action -> time from sending an update until the first reply in seconds
+        :param timeouts: action -> number of updates without a reply
+        :param grocy_requests: (method, endpoint) -> number of requests to Grocy
+        :param peak_rss: peak resident set size of the process in bytes
+        """
+        self.chats = chats
+        self.duration = duration
+        self.latencies = {action: sorted(values) for action, values in latencies.items()}
+        self.timeouts = timeouts
+        self.grocy_requests = grocy_requests
+        self.peak_rss = peak_rss
+
+    @property
+    def completed(self) -> int:
+        return sum(map(len, self.latencies.values()))
+
+    @property
+    def throughput(self) -> float:
+        """
+        :return: completed actions per second
+        """
+        return self.completed / self.duration
+
+    @property
+    def grocy_amplification(self) -> float:
+        """
+        :return: Grocy requests per completed action
+        """
+        return sum(self.grocy_requests.values()) / max(1, self.completed)
+
+    def format(self) -> str:
+        lines = [
+            f"chats: {self.chats}, duration: {self.duration:.1f}s, "
+            f"completed: {self.completed}, timeouts: {sum(self.timeouts.values())}",
+            f"throughput: {self.throughput:.2f} actions/s",
+            "",
+            f"{'action':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'timeouts':>10}",
+        ]
+        for action in sorted(set(self.latencies.keys()) | set(self.timeouts.keys())):
+            values = self.latencies.get(action, [])
+            lines.append(f"{action:<16}{len(values):>8}"
+                         f"{percentile(values, 50) * 1000:>10.1f}"
+                         f"{percentile(values, 95) * 1000:>10.1f}"
+                         f"{percentile(values, 99) * 1000:>10.1f}"
+                         f"{self.timeouts.get(action, 0):>10}")
+
+        lines.extend([
+            "",
+            f"grocy requests: {sum(self.grocy_requests.values())} "
+            f"({self.grocy_amplification:.2f} per completed action)",
+        ])
+        for (method, endpoint), count in sorted(self.grocy_requests.items(), key=lambda x: -x[1])[:10]:
+            lines.append(f"  {count:>8}  {method} {endpoint}")
+
+        if self.peak_rss is not None:
+            lines.extend(["", f"peak rss: {self.peak_rss / 1024 / 1024:.1f} MiB (including the fake servers)"])
+        return "\n".join(lines)
+
+
+def _configure(telegram: FakeTelegramServer, grocy: FakeGrocyServer) -> Config:
+    """
+    Points the configuration of the bot to the fake servers
+    """
+    values = {
+        Config.TELEGRAM_BOT_TOKEN: BOT_TOKEN,
+        Config.TELEGRAM_ADMIN_USERNAMES: [USERNAME],
+        Config.TELEGRAM_BASE_URL: telegram.base_url,
+        Config.TELEGRAM_WEBHOOK_ENABLED: False,
+        Config.GROCY_HOST: grocy.base_url,
+        Config.GROCY_PORT: grocy.port,
+        Config.GROCY_API_KEY: GROCY_API_KEY,
+        Config.NOTIFICATION_CHAT_IDS: [],
+        Config.BOT_STATE_FILE: None,
+        Config.BOT_IMAGES_CACHE_FILE: None,
+        Config.TRACING_FILE: None,
+    }
+    # the configuration is validated when it is loaded, so required values have to be present in the environment
+    for entry, value in values.items():
+        if isinstance(value, list):
+            value = ",".join(map(str, value)) if len(value) > 0 else None
+        if value is not None:
+            os.environ[EnvSource.env_key(entry)] = str(value)
+    config = get_config()
+    for entry, value in values.items():
+        entry.value = value
+    return config
+
+
+def run_load_test(chats: int = 10, duration: float = 30, rate: float = 0.5, mix: Dict[str, float] = None,
+                  timeout: float = 10, dataset: FakeGrocyDataset = None, grocy_latency: float = 0,
+                  seed: int = 0) -> LoadTestResult:
+    """
+    Runs the bot against a fake Telegram Bot API and a fake Grocy server, while simulated users chat with it
+    :param chats: number of simulated chats
+    :param duration: duration of the run in seconds
+    :param rate: average number of actions per second and chat
+    :param mix: action -> weight, actions are command names or "press"
+    :param timeout: maximum time to wait for a reply in seconds
+    :param dataset: the Grocy dataset to serve
+    :param grocy_latency: latency of every Grocy request in seconds
+    :param seed: seed of the random generators
+    :return: the measurements
+    """
+    mix = mix or parse_mix(DEFAULT_MIX)
+    dataset = dataset or FakeGrocyDataset(seed=seed)
+    telegram = FakeTelegramServer()
+    grocy = FakeGrocyServer(dataset, api_key=GROCY_API_KEY, latency=grocy_latency, seed=seed)
+    telegram.start()
+    grocy.start()
+    bot = None
+    try:
+        bot = GrocyTelegramBot(_configure(telegram, grocy))
+        bot.start(idle=False)
+
+        start = time()
+        simulated_chats = {
+            chat_id: _SimulatedChat(chat_id, telegram, mix, rate, start + duration, timeout, seed + chat_id)
+            for chat_id in range(1000, 1000 + chats)
+        }
+
+        def on_bot_call(method: str, chat_id: int or None, data: dict, message: dict or None):
+            chat = simulated_chats.get(chat_id, None)
+            if chat is not None:
+                chat.on_bot_call(method, data, message)
+
+        telegram.add_listener(on_bot_call)
+        for chat in simulated_chats.values():
+            chat.start()
+        for chat in simulated_chats.values():
+            chat.join()
+        elapsed = time() - start
+    finally:
+        telegram.close_polling()
+        if bot is not None:
+            bot.stop()
+        telegram.shutdown()
+        grocy.shutdown()
+
+    latencies = {}
+    timeouts = Counter()
+    for chat in simulated_chats.values():
+        for action, values in chat.latencies.items():
+            latencies.setdefault(action, []).extend(values)
+        timeouts.update(chat.timeouts)
+    return LoadTestResult(chats, elapsed, latencies, dict(timeouts), grocy.request_count(), peak_rss())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test the bot using a fake Telegram Bot API and a fake Grocy server")
+    parser.add_argument("--chats", type=int, default=10, help="number of simulated chats")
+    parser.add_argument("--duration", type=float, default=30, help="duration in seconds")
+    parser.add_argument("--rate", type=float, default=0.5, help="average actions per second and chat")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"weighted actions, commands or '{ACTION_PRESS}' (default: {DEFAULT_MIX})")
+    parser.add_argument("--timeout", type=float, default=10, help="maximum time to wait for a reply in seconds")
+    parser.add_argument("--products", type=int, default=1000, help="number of products")
+    parser.add_argument("--chores", type=int, default=50, help="number of chores")
+    parser.add_argument("--shopping-list-items", type=int, default=20, help="number of shopping list items")
+    parser.add_argument("--grocy-latency", type=float, default=0.01, help="latency of Grocy requests in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the dataset and the simulated chats")
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.WARNING)
+    dataset = FakeGrocyDataset(args.products, args.chores, args.shopping_list_items, seed=args.seed)
+    result = run_load_test(chats=args.chats, duration=args.duration, rate=args.rate, mix=parse_mix(args.mix),
+                           timeout=args.timeout, dataset=dataset, grocy_latency=args.grocy_latency,
+                           seed=args.seed)
+    print(result.format())
+
+
+if __name__ == '__main__':
+    main()
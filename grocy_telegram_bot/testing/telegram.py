@@ -0,0 +1,235 @@
+import json
+import logging
+import os
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import time
+from typing import Dict, List, Any, Callable
+
+LOGGER = logging.getLogger(__name__)
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Grocy", "username": "fake_grocy_bot"}
+
+
+def user(user_id: int, username: str) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": username, "username": username}
+
+
+def private_chat(chat_id: int) -> dict:
+    return {"id": chat_id, "type": "private"}
+
+
+class _FakeTelegramRequestHandler(BaseHTTPRequestHandler):
+    server: "FakeTelegramServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        content_length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(content_length) if content_length > 0 else b""
+
+        # /bot<token>/<method>
+        method = self.path.split("?", 1)[0].rsplit("/", 1)[-1]
+        if self.headers.get("Content-Type", "").startswith("application/json") and len(body) > 0:
+            data = json.loads(body.decode())
+        else:
+            # file uploads are multipart encoded, their content is not of interest
+            data = {}
+
+        result = self.server.handle_api_request(method, data)
+        if result is None:
+            self._respond(HTTPStatus.NOT_FOUND, {"ok": False, "error_code": 404, "description": "Not Found"})
+        else:
+            self._respond(HTTPStatus.OK, {"ok": True, "result": result})
+
+    def do_GET(self):
+        self.do_POST()
+
+    def _respond(self, status: HTTPStatus, data: Any):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args):
+        LOGGER.debug(f"{self.address_string()} - {format % args}")
+
+
+class FakeTelegramServer(ThreadingHTTPServer):
+    """
+    HTTP server implementing the parts of the Telegram Bot API used by the bot when polling for updates.
+    Updates are injected using send_command() and press_button(), calls of the bot are reported to a listener.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, listen: str = "127.0.0.1", port: int = 0):
+        """
+        Creates a fake Telegram Bot API server
+        :param listen: address to listen on
+        :param port: port to listen on, 0 to pick a free one
+        """
+        self._condition = threading.Condition()
+        self._updates: List[dict] = []
+        self._next_update_id = 1
+        self._next_message_id = 1
+        # callback query id -> chat id, since answers to callback queries don't contain the chat
+        self._callback_query_chats: Dict[str, int] = {}
+        self._closed = False
+        self._listeners: List[Callable[[str, int or None, dict, dict or None], None]] = []
+        self._thread = None
+        super().__init__((listen, port), _FakeTelegramRequestHandler)
+
+    @property
+    def base_url(self) -> str:
+        """
+        :return: base url to pass to the bot, the token is appended by the bot
+        """
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/bot"
+
+    def add_listener(self, listener: Callable[[str, int or None, dict, dict or None], None]):
+        """
+        Registers a listener which is called for every Bot API call of the bot
+        :param listener: called with the method name, the chat id (if any), the request data
+                         and the sent message (if any)
+        """
+        self._listeners.append(listener)
+
+    def send_command(self, chat_id: int, username: str, text: str) -> int:
+        """
+        Simulates a user sending a message to the bot in a private chat
+        :param chat_id: id of the chat and the user
+        :param username: username of the user
+        :param text: message text, f.ex. "/inventory"
+        :return: id of the sent message
+        """
+        message = self._new_message(chat_id, text)
+        message["from"] = user(chat_id, username)
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split(" ", 1)[0])}]
+        self._add_update({"message": message})
+        return message["message_id"]
+
+    def press_button(self, chat_id: int, username: str, message: dict, callback_data: str) -> str:
+        """
+        Simulates a user pressing an inline keyboard button
+        :param chat_id: id of the chat and the user
+        :param username: username of the user
+        :param message: the message with the inline keyboard, as sent by the bot
+        :param callback_data: callback data of the pressed button
+        :return: id of the callback query
+        """
+        query_id = os.urandom(8).hex()
+        with self._condition:
+            self._callback_query_chats[query_id] = chat_id
+        self._add_update({"callback_query": {
+            "id": query_id,
+            "from": user(chat_id, username),
+            "message": message,
+            "chat_instance": str(chat_id),
+            "data": callback_data,
+        }})
+        return query_id
+
+    def _new_message(self, chat_id: int, text: str or None) -> dict:
+        with self._condition:
+            message_id = self._next_message_id
+            self._next_message_id += 1
+        message = {"message_id": message_id, "date": int(time()), "chat": private_chat(chat_id)}
+        if text is not None:
+            message["text"] = text
+        return message
+
+    def _add_update(self, update: dict):
+        with self._condition:
+            update["update_id"] = self._next_update_id
+            self._next_update_id += 1
+            self._updates.append(update)
+            self._condition.notify_all()
+
+    def close_polling(self):
+        """
+        Answers all pending and future getUpdates calls immediately, to allow the bot to shut down quickly
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def handle_api_request(self, method: str, data: dict) -> Any:
+        """
+        Handles a Bot API call
+        :param method: the name of the Bot API method
+        :param data: the request data
+        :return: the result of the call, None if the method is not supported
+        """
+        if method == "getUpdates":
+            return self._get_updates(int(data.get("offset", 0)), float(data.get("timeout", 0)))
+
+        chat_id = data.get("chat_id", None)
+        chat_id = int(chat_id) if chat_id is not None else None
+        if method == "answerCallbackQuery":
+            with self._condition:
+                chat_id = self._callback_query_chats.pop(str(data.get("callback_query_id", "")), None)
+        if method == "getMe":
+            result = BOT_USER
+        elif method == "getMyCommands":
+            result = []
+        elif method in ["deleteWebhook", "setWebhook", "setMyCommands", "answerCallbackQuery", "answerInlineQuery",
+                        "sendChatAction"]:
+            result = True
+        elif method in ["sendMessage", "sendPhoto", "sendDocument", "editMessageText", "editMessageReplyMarkup"]:
+            result = self._new_message(chat_id or 0, data.get("text", None))
+            if method.startswith("edit") and "message_id" in data:
+                result["message_id"] = int(data["message_id"])
+            result["from"] = BOT_USER
+            reply_markup = data.get("reply_markup", None)
+            if isinstance(reply_markup, str):
+                reply_markup = json.loads(reply_markup)
+            if reply_markup is not None and "inline_keyboard" in reply_markup:
+                result["reply_markup"] = {"inline_keyboard": reply_markup["inline_keyboard"]}
+        else:
+            LOGGER.warning(f"Unsupported Bot API method: {method}")
+            return None
+
+        message = result if isinstance(result, dict) and "message_id" in result else None
+        for listener in list(self._listeners):
+            listener(method, chat_id, data, message)
+        return result
+
+    def _get_updates(self, offset: int, timeout: float) -> List[dict]:
+        end = time() + timeout
+        with self._condition:
+            # confirmed updates are never requested again
+            self._updates = list(filter(lambda x: x["update_id"] >= offset, self._updates))
+            while len(self._updates) <= 0 and not self._closed and time() < end:
+                self._condition.wait(end - time())
+            return list(self._updates)
+
+    def start(self):
+        """
+        Starts serving requests on a background thread
+        """
+        LOGGER.debug(f"Fake Telegram Bot API listening on {self.server_address}")
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-telegram", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        """
+        Stops serving requests and releases all resources
+        """
+        self.close_polling()
+        if self._thread is not None:
+            super().shutdown()
+            self._thread = None
+        self.server_close()
+
+
+def inline_keyboard_buttons(message: dict) -> List[Dict[str, str]]:
+    """
+    :param message: a message sent by the bot
+    :return: all inline keyboard buttons of the message which send callback data
+    """
+    keyboard = message.get("reply_markup", {}).get("inline_keyboard", [])
+    return [button for row in keyboard for button in row if "callback_data" in button]
@@ -0,0 +1,254 @@
+import functools
+import json
+import logging
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from time import time
+from typing import List, Dict, Any, Deque
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Span:
+    """
+    A timed operation within a trace
+    """
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "duration", "attributes")
+
+    def __init__(self, trace_id: str, span_id: int, parent_id: int or None, name: str, start: float,
+                 attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.start = start
+        self.duration = None
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        """
+        Adds attributes to this span
+        :param attributes: the attributes to add
+        """
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """
+    Returned when there is no active trace, so callers never have to check
+    """
+
+    def set(self, **attributes):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class RingBufferExporter:
+    """
+    Keeps the most recent traces in memory
+    """
+
+    def __init__(self, capacity: int):
+        """
+        :param capacity: maximum number of traces to keep
+        """
+        self._lock = threading.Lock()
+        self._traces: Deque[List[Span]] = deque(maxlen=capacity)
+
+    def export(self, spans: List[Span]):
+        with self._lock:
+            self._traces.append(spans)
+
+    def traces(self) -> List[List[Span]]:
+        """
+        :return: all buffered traces, from oldest to newest, the root span of a trace is its first span
+        """
+        with self._lock:
+            return list(self._traces)
+
+
+class JsonLinesExporter:
+    """
+    Appends every span as a single line of json to a file
+    """
+
+    def __init__(self, file_path: Path):
+        """
+        :param file_path: the file to append to
+        """
+        self._file_path = file_path
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        lines = "".join(map(lambda x: json.dumps(x.to_dict(), separators=(',', ':'), default=str) + os.linesep,
+                            spans))
+        with self._lock:
+            with open(self._file_path, "a") as file:
+                file.write(lines)
+
+
+# exporters of finished traces, tracing is disabled as long as there are none
+_exporters: list = []
+# the trace of the current thread
+_state = threading.local()
+
+
+def add_exporter(exporter):
+    """
+    Registers an exporter for finished traces
+    :param exporter: object with an export(spans) method
+    """
+    _exporters.append(exporter)
+
+
+def remove_exporter(exporter):
+    """
+    Removes a previously registered exporter
+    :param exporter: the exporter to remove
+    """
+    if exporter in _exporters:
+        _exporters.remove(exporter)
+
+
+def _new_span(name: str, start: float, attributes: Dict[str, Any]) -> Span:
+    parent = _state.span
+    spans = _state.spans
+    span = Span(parent.trace_id, len(spans), parent.span_id, name, start, attributes)
+    spans.append(span)
+    return span
+
+
+@contextmanager
+def trace(name: str, start: float = None, **attributes):
+    """
+    Context manager to trace everything that happens in the current thread within the block.
+    The trace is exported once the block is left.
+    :param name: name of the root span
+    :param start: start time of the root span, as returned by time.time(), defaults to now
+    :param attributes: attributes of the root span
+    """
+    if len(_exporters) <= 0 or getattr(_state, "span", None) is not None:
+        # tracing is disabled, or this is already part of a trace
+        with span(name, **attributes) as s:
+            yield s
+        return
+
+    start = time() if start is None else start
+    root = Span(os.urandom(8).hex(), 0, None, name, start, attributes)
+    _state.spans = [root]
+    _state.span = root
+    try:
+        yield root
+    finally:
+        root.duration = time() - root.start
+        spans = _state.spans
+        _state.span = None
+        _state.spans = None
+        for exporter in list(_exporters):
+            try:
+                exporter.export(spans)
+            except Exception as ex:
+                LOGGER.warning(f"Error exporting trace: {ex}")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Context manager to record the block as a span of the current trace, does nothing if there is none
+    :param name: name of the span
+    :param attributes: attributes of the span
+    """
+    if getattr(_state, "span", None) is None:
+        yield NOOP_SPAN
+        return
+
+    parent = _state.span
+    s = _new_span(name, time(), attributes)
+    _state.span = s
+    try:
+        yield s
+    finally:
+        s.duration = time() - s.start
+        _state.span = parent
+
+
+def record_span(name: str, start: float, end: float, **attributes):
+    """
+    Adds an already finished operation as a span to the current trace, does nothing if there is none
+    :param name: name of the span
+    :param start: start time, as returned by time.time()
+    :param end: end time, as returned by time.time()
+    :param attributes: attributes of the span
+    """
+    if getattr(_state, "span", None) is None:
+        return
+    s = _new_span(name, start, attributes)
+    s.duration = end - start
+
+
+def traced(name: str):
+    """
+    Decorator to record every call of a function as a span
+    :param name: name of the span
+    """
+
+    def decorator(func: callable):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_telegram_click():
+    """
+    Records the argument parsing of telegram_click commands as spans
+    """
+    import telegram_click.decorator
+    parse = telegram_click.decorator.parse_telegram_command
+    if getattr(parse, "__wrapped__", None) is not None:
+        return
+    telegram_click.decorator.parse_telegram_command = traced("command.parse")(parse)
+
+
+def format_trace(spans: List[Span]) -> str:
+    """
+    Formats a trace as an indented tree of its spans
+    :param spans: the spans of the trace, the first one is the root span
+    :return: text representation
+    """
+    root = spans[0]
+    children = {}
+    for s in spans[1:]:
+        children.setdefault(s.parent_id, []).append(s)
+
+    lines = [f"trace {root.trace_id}"]
+
+    def add_lines(s: Span, depth: int):
+        attributes = " ".join(map(lambda x: f"{x[0]}={x[1]}", s.attributes.items()))
+        offset = (s.start - root.start) * 1000
+        lines.append(f"{'  ' * depth}{s.name} +{offset:.1f}ms {s.duration * 1000:.1f}ms {attributes}".rstrip())
+        for child in sorted(children.get(s.span_id, []), key=lambda x: x.start):
+            add_lines(child, depth + 1)
+
+    add_lines(root, 0)
+    return "\n".join(lines)
@@ -3,6 +3,7 @@ import hashlib
 import logging
 import operator
 import os
+import re
 from datetime import datetime, timezone, timedelta
 from functools import wraps
 from io import BytesIO
@@ -12,13 +13,12 @@ from typing import List, Any, Tuple
 from pygrocy.grocy import Chore, Product, ShoppingListProduct
 from telegram import Bot, Message, ReplyMarkup
 
-from grocy_telegram_bot.config import Config
 from grocy_telegram_bot.const import TELEGRAM_CAPTION_LENGTH_LIMIT, NEVER_EXPIRES_DATE
+from grocy_telegram_bot.render import format_date, render_product, render_chore, render_shopping_list_item
+from grocy_telegram_bot.tracing import span
 
 LOGGER = logging.getLogger(__name__)
 
-CONFIG = Config()
-
 
 def timing(f):
     @wraps(f)
@@ -74,7 +74,7 @@ def cryptographic_hash(data: bytes or str) -> str:
 
 
 def send_photo(bot: Bot, chat_id: str, file_id: int or None = None, image_data: bytes or None = None,
-               caption: str = None) -> [str]:
+               caption: str = None, reply_to: int = None, menu: ReplyMarkup = None) -> [str]:
     """
     Sends a photo to the given chat
     :param bot: the bot
@@ -82,7 +82,9 @@ def send_photo(bot: Bot, chat_id: str, file_id: int or None = None, image_data:
     :param file_id: the telegram file product_id of the already uploaded image
     :param image_data: the image data
     :param caption: an optional image caption
-    :return: a set of telegram image file_id's
+    :param reply_to: the message id to reply to
+    :param menu: inline keyboard menu markup
+    :return: the telegram file_id's of all sizes of the image, ordered from smallest to largest
     """
     if image_data is not None:
         image_bytes_io = BytesIO(image_data)
@@ -96,8 +98,10 @@ def send_photo(bot: Bot, chat_id: str, file_id: int or None = None, image_data:
     if caption is not None:
         caption = _format_caption(caption)
 
-    message = bot.send_photo(chat_id=chat_id, photo=photo, caption=caption)
-    return set(map(lambda x: x.file_id, message.photo))
+    message = bot.send_photo(chat_id=chat_id, photo=photo, caption=caption, reply_to_message_id=reply_to,
+                             reply_markup=menu)
+    sizes = sorted(message.photo, key=lambda x: x.width * x.height)
+    return list(map(lambda x: x.file_id, sizes))
 
 
 def format_for_single_line_log(text: str) -> str:
@@ -124,13 +128,11 @@ def _format_caption(text: str) -> str or None:
 
 
 def datetime_fmt_date_only(d: datetime):
-    from babel.dates import format_date
-    time = d.astimezone()
-    return format_date(time.date(), locale=CONFIG.LOCALE.value)
+    return format_date(d.astimezone().date())
 
 
 def send_message(bot: Bot, chat_id: str, message: str, parse_mode: str = None, reply_to: int = None,
-                 menu: ReplyMarkup = None) -> Message:
+                 menu: ReplyMarkup = None, expand_emoji: bool = True) -> Message:
     """
     Sends a text message to the given chat
     :param bot: the bot
@@ -139,24 +141,17 @@ def send_message(bot: Bot, chat_id: str, message: str, parse_mode: str = None, r
     :param parse_mode: specify whether to parse the text as markdown or HTML
     :param reply_to: the message product_id to reply to
     :param menu: inline keyboard menu markup
+    :param expand_emoji: whether to expand emoji aliases, texts rendered from templates already contain expanded emojis
     """
-    from emoji import emojize
-
-    emojized_text = emojize(message, use_aliases=True)
-    return bot.send_message(chat_id=chat_id, parse_mode=parse_mode, text=emojized_text, reply_to_message_id=reply_to,
+    if expand_emoji:
+        from emoji import emojize
+        message = emojize(message, use_aliases=True)
+    return bot.send_message(chat_id=chat_id, parse_mode=parse_mode, text=message, reply_to_message_id=reply_to,
                             reply_markup=menu)
 
 
 def product_to_str(item: Product) -> str:
-    from pygrocy.utils import parse_int
-    amount = parse_int(item.available_amount, 0)
-
-    text = f"{amount}x\t{item.name}"
-    if item.best_before_date is not None and item.best_before_date.date() < NEVER_EXPIRES_DATE:
-        expire_date = datetime_fmt_date_only(item.best_before_date)
-        text += f" (Exp: {expire_date})"
-
-    return text
+    return render_product(item)
 
 
 def chore_to_str(chore: Chore) -> str:
@@ -165,19 +160,7 @@ def chore_to_str(chore: Chore) -> str:
     :param chore: the chore item
     :return: a text representation
     """
-    today_utc_date_with_zero_time = datetime.today().astimezone(tz=timezone.utc)
-
-    days_off = None
-    date_str = None
-    if chore.next_estimated_execution_time is not None:
-        days_off = abs((chore.next_estimated_execution_time - today_utc_date_with_zero_time).days)
-        date_str = datetime_fmt_date_only(chore.next_estimated_execution_time)
-
-    lines = [chore.name]
-    if days_off is not None:
-        lines.append(f"  Due: {days_off} days ({date_str})")
-
-    return "\n".join(lines)
+    return render_chore(chore)
 
 
 def shopping_list_item_to_str(item: ShoppingListProduct) -> str:
@@ -186,10 +169,7 @@ def shopping_list_item_to_str(item: ShoppingListProduct) -> str:
     :param item: the shopping list item
     :return: a text representation
     """
-    from pygrocy.utils import parse_int
-    amount = parse_int(item.amount, item.amount)
-
-    return f"{amount}x {item.product.name}"
+    return render_shopping_list_item(item)
 
 
 def filter_overdue_chores(chores: List[Chore]) -> List[Chore]:
@@ -239,6 +219,63 @@ def filter_new_by_key(a: List, b: List, key: callable) -> List:
     return result
 
 
+def unique_by_key(items: List, key: callable) -> List:
+    """
+    Removes duplicate items, keeping the first occurrence of every key
+    :param items: the items
+    :param key: function to map list items to a unique identifier
+    :return: list of unique items, in the order of their first occurrence
+    """
+    seen = set()
+    result = []
+    for item in items:
+        item_key = key(item)
+        if item_key in seen:
+            continue
+        seen.add(item_key)
+        result.append(item)
+    return result
+
+
+def parse_batch_items(text: str) -> List[Tuple[int, str]]:
+    """
+    Parses a list of items with one item per line, each with an optional amount,
+    f.ex. "2 milk\neggs\n3x bread". Product names may contain commas.
+    :param text: the text to parse
+    :return: list of (amount, name) tuples
+    """
+    result = []
+    for item in text.splitlines():
+        item = item.strip()
+        if len(item) <= 0:
+            continue
+        match = re.fullmatch(r"(\d+)\s*x?\s+(.+)", item)
+        if match is None:
+            result.append((1, item))
+        else:
+            result.append((int(match.group(1)), match.group(2).strip()))
+    return result
+
+
+def parse_expiration_date(exp: str) -> datetime:
+    """
+    Parses an expiration date, or a duration from now
+    :param exp: "never", a date f.ex. "20.01.2020", or a duration f.ex. "2w"
+    :return: the expiration date
+    """
+    if exp.casefold() == "never".casefold():
+        return NEVER_EXPIRES_DATE
+    try:
+        from dateutil import parser
+        return parser.parse(exp)
+    except:
+        from pytimeparse import parse
+        parsed = parse(exp)
+        if parsed is None:
+            raise ValueError("Cannot parse the given time format: {}".format(exp))
+        return datetime.now() + timedelta(seconds=parsed)
+
+
 def fuzzy_match(term: str, choices: List[Any], limit: int = None, key=lambda x: x, ignorecase: bool = True) -> List[
     Tuple[Any, int]]:
     """
@@ -257,7 +294,8 @@ def fuzzy_match(term: str, choices: List[Any], limit: int = None, key=lambda x:
 
     from fuzzywuzzy import process
     from fuzzywuzzy import fuzz
-    matches = process.extract(term, key_map.keys(), limit=limit, scorer=fuzz.UWRatio)
+    with span("fuzzy_match", choices=len(key_map)):
+        matches = process.extract(term, key_map.keys(), limit=limit, scorer=fuzz.UWRatio)
 
     # map results back to original choices
     result = list(map(lambda x: (key_map[x[0]], x[1]), matches))
@@ -0,0 +1,126 @@
+import logging
+import threading
+from datetime import timedelta
+from time import monotonic
+from typing import Dict, List, Tuple, Any
+
+from grocy_telegram_bot.stats import WRITE_QUEUE_PENDING_COUNT, WRITE_QUEUE_FAILURE_COUNT
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _PendingWrite:
+
+    def __init__(self, write: callable, due: float):
+        self.write = write
+        self.due = due
+        self.amount = 0
+        # (amount, callback) for every enqueued change, used to undo optimistic updates
+        self.failure_callbacks: List[Tuple[int, callable]] = []
+
+
+class GrocyWriteQueue:
+    """
+    Delays Grocy write operations and coalesces multiple writes to the same item,
+    f.ex. five check offs of the same shopping list item become a single write with amount=5.
+    This allows the UI to be updated optimistically, before the write is actually executed.
+    """
+
+    def __init__(self, delay: timedelta):
+        """
+        Creates a write queue
+        :param delay: time to wait for further changes of an item before its write is executed
+        """
+        self._delay = delay.total_seconds()
+        self._condition = threading.Condition()
+        self._pending: Dict[Any, _PendingWrite] = {}
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """
+        Starts executing queued writes
+        """
+        with self._condition:
+            if self._running:
+                LOGGER.debug("Already running, ignoring start() call")
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._worker, name="grocy-write-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Executes all pending writes immediately and stops the queue
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def enqueue(self, key: Any, amount: int, write: callable, on_failure: callable = None):
+        """
+        Queues a write operation
+        :param key: identifier of the item that is written, writes with the same key are coalesced
+        :param amount: the amount to write
+        :param write: function executing the write, called with the summed up amount of all coalesced writes
+        :param on_failure: function called with the amount of this write and the exception, if the write fails
+        """
+        with self._condition:
+            pending = self._pending.get(key, None)
+            if pending is None:
+                pending = _PendingWrite(write, monotonic() + self._delay)
+                self._pending[key] = pending
+            pending.amount += amount
+            if on_failure is not None:
+                pending.failure_callbacks.append((amount, on_failure))
+            WRITE_QUEUE_PENDING_COUNT.set(len(self._pending))
+            self._condition.notify_all()
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                due = self._take_due_writes()
+                while len(due) <= 0 and self._running:
+                    timeout = None
+                    if len(self._pending) > 0:
+                        timeout = min(map(lambda x: x.due, self._pending.values())) - monotonic()
+                    self._condition.wait(timeout)
+                    due = self._take_due_writes()
+                stopped = not self._running
+
+            for key, pending in due:
+                self._execute(key, pending)
+
+            if stopped:
+                with self._condition:
+                    if len(self._pending) <= 0:
+                        return
+
+    def _take_due_writes(self) -> List[Tuple[Any, _PendingWrite]]:
+        """
+        Removes all writes that are due (or all of them, if the queue is stopped) from the pending writes
+        :return: list of (key, pending write) tuples
+        """
+        now = monotonic()
+        due = list(filter(lambda x: not self._running or x[1].due <= now, self._pending.items()))
+        for key, _ in due:
+            self._pending.pop(key)
+        WRITE_QUEUE_PENDING_COUNT.set(len(self._pending))
+        return due
+
+    @staticmethod
+    def _execute(key: Any, pending: _PendingWrite):
+        try:
+            LOGGER.debug(f"Executing write {key} with amount {pending.amount}")
+            pending.write(pending.amount)
+        except Exception as ex:
+            LOGGER.exception(f"Error executing write {key}")
+            WRITE_QUEUE_FAILURE_COUNT.inc()
+            for amount, callback in pending.failure_callbacks:
+                try:
+                    callback(amount, ex)
+                except Exception:
+                    LOGGER.exception(f"Error undoing write {key}")
@@ -1,5 +1,80 @@
+import json
+import os
+import timeit
 import unittest
 
+# file to save benchmark results to
+BENCHMARK_SAVE_ENV = "BENCHMARK_SAVE"
+# file with baseline results to compare benchmark results against
+BENCHMARK_COMPARE_ENV = "BENCHMARK_COMPARE"
+# relative slowdown compared to the baseline which is considered a regression
+BENCHMARK_THRESHOLD_ENV = "BENCHMARK_THRESHOLD"
+DEFAULT_BENCHMARK_THRESHOLD = 0.25
+
 
 class TestBase(unittest.TestCase):
     pass
+
+
+def _load_benchmark_results(file_path: str) -> dict:
+    if not os.path.exists(file_path):
+        return {}
+    with open(file_path) as file:
+        return json.load(file)
+
+
+class BenchmarkBase(TestBase):
+    """
+    Base class for benchmarks.
+    Benchmark files (*_benchmark.py) are not collected by default, run them explicitly f.ex. using:
+    pytest -s callback_data_codec_benchmark.py
+
+    Results can be saved as a baseline, to compare later runs against it:
+    BENCHMARK_SAVE=baseline.json pytest -s util_benchmark.py
+    BENCHMARK_COMPARE=baseline.json pytest -s util_benchmark.py
+    In compare mode a benchmark fails if it got slower than its baseline by more than BENCHMARK_THRESHOLD
+    (default: 0.25, so 25%).
+    """
+
+    def benchmark(self, name: str, func: callable, number: int = 1000) -> float:
+        """
+        Measures the execution time of a function
+        :param name: name of the benchmark
+        :param func: the function to measure
+        :param number: number of executions per measurement
+        :return: best time per execution in seconds
+        """
+        seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+        key = f"{self.__class__.__name__}.{name}"
+
+        message = f"{name}: {seconds * 1e6:.2f} µs"
+        compare_file = os.environ.get(BENCHMARK_COMPARE_ENV, None)
+        if compare_file is not None:
+            baseline = _load_benchmark_results(compare_file).get(key, None)
+            if baseline is not None:
+                change = seconds / baseline - 1
+                message += f" ({change:+.1%})"
+                threshold = float(os.environ.get(BENCHMARK_THRESHOLD_ENV, DEFAULT_BENCHMARK_THRESHOLD))
+                if change > threshold:
+                    message += " REGRESSION"
+                    self._add_regression(f"{key}: {baseline * 1e6:.2f} µs -> {seconds * 1e6:.2f} µs")
+        print(message)
+
+        save_file = os.environ.get(BENCHMARK_SAVE_ENV, None)
+        if save_file is not None:
+            results = _load_benchmark_results(save_file)
+            results[key] = seconds
+            with open(save_file, "w") as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+
+        return seconds
+
+    def _add_regression(self, regression: str):
+        """
+        Remembers a regression, the test fails once all of its benchmarks have run
+        """
+        regressions = getattr(self, "_regressions", None)
+        if regressions is None:
+            regressions = self._regressions = []
+            self.addCleanup(lambda: self.fail("Regressions:\n" + "\n".join(regressions)))
+        regressions.append(regression)
@@ -0,0 +1,151 @@
+import gzip
+import json
+from http.client import HTTPConnection
+
+from grocy_telegram_bot.api import ApiServer, SnapshotStore, create_snapshot_loaders, LIST_INVENTORY, \
+    LIST_EXPIRING, LIST_OVERDUE_CHORES, LIST_SHOPPING_LIST
+from grocy_telegram_bot.cache import GrocyCached, get_cache
+from grocy_telegram_bot.testing.grocy import FakeGrocyDataset, FakeGrocyServer
+from tests import TestBase
+
+
+class SnapshotStoreTest(TestBase):
+
+    def setUp(self):
+        self.calls = 0
+        self.items = [{"id": 1}]
+        self.error = None
+
+        def load():
+            self.calls += 1
+            if self.error is not None:
+                raise self.error
+            return list(self.items)
+
+        self.store = SnapshotStore({"items": load}, max_age=60)
+
+    def test_refresh(self):
+        snapshot = self.store.get("items")
+        self.assertIs(self.store.get("items"), snapshot)
+        self.assertEqual(self.calls, 1)
+
+        # unchanged items keep the snapshot and its version
+        self.store.invalidate()
+        self.assertIs(self.store.get("items"), snapshot)
+        self.assertEqual(self.calls, 2)
+
+        self.items.append({"id": 2})
+        self.store.invalidate()
+        refreshed = self.store.get("items")
+        self.assertNotEqual(refreshed.version, snapshot.version)
+        self.assertEqual(refreshed.items, [{"id": 1}, {"id": 2}])
+
+    def test_error(self):
+        self.error = ValueError("unavailable")
+        self.assertRaises(ValueError, self.store.get, "items")
+
+        self.error = None
+        snapshot = self.store.get("items")
+        self.error = ValueError("unavailable")
+        self.store.invalidate()
+        self.assertIs(self.store.get("items"), snapshot)
+
+
+class ApiServerTest(TestBase):
+
+    def setUp(self):
+        self.items = [{"id": i, "name": f"Product {i}"} for i in range(250)]
+        self.store = SnapshotStore({LIST_INVENTORY: lambda: self.items}, max_age=60)
+        self.server = ApiServer(listen="127.0.0.1", port=0, snapshots=self.store)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def test_pagination(self):
+        status, headers, body = self._get("/api/inventory")
+        self.assertEqual(status, 200)
+        data = json.loads(body)
+        self.assertEqual(data["total"], 250)
+        self.assertEqual(data["items"], self.items[:100])
+
+        status, headers, body = self._get("/api/inventory?offset=200&limit=100")
+        self.assertEqual(json.loads(body)["items"], self.items[200:])
+
+        self.assertEqual(self._get("/api/inventory?limit=0")[0], 400)
+        self.assertEqual(self._get("/api/inventory?offset=abc")[0], 400)
+        self.assertEqual(self._get("/api/unknown")[0], 404)
+
+    def test_etag(self):
+        status, headers, body = self._get("/api/inventory")
+        etag = headers["ETag"]
+
+        status, headers, body = self._get("/api/inventory", {"If-None-Match": etag})
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+
+        # other pages have their own etag
+        self.assertEqual(self._get("/api/inventory?offset=100", {"If-None-Match": etag})[0], 200)
+
+        self.items = self.items[1:]
+        self.store.invalidate()
+        status, headers, body = self._get("/api/inventory", {"If-None-Match": etag})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers["ETag"], etag)
+
+    def test_gzip(self):
+        status, headers, body = self._get("/api/inventory", {"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(body))["total"], 250)
+
+        status, headers, body = self._get("/api/inventory", {"Accept-Encoding": "gzip;q=0"})
+        self.assertNotIn("Content-Encoding", headers)
+        self.assertEqual(json.loads(body)["total"], 250)
+
+    def test_unavailable(self):
+        def load():
+            raise ConnectionError()
+
+        self.server.snapshots = SnapshotStore({LIST_INVENTORY: load}, max_age=60)
+        self.assertEqual(self._get("/api/inventory")[0], 503)
+
+    def _get(self, path: str, headers: dict = None) -> (int, dict, bytes):
+        connection = HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+        try:
+            connection.request("GET", path, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            connection.close()
+
+
+class SnapshotLoadersTest(TestBase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.server = FakeGrocyServer(FakeGrocyDataset(products=50, chores=10, shopping_list_items=5), api_key="key")
+        self.server.start()
+        self.grocy = GrocyCached(base_url=self.server.base_url, api_key="key", port=self.server.port)
+
+    def tearDown(self):
+        self.server.shutdown()
+        get_cache().clear()
+
+    def test_loaders(self):
+        loaders = create_snapshot_loaders(self.grocy)
+
+        inventory = loaders[LIST_INVENTORY]()
+        self.assertTrue(len(inventory) > 0)
+        self.assertEqual(len(inventory), len(set(map(lambda x: x["id"], inventory))))
+        names = list(map(lambda x: x["name"].lower(), inventory))
+        self.assertEqual(names, sorted(names))
+
+        for item in loaders[LIST_EXPIRING]():
+            self.assertIsNotNone(item["best_before_date"])
+
+        for chore in loaders[LIST_OVERDUE_CHORES]():
+            self.assertIsNotNone(chore["next_estimated_execution_time"])
+
+        self.assertEqual(len(loaders[LIST_SHOPPING_LIST]()), 5)
+        # all lists can be serialized
+        json.dumps([loader() for loader in loaders.values()])
@@ -0,0 +1,26 @@
+from unittest.mock import MagicMock
+
+from grocy_telegram_bot.search import BarcodeIndex
+from tests import TestBase
+
+
+class BarcodeIndexTest(TestBase):
+
+    def test_lookup(self):
+        milk = MagicMock(barcodes=["4006381333931", " 012345678905"])
+        bread = MagicMock(barcodes=None)
+        index = BarcodeIndex()
+        index.update([milk, bread])
+
+        self.assertIs(index.lookup("4006381333931"), milk)
+        # EAN-13 representation of the UPC-A code
+        self.assertIs(index.lookup("0012345678905"), milk)
+        self.assertIsNone(index.lookup("123"))
+
+    def test_update(self):
+        index = BarcodeIndex()
+        index.update([MagicMock(barcodes=["1"])])
+        index.update([MagicMock(barcodes=["2"])])
+
+        self.assertIsNone(index.lookup("1"))
+        self.assertIsNotNone(index.lookup("2"))
@@ -0,0 +1,179 @@
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from telegram import Message, Chat, Update
+
+# the bot package has to be imported before any command module, to resolve their circular import
+import grocy_telegram_bot.bot  # noqa: F401
+from grocy_telegram_bot.cache import get_cache, deferred_cache_invalidation, invalidate_cache
+from grocy_telegram_bot.commands.batch import BatchCommandHandler, SKIP_PRODUCT_ID, BATCH_SELECTION_MAX_ITEMS
+from grocy_telegram_bot.const import NEVER_EXPIRES_DATE
+from grocy_telegram_bot.search import FuzzySearchIndex
+from grocy_telegram_bot.telegram_util import BatchItemSelectionCallbackData
+from grocy_telegram_bot.util import parse_batch_items
+from tests import TestBase
+
+
+class BatchItemsTest(TestBase):
+
+    def test_parse_batch_items(self):
+        items = parse_batch_items("2 milk\neggs\n3x bread, sliced\n 10 x toast \n\n")
+
+        self.assertEqual(items, [(2, "milk"), (1, "eggs"), (3, "bread, sliced"), (10, "toast")])
+
+    def test_deferred_cache_invalidation(self):
+        cache = get_cache()
+        cache["key"] = "value"
+
+        with deferred_cache_invalidation():
+            invalidate_cache()
+            invalidate_cache()
+            self.assertIn("key", cache)
+
+        self.assertNotIn("key", cache)
+
+    def test_deferred_cache_invalidation_scope(self):
+        cache = get_cache()
+        cache["key"] = "value"
+
+        with deferred_cache_invalidation() as deferral:
+            # write calls of the batch executed by another thread are deferred
+            thread = threading.Thread(target=deferral.wrap(invalidate_cache))
+            thread.start()
+            thread.join()
+            self.assertIn("key", cache)
+
+            # write calls of other chats are not
+            thread = threading.Thread(target=invalidate_cache)
+            thread.start()
+            thread.join()
+            self.assertNotIn("key", cache)
+            cache["key"] = "value"
+
+        self.assertNotIn("key", cache)
+
+
+@patch("grocy_telegram_bot.commands.batch.CONFIG_ADMINS")
+class BatchCommandTest(TestBase):
+
+    def setUp(self):
+        self.products = [
+            SimpleNamespace(id=1, name="Milk"),
+            SimpleNamespace(id=2, name="Bread white"),
+            SimpleNamespace(id=3, name="Bread brown"),
+        ]
+        index = FuzzySearchIndex(key=lambda x: x.name)
+        index.update(self.products)
+        self.grocy = MagicMock()
+        self.grocy.get_product_index.return_value = index
+        self.grocy.get_all_products.return_value = self.products
+        self.inline_keyboard_handler = MagicMock()
+        self.handler = BatchCommandHandler(MagicMock(), self.grocy, MagicMock(), self.inline_keyboard_handler,
+                                           MagicMock())
+
+    def test_filter(self, _):
+        batch_filter = self.handler.command_handlers()[0].filters
+
+        self.assertFalse(batch_filter(self._message("/ia Bread, sliced 2")))
+        self.assertFalse(batch_filter(self._message("/ia milk\n")))
+        self.assertTrue(batch_filter(self._message("/ia\n2 milk\nBread, sliced")))
+
+    def test_resolve_and_select(self, _):
+        with patch("grocy_telegram_bot.commands.batch.send_message") as send_message:
+            self.handler._shopping_list_add_callback(self._update("/sla id=2\n2 milk\n3 bread"), MagicMock())
+
+        # the unique perfect match is resolved, the other item is asked for
+        self.grocy.add_product_to_shopping_list.assert_not_called()
+        self.assertIn("3x bread", send_message.call_args[0][2])
+        keyboard = send_message.call_args[1]["menu"].inline_keyboard
+        buttons = list(map(lambda x: (x[0].text, BatchItemSelectionCallbackData.decode(x[0].callback_data)), keyboard))
+        self.assertEqual(sorted(map(lambda x: x[1].product_id, buttons)), [SKIP_PRODUCT_ID, 2, 3])
+        self.assertTrue(all(map(lambda x: x[1].item_index == 1, buttons)))
+        self.assertEqual(buttons[-1][0], "bread: ✖ skip")
+
+        data = self.inline_keyboard_handler.register_listener.call_args[1]["callback_data"]
+        self.assertEqual(data["resolved"], [[1, 2]])
+
+        update = MagicMock()
+        context = MagicMock()
+        callback_data = BatchItemSelectionCallbackData(1, 3).encode()
+        self.handler._item_selection_callback(update, context, callback_data, data)
+
+        calls = sorted(map(lambda x: x[0], self.grocy.add_product_to_shopping_list.call_args_list))
+        self.assertEqual(calls, [(1, 2, 2), (3, 2, 3)])
+        self.assertIn("Added 3x Bread brown", context.bot.edit_message_text.call_args[0][0])
+
+        # a second click on the same item does nothing
+        self.handler._item_selection_callback(update, context, callback_data, data)
+        self.assertEqual(self.grocy.add_product_to_shopping_list.call_count, 2)
+
+    def test_markdown_is_escaped(self, _):
+        self.products.append(SimpleNamespace(id=4, name="Milk_2 *fresh*"))
+
+        with patch("grocy_telegram_bot.commands.batch.send_message") as send_message:
+            self.handler._shopping_list_add_callback(self._update("/sla\nbread_x"), MagicMock())
+        self.assertIn("1x bread\\_x", send_message.call_args[0][2])
+
+        # product names of the result are escaped as well
+        data = self.inline_keyboard_handler.register_listener.call_args[1]["callback_data"]
+        context = MagicMock()
+        self.handler._item_selection_callback(
+            MagicMock(), context, BatchItemSelectionCallbackData(0, 4).encode(), data)
+        self.assertEqual(context.bot.edit_message_text.call_args[0][0], "Added 1x Milk\\_2 \\*fresh\\*")
+
+    def test_selection_rounds(self, _):
+        text = "\n".join(["/sla", *map(lambda x: f"bread {x}", range(30))])
+        with patch("grocy_telegram_bot.commands.batch.send_message") as send_message:
+            self.handler._shopping_list_add_callback(self._update(text), MagicMock())
+
+        # telegram limits the number of buttons of an inline keyboard to 100
+        keyboard = send_message.call_args[1]["menu"].inline_keyboard
+        item_indices = set(map(lambda x: BatchItemSelectionCallbackData.decode(x[0].callback_data).item_index,
+                               keyboard))
+        self.assertEqual(item_indices, set(range(BATCH_SELECTION_MAX_ITEMS)))
+        self.assertLessEqual(len(keyboard), 100)
+        self.assertIn("...and 20 more afterwards", send_message.call_args[0][2])
+
+        # the next item is shown once one has been selected
+        data = self.inline_keyboard_handler.register_listener.call_args[1]["callback_data"]
+        context = MagicMock()
+        self.handler._item_selection_callback(
+            MagicMock(), context, BatchItemSelectionCallbackData(0, SKIP_PRODUCT_ID).encode(), data)
+        keyboard = context.bot.edit_message_text.call_args[1]["reply_markup"].inline_keyboard
+        item_indices = set(map(lambda x: BatchItemSelectionCallbackData.decode(x[0].callback_data).item_index,
+                               keyboard))
+        self.assertEqual(item_indices, set(range(1, BATCH_SELECTION_MAX_ITEMS + 1)))
+
+    def test_options(self, _):
+        with patch("grocy_telegram_bot.commands.batch.send_message"):
+            self.handler._inventory_add_callback(self._update("/ia exp=2030-01-02 price=2.5\nmilk"), MagicMock())
+
+        self.grocy.add_product.assert_called_once_with(
+            product_id=1, amount=1, price=2.5, best_before_date=datetime(2030, 1, 2))
+
+        self.grocy.add_product.reset_mock()
+        with patch("grocy_telegram_bot.commands.batch.send_message"):
+            self.handler._inventory_add_callback(self._update("/ia\nmilk"), MagicMock())
+        self.grocy.add_product.assert_called_once_with(
+            product_id=1, amount=1, price=None, best_before_date=NEVER_EXPIRES_DATE)
+
+    def test_reject_ambiguous_syntax(self, _):
+        for callback, text in [(self.handler._inventory_add_callback, "/ia milk 2\nbread"),
+                               (self.handler._inventory_add_callback, "/ia price=abc\nmilk"),
+                               (self.handler._inventory_remove_callback, "/ir exp=2w\nmilk")]:
+            with patch("grocy_telegram_bot.commands.batch.send_message") as send_message:
+                callback(self._update(text), MagicMock())
+            self.assertNotIn("menu", send_message.call_args[1])
+        self.grocy.add_product.assert_not_called()
+
+    @staticmethod
+    def _message(text: str) -> Update:
+        return Update(1, message=Message(1, None, datetime.now(), Chat(1, Chat.PRIVATE), text=text))
+
+    @staticmethod
+    def _update(text: str) -> MagicMock:
+        update = MagicMock()
+        update.effective_message.text = text
+        return update
@@ -0,0 +1,26 @@
+from grocy_telegram_bot.telegram_util import ShoppingListItemButtonCallbackData
+from tests import BenchmarkBase
+
+
+class CallbackDataCodecBenchmark(BenchmarkBase):
+
+    def setUp(self):
+        self.callback_data = ShoppingListItemButtonCallbackData(
+            shopping_list_item_id=12345,
+            button_click_count=3,
+            shopping_list_amount=12
+        )
+        self.minified = self.callback_data.minify()
+        self.encoded = self.callback_data.encode()
+
+    def test_size(self):
+        print(f"minify: {len(self.minified)} bytes, encode: {len(self.encoded)} bytes")
+        self.assertLess(len(self.encoded), len(self.minified))
+
+    def test_encode(self):
+        self.benchmark("minify", self.callback_data.minify, number=10000)
+        self.benchmark("encode", self.callback_data.encode, number=10000)
+
+    def test_decode(self):
+        self.benchmark("parse", lambda: ShoppingListItemButtonCallbackData.parse(self.minified), number=10000)
+        self.benchmark("decode", lambda: ShoppingListItemButtonCallbackData.decode(self.encoded), number=10000)
@@ -0,0 +1,67 @@
+from grocy_telegram_bot.telegram_util import ShoppingListItemButtonCallbackData, CallbackDataCodec, FIELD_INT, \
+    FIELD_STR, MAX_TYPE_TAG
+from tests import TestBase
+
+
+class CallbackDataCodecTest(TestBase):
+
+    def test_encode_decode(self):
+        callback_data = ShoppingListItemButtonCallbackData(
+            shopping_list_item_id=123,
+            button_click_count=0,
+            shopping_list_amount=3
+        )
+
+        encoded = callback_data.encode()
+        self.assertLess(len(encoded), len(callback_data.minify()))
+
+        decoded = ShoppingListItemButtonCallbackData.decode(encoded)
+        self.assertEqual(vars(callback_data), vars(decoded))
+
+    def test_decode_minified(self):
+        decoded = ShoppingListItemButtonCallbackData.decode('{"c":"s","s":123,"b":0,"sh":3}')
+
+        self.assertEqual(decoded.shopping_list_item_id, 123)
+        self.assertEqual(decoded.button_click_count, 0)
+        self.assertEqual(decoded.shopping_list_amount, 3)
+
+    def test_field_types(self):
+        codec = CallbackDataCodec()
+
+        @codec.register(1, ("number", FIELD_INT), ("text", FIELD_STR))
+        class Data:
+            def __init__(self, number: int, text: str):
+                self.number = number
+                self.text = text
+
+        for number in [0, 1, -1, 63, -64, 64, 2 ** 40, -(2 ** 40)]:
+            for text in ["", "Milk", "Äpfel 🍎"]:
+                decoded = codec.decode(codec.encode(Data(number, text)))
+                self.assertEqual(decoded.number, number)
+                self.assertEqual(decoded.text, text)
+
+    def test_too_long(self):
+        codec = CallbackDataCodec()
+
+        @codec.register(1, ("text", FIELD_STR))
+        class Data:
+            def __init__(self, text: str):
+                self.text = text
+
+        self.assertRaises(ValueError, codec.encode, Data("x" * 64))
+
+    def test_type_tag_range(self):
+        codec = CallbackDataCodec()
+
+        class Data:
+            def __init__(self, number: int):
+                self.number = number
+
+        # encoded data must never look like legacy minified json
+        codec.register(MAX_TYPE_TAG, ("number", FIELD_INT))(Data)
+        for number in [0, 1, -1, 2 ** 20, -(2 ** 20), 2 ** 40]:
+            encoded = codec.encode(Data(number))
+            self.assertFalse(encoded.startswith("{"))
+            self.assertEqual(codec.decode(encoded).number, number)
+
+        self.assertRaises(ValueError, codec.register(MAX_TYPE_TAG + 1, ("number", FIELD_INT)), Data)
@@ -0,0 +1,134 @@
+import json
+from datetime import datetime, timedelta, timezone
+from http.client import HTTPConnection
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from grocy_telegram_bot.api import ApiServer, SnapshotStore
+from grocy_telegram_bot.events import EventBroker, EVENT_PRODUCT_AMOUNT_CHANGED, EVENT_SHOPPING_ITEM_ADDED, \
+    EVENT_CHORE_OVERDUE, EVENT_PRODUCT_EXPIRED
+from grocy_telegram_bot.monitoring.monitor import Monitor
+from tests import TestBase
+
+
+class EventBrokerTest(TestBase):
+
+    def test_resume(self):
+        broker = EventBroker(history_size=3)
+        for i in range(5):
+            broker.publish(EVENT_PRODUCT_AMOUNT_CHANGED, {"id": i})
+
+        subscription, missed, complete = broker.subscribe(after=3)
+        self.assertTrue(complete)
+        self.assertEqual(list(map(lambda x: x.seq, missed)), [4, 5])
+
+        broker.publish(EVENT_PRODUCT_AMOUNT_CHANGED, {"id": 5})
+        self.assertEqual(list(map(lambda x: x.seq, subscription.get(timeout=1))), [6])
+        subscription.close()
+
+        # events 2 and 3 are not in the history anymore
+        subscription, missed, complete = broker.subscribe(after=1)
+        self.assertFalse(complete)
+        self.assertEqual(list(map(lambda x: x.seq, missed)), [4, 5, 6])
+
+        # sequence number of a previous run
+        subscription, missed, complete = broker.subscribe(after=100)
+        self.assertFalse(complete)
+
+    def test_overflow(self):
+        broker = EventBroker(subscriber_buffer_size=2)
+        slow, _, _ = broker.subscribe()
+        fast, _, _ = broker.subscribe()
+        for i in range(3):
+            broker.publish(EVENT_PRODUCT_AMOUNT_CHANGED, {"id": i})
+            fast.get(timeout=1)
+
+        self.assertTrue(slow.overflowed)
+        self.assertEqual(len(slow.get(timeout=1)), 2)
+        self.assertFalse(fast.closed)
+
+
+class EventStreamTest(TestBase):
+
+    def setUp(self):
+        self.broker = EventBroker()
+        self.server = ApiServer(listen="127.0.0.1", port=0, snapshots=SnapshotStore({}, max_age=60),
+                                events=self.broker)
+        self.server.start()
+
+    def tearDown(self):
+        self.broker.close()
+        self.server.shutdown()
+
+    def test_sse(self):
+        self.broker.publish(EVENT_PRODUCT_AMOUNT_CHANGED, {"id": 1})
+        self.broker.publish(EVENT_PRODUCT_AMOUNT_CHANGED, {"id": 2})
+
+        connection, response = self._connect("/api/events", {"Last-Event-ID": "1"})
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+        self.broker.publish(EVENT_SHOPPING_ITEM_ADDED, {"id": 3})
+        self.broker.close()
+        body = response.read().decode()
+        connection.close()
+
+        events = list(filter(lambda x: x.startswith("id: "), body.split("\n\n")))
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0].split("\n")[:2], ["id: 2", f"event: {EVENT_PRODUCT_AMOUNT_CHANGED}"])
+        self.assertEqual(events[1].split("\n")[:2], ["id: 3", f"event: {EVENT_SHOPPING_ITEM_ADDED}"])
+        self.assertEqual(json.loads(events[1].split("data: ", 1)[1])["data"], {"id": 3})
+
+    def test_ndjson(self):
+        self.broker.publish(EVENT_PRODUCT_AMOUNT_CHANGED, {"id": 1})
+
+        connection, response = self._connect("/api/events?format=ndjson&after=5")
+        self.broker.close()
+        lines = list(filter(None, response.read().decode().split("\n")))
+        connection.close()
+
+        self.assertEqual(response.getheader("Content-Type"), "application/x-ndjson")
+        events = list(map(json.loads, lines))
+        self.assertEqual(events[0]["type"], "gap")
+        self.assertEqual(events[1]["seq"], 1)
+
+        connection, response = self._connect("/api/events?after=abc")
+        self.assertEqual(response.status, 400)
+        connection.close()
+
+    def _connect(self, path: str, headers: dict = None):
+        connection = HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+        connection.request("GET", path, headers=headers or {})
+        return connection, connection.getresponse()
+
+
+class MonitorEventsTest(TestBase):
+
+    def setUp(self):
+        self.broker = EventBroker()
+        self.monitor = Monitor(timedelta(seconds=60), MagicMock(), MagicMock(), self.broker)
+        self.subscription, _, _ = self.broker.subscribe()
+
+    def test_events(self):
+        now = datetime.now(tz=timezone.utc)
+        expired = SimpleNamespace(id=3, name="Milk", available_amount="1", best_before_date=now - timedelta(days=1))
+        chore = SimpleNamespace(id=4, name="Dishes", next_estimated_execution_time=now - timedelta(hours=1))
+        item = SimpleNamespace(id=5, product_id=1, amount="2", note=None, product=SimpleNamespace(name="Apple"))
+
+        self.monitor.on_stock_update(None, [self._product(1, "2")])
+        self.monitor.on_stock_update([self._product(1, "2"), self._product(2, "1")],
+                                     [self._product(1, "3"), self._product(2, "1")])
+        self.monitor.on_volatile_stock_update([], [expired])
+        self.monitor.on_chore_update([], [chore])
+        self.monitor.on_shopping_list_update([], [item])
+
+        events = self.subscription.get(timeout=1)
+        self.assertEqual(list(map(lambda x: x.type, events)), [
+            EVENT_PRODUCT_AMOUNT_CHANGED, EVENT_PRODUCT_EXPIRED, EVENT_CHORE_OVERDUE, EVENT_SHOPPING_ITEM_ADDED])
+        self.assertEqual(events[0].data["amount"], 3)
+        self.assertEqual(events[0].data["previous_amount"], 2)
+        self.assertEqual(events[1].data["id"], 3)
+        self.assertEqual(events[2].data["name"], "Dishes")
+        self.assertEqual(events[3].data["name"], "Apple")
+
+    @staticmethod
+    def _product(id: int, amount: str) -> SimpleNamespace:
+        return SimpleNamespace(id=id, name=f"Product {id}", available_amount=amount, best_before_date=None)
@@ -0,0 +1,61 @@
+import threading
+import time
+
+from prometheus_client import REGISTRY
+
+from grocy_telegram_bot.bot.executor import ChatOrderedExecutor
+from tests import TestBase
+
+
+class ChatOrderedExecutorTest(TestBase):
+
+    def test_same_key_is_ordered(self):
+        executor = ChatOrderedExecutor(workers=4)
+        results = []
+
+        def task(i: int):
+            # later tasks finish faster, so any reordering would show up
+            time.sleep(0.01 * (10 - i))
+            results.append(i)
+
+        for i in range(10):
+            executor.submit("chat", task, i)
+        executor.shutdown()
+
+        self.assertEqual(results, list(range(10)))
+
+    def test_different_keys_run_in_parallel(self):
+        executor = ChatOrderedExecutor(workers=2)
+        barrier = threading.Barrier(2, timeout=5)
+        results = []
+
+        def task(key: str):
+            # would time out if both keys were processed sequentially
+            barrier.wait()
+            results.append(key)
+
+        executor.submit("a", task, "a")
+        executor.submit("b", task, "b")
+        executor.shutdown()
+
+        self.assertCountEqual(results, ["a", "b"])
+
+    def test_queue_depth(self):
+        executor = ChatOrderedExecutor(workers=1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        executor.submit("a", block)
+        self.assertTrue(started.wait(5))
+        for key in ["a", "b", "c"]:
+            executor.submit(key, lambda: None)
+
+        # waiting updates of all chats are counted in a single time series
+        self.assertEqual(REGISTRY.get_sample_value("handler_queue_depth"), 3)
+        release.set()
+        executor.shutdown()
+        self.assertEqual(REGISTRY.get_sample_value("handler_queue_depth"), 0)
@@ -0,0 +1,33 @@
+import tracemalloc
+
+from grocy_telegram_bot.export import create_export, EXPORT_FORMATS, EXPORT_SPOOL_MAX_SIZE
+from tests import BenchmarkBase
+
+ROW_COUNT = 50000
+
+
+def _rows():
+    for i in range(ROW_COUNT):
+        yield [i % 10, f"Product {i}", "2020-01-20"]
+
+
+class ExportBenchmark(BenchmarkBase):
+
+    def test_memory(self):
+        for export_format in EXPORT_FORMATS:
+            tracemalloc.start()
+            with create_export(["amount", "name", "best_before_date"], _rows(), export_format) as file:
+                file.seek(0, 2)
+                size = file.tell()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"{export_format}: {ROW_COUNT} rows, {size / 1024:.0f} KiB file, {peak / 1024:.0f} KiB peak memory")
+            # the file is larger than the spool size, so it must have been written to disk
+            self.assertGreater(size, EXPORT_SPOOL_MAX_SIZE)
+            self.assertLess(peak, 2 * EXPORT_SPOOL_MAX_SIZE)
+
+    def test_time(self):
+        for export_format in EXPORT_FORMATS:
+            self.benchmark(export_format, lambda: create_export(["a", "b", "c"], _rows(), export_format).close(),
+                           number=1)
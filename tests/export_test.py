@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+from unittest.mock import MagicMock
+
+# the bot package has to be imported before any command module, to resolve their circular import
+import grocy_telegram_bot.bot  # noqa: F401
+from grocy_telegram_bot.cache import GrocyCached, get_cache
+from grocy_telegram_bot.commands.export import ExportCommandHandler, EXPORT_LIST_INVENTORY
+from grocy_telegram_bot.export import create_export, EXPORT_FORMAT_CSV, EXPORT_FORMAT_JSON
+from grocy_telegram_bot.testing.grocy import FakeGrocyDataset, FakeGrocyServer
+from tests import TestBase
+
+COLUMNS = ["amount", "name", "best_before_date"]
+ROWS = [[2, "Milk", "2020-01-20"], [1, "Bread, sliced", None]]
+
+
+class ExportTest(TestBase):
+
+    def test_csv(self):
+        with create_export(COLUMNS, iter(ROWS), EXPORT_FORMAT_CSV) as file:
+            rows = list(csv.reader(io.TextIOWrapper(file, encoding="utf-8", newline="")))
+
+        self.assertEqual(rows, [COLUMNS, ["2", "Milk", "2020-01-20"], ["1", "Bread, sliced", ""]])
+
+    def test_json(self):
+        with create_export(COLUMNS, iter(ROWS), EXPORT_FORMAT_JSON) as file:
+            data = json.load(file)
+
+        self.assertEqual(data, [
+            {"amount": 2, "name": "Milk", "best_before_date": "2020-01-20"},
+            {"amount": 1, "name": "Bread, sliced", "best_before_date": None},
+        ])
+
+    def test_empty_json(self):
+        with create_export(COLUMNS, iter([]), EXPORT_FORMAT_JSON) as file:
+            self.assertEqual(json.load(file), [])
+
+
+class ExportCommandTest(TestBase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.server = FakeGrocyServer(FakeGrocyDataset(products=50), api_key="key")
+        self.server.start()
+        self.grocy = GrocyCached(base_url=self.server.base_url, api_key="key", port=self.server.port)
+        self.handler = ExportCommandHandler(MagicMock(), self.grocy, MagicMock(), MagicMock(), MagicMock())
+
+    def tearDown(self):
+        self.server.shutdown()
+        get_cache().clear()
+
+    def test_inventory_contains_every_product_once(self):
+        context = MagicMock()
+        rows = []
+        context.bot.send_document.side_effect = lambda *args, document, **kwargs: rows.extend(json.load(document))
+
+        # call the command without argument parsing and permission checks
+        ExportCommandHandler._export_callback.__wrapped__(
+            self.handler, MagicMock(), context, EXPORT_LIST_INVENTORY, EXPORT_FORMAT_JSON)
+
+        ids = set(map(lambda x: x.id, self.grocy.get_all_products()))
+        self.assertTrue(len(self.grocy.get_all_products()) > len(ids))
+        self.assertEqual(len(rows), len(ids))
+        self.assertEqual(list(map(lambda x: x["name"], rows)), sorted(map(lambda x: x["name"], rows), key=str.lower))
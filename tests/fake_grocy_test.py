@@ -0,0 +1,91 @@
+from unittest.mock import patch
+
+from requests import HTTPError
+
+from grocy_telegram_bot.cache import GrocyCached, get_cache
+from grocy_telegram_bot.testing.grocy import FakeGrocyDataset, FakeGrocyServer
+from tests import TestBase
+
+
+class FakeGrocyTest(TestBase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.dataset = FakeGrocyDataset(products=50, chores=5, shopping_list_items=3)
+        self.server = FakeGrocyServer(self.dataset, api_key="key")
+        self.server.start()
+        self.grocy = GrocyCached(base_url=self.server.base_url, api_key="key", port=self.server.port)
+
+    def tearDown(self):
+        self.server.shutdown()
+        get_cache().clear()
+
+    def test_dataset_is_reproducible(self):
+        other = FakeGrocyDataset(products=50, chores=5, shopping_list_items=3)
+        self.assertEqual(self.dataset.products, other.products)
+        self.assertEqual(self.dataset.stock, other.stock)
+
+    def test_unique_products(self):
+        ids = list(map(lambda x: x.id, self.grocy.get_all_products()))
+        # products in stock are also part of the expiring, expired or missing products
+        duplicate_ids = set(filter(lambda x: ids.count(x) > 1, ids))
+        self.assertTrue(len(duplicate_ids) > 0)
+
+        products = self.grocy.get_unique_products()
+        self.assertEqual(sorted(map(lambda x: x.id, products)), sorted(set(ids)))
+
+        index = self.grocy.get_product_index()
+        for product in filter(lambda x: x.id in duplicate_ids, products):
+            matches = index.search(product.name)
+            self.assertEqual(list(map(lambda x: (x[0].id, x[1]), matches)), [(product.id, 100)])
+
+    def test_read(self):
+        products = self.grocy.get_all_products()
+        self.assertTrue(len(products) > 0)
+        self.assertTrue(all(map(lambda x: x.name is not None, products)))
+
+        chores = self.grocy.chores(True)
+        self.assertEqual(len(chores), 5)
+        self.assertTrue(all(map(lambda x: x.name is not None, chores)))
+
+        shopping_list = self.grocy.shopping_list(True)
+        self.assertEqual(len(shopping_list), 3)
+        self.assertIsNotNone(self.grocy.get_last_db_changed())
+
+    def test_write(self):
+        product_id = next(iter(self.dataset.stock.keys()))
+        amount = self.dataset.stock_amount(product_id)
+        self.grocy.add_product(product_id, 2, 0)
+        self.assertEqual(self.dataset.stock_amount(product_id), amount + 2)
+        self.grocy.consume_product(product_id, amount + 2)
+        self.assertEqual(self.dataset.stock_amount(product_id), 0)
+
+        self.grocy.add_product_to_shopping_list(product_id, amount=2)
+        self.assertIn(product_id, map(lambda x: x["product_id"], self.dataset.shopping_list))
+        self.grocy.clear_shopping_list()
+        self.assertEqual(self.dataset.shopping_list, [])
+
+        self.assertIn(("POST", "stock/products/{id}/add"), self.server.request_count())
+
+    def test_product_pictures_are_not_cached(self):
+        cache = get_cache()
+        self.grocy.stock()
+        size = len(cache)
+
+        with patch.object(self.grocy._api_client, "download_file", return_value=b"image") as download_file:
+            self.assertEqual(self.grocy.download_product_picture("milk.jpg", 512), b"image")
+            self.grocy.download_product_picture("milk.jpg", 512)
+
+        self.assertEqual(download_file.call_count, 2)
+        # downloading doesn't invalidate the cached responses either
+        self.assertEqual(len(cache), size)
+
+    def test_error_injection(self):
+        self.server.error_rate = 1
+        with self.assertRaises(HTTPError):
+            self.grocy.chores()
+
+    def test_invalid_api_key(self):
+        grocy = GrocyCached(base_url=self.server.base_url, api_key="wrong", port=self.server.port)
+        with self.assertRaises(HTTPError):
+            grocy.stock()
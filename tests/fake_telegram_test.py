@@ -0,0 +1,64 @@
+from telegram import Bot, InlineKeyboardMarkup, InlineKeyboardButton
+
+from grocy_telegram_bot.testing.load import percentile, parse_mix, _SimulatedChat, ACTION_PRESS
+from grocy_telegram_bot.testing.telegram import FakeTelegramServer, inline_keyboard_buttons
+from tests import TestBase
+
+
+class FakeTelegramTest(TestBase):
+
+    def setUp(self):
+        self.server = FakeTelegramServer()
+        self.server.start()
+        self.calls = []
+        self.server.add_listener(lambda method, chat_id, data, message: self.calls.append((method, chat_id, message)))
+        self.bot = Bot("123456:TEST", base_url=self.server.base_url)
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def test_updates_and_replies(self):
+        self.assertEqual(self.bot.get_me().username, "fake_grocy_bot")
+
+        self.server.send_command(1000, "user", "/shopping")
+        updates = self.bot.get_updates(timeout=1)
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(updates[0].effective_message.text, "/shopping")
+        self.assertEqual(updates[0].effective_user.username, "user")
+        self.assertEqual(self.bot.get_updates(offset=updates[0].update_id + 1, timeout=0), [])
+
+        keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("Milk", callback_data="abc")]])
+        self.bot.send_message(1000, "Shopping List", reply_markup=keyboard)
+        method, chat_id, message = self.calls[-1]
+        self.assertEqual((method, chat_id), ("sendMessage", 1000))
+        self.assertEqual(inline_keyboard_buttons(message), [{"text": "Milk", "callback_data": "abc"}])
+
+        self.server.press_button(1000, "user", message, "abc")
+        updates = self.bot.get_updates(offset=updates[0].update_id + 1, timeout=1)
+        query = updates[0].callback_query
+        self.assertEqual(query.data, "abc")
+        self.bot.answer_callback_query(query.id, text="Checked off")
+        self.assertEqual(self.calls[-1][:2], ("answerCallbackQuery", 1000))
+
+    def test_reply_attribution(self):
+        # late replies to an earlier button press or command don't complete the pending update
+        self.assertFalse(_SimulatedChat._is_reply("editMessageReplyMarkup", {"message_id": 5}, ACTION_PRESS, "abc"))
+        self.assertFalse(_SimulatedChat._is_reply("answerCallbackQuery", {"callback_query_id": "xyz"},
+                                                  ACTION_PRESS, "abc"))
+        self.assertTrue(_SimulatedChat._is_reply("answerCallbackQuery", {"callback_query_id": "abc"},
+                                                 ACTION_PRESS, "abc"))
+
+        self.assertFalse(_SimulatedChat._is_reply("answerCallbackQuery", {"callback_query_id": "abc"},
+                                                  "inventory", "7"))
+        self.assertFalse(_SimulatedChat._is_reply("sendMessage", {"reply_to_message_id": 6}, "inventory", "7"))
+        self.assertTrue(_SimulatedChat._is_reply("sendMessage", {"reply_to_message_id": 7}, "inventory", "7"))
+        self.assertTrue(_SimulatedChat._is_reply("sendMessage", {"text": "Inventory"}, "inventory", "7"))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([5], 95), 5)
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("inventory:2, press:1.5"), {"inventory": 2, "press": 1.5})
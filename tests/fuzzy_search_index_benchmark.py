@@ -0,0 +1,36 @@
+import random
+
+from grocy_telegram_bot.search import FuzzySearchIndex
+from grocy_telegram_bot.util import fuzzy_match
+from tests import BenchmarkBase
+
+WORDS = ["organic", "whole", "milk", "cheese", "bread", "apple", "banana", "tomato", "sauce", "pasta", "rice",
+         "chicken", "beef", "butter", "yogurt", "juice", "orange", "coffee", "tea", "sugar", "flour", "salt",
+         "pepper", "oil", "vinegar", "honey", "jam", "cereal", "oats", "chocolate", "cookies", "chips"]
+
+
+class FuzzySearchIndexBenchmark(BenchmarkBase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.names = list({" ".join(rng.sample(WORDS, 3)) + f" {rng.randint(1, 999)}" for _ in range(10000)})
+        self.index = FuzzySearchIndex()
+        self.index.update(self.names)
+
+    def test_search(self):
+        term = "chese bred"
+        self.benchmark("fuzzy_match", lambda: fuzzy_match(term, self.names, limit=5), number=1)
+        self.benchmark("index search", lambda: self.index.search(term, limit=5), number=10)
+        self.benchmark("index search (exact)", lambda: self.index.search(self.names[0], limit=5), number=1000)
+        self.benchmark("index search (prefix)", lambda: self.index.search("mi", limit=5), number=10)
+
+    def test_update(self):
+        names = list(self.names)
+
+        def update():
+            # change 1% of the catalog
+            names[:100] = map(lambda x: x + " new", names[:100])
+            self.index.update(list(names))
+
+        self.benchmark("index build", lambda: FuzzySearchIndex().update(self.names), number=1)
+        self.benchmark("index update", update, number=10)
@@ -0,0 +1,32 @@
+from grocy_telegram_bot.search import FuzzySearchIndex
+from tests import TestBase
+
+
+class FuzzySearchIndexTest(TestBase):
+
+    def setUp(self):
+        self.index = FuzzySearchIndex()
+        self.index.update(["Atlanta Falcons", "New York Jets", "New York Giants", "Dallas Cowboys"])
+
+    def test_exact_match(self):
+        matches = self.index.search("new york-jets")
+
+        self.assertEqual(matches, [("New York Jets", 100)])
+
+    def test_fuzzy_match(self):
+        matches = self.index.search("new yrok gaints", limit=2)
+
+        self.assertEqual(len(matches), 2)
+        self.assertEqual(matches[0][0], "New York Giants")
+
+    def test_prefix_match(self):
+        matches = self.index.search("da")
+
+        self.assertEqual(list(map(lambda x: x[0], matches)), ["Dallas Cowboys"])
+
+    def test_update(self):
+        self.index.update(["Atlanta Falcons", "New York Jets", "Miami Dolphins"])
+
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.search("miami dolphins"), [("Miami Dolphins", 100)])
+        self.assertNotIn("Dallas Cowboys", map(lambda x: x[0], self.index.search("dallas")))
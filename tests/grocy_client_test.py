@@ -0,0 +1,59 @@
+from unittest import mock
+
+import requests
+from prometheus_client import REGISTRY
+
+from grocy_telegram_bot.grocy_client import endpoint_label, InstrumentedGrocyApiClient
+from tests import TestBase
+
+
+def _response(status_code: int, content: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    return response
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class GrocyClientTest(TestBase):
+
+    def test_endpoint_label(self):
+        self.assertEqual(endpoint_label("stock"), "stock")
+        self.assertEqual(endpoint_label("stock/products/12"), "stock/products/{id}")
+        self.assertEqual(endpoint_label("chores/3/execute"), "chores/{id}/execute")
+        self.assertEqual(endpoint_label("files/productpictures/bWlsay5qcGc=?force_serve_as=picture"),
+                         "files/productpictures/{file_name}")
+
+    def test_request_metrics(self):
+        client = InstrumentedGrocyApiClient("http://127.0.0.1", "key")
+        labels = {"endpoint": "stock/products/{id}", "method": "GET"}
+        count = _sample("grocy_request_seconds_count", **labels)
+        size = _sample("grocy_response_size_bytes_sum", **labels)
+
+        with mock.patch("requests.request", return_value=_response(200, b'{"id": 1}')) as request:
+            self.assertEqual(client._do_get_request("stock/products/1"), {"id": 1})
+
+        request.assert_called_once()
+        self.assertEqual(request.call_args[0], ("GET", "http://127.0.0.1:9192/api/stock/products/1"))
+        self.assertEqual(_sample("grocy_request_seconds_count", **labels), count + 1)
+        self.assertEqual(_sample("grocy_response_size_bytes_sum", **labels), size + 9)
+        self.assertEqual(_sample("grocy_requests_in_progress", **labels), 0)
+
+    def test_error_metrics(self):
+        client = InstrumentedGrocyApiClient("http://127.0.0.1", "key")
+        labels = {"endpoint": "objects/products/{id}", "method": "GET"}
+        not_found = _sample("grocy_request_error_count_total", error="404", **labels)
+        timeouts = _sample("grocy_request_error_count_total", error="Timeout", **labels)
+        count = _sample("grocy_request_seconds_count", **labels)
+
+        with mock.patch("requests.request", return_value=_response(404, b'')):
+            self.assertRaises(requests.HTTPError, client._do_get_request, "objects/products/1")
+        with mock.patch("requests.request", side_effect=requests.Timeout()):
+            self.assertRaises(requests.Timeout, client._do_get_request, "objects/products/1")
+
+        self.assertEqual(_sample("grocy_request_error_count_total", error="404", **labels), not_found + 1)
+        self.assertEqual(_sample("grocy_request_error_count_total", error="Timeout", **labels), timeouts + 1)
+        self.assertEqual(_sample("grocy_request_seconds_count", **labels), count + 2)
@@ -0,0 +1,80 @@
+import json
+import time
+from http.client import HTTPConnection
+from unittest.mock import MagicMock
+
+from grocy_telegram_bot.health import StatsServer, add_readiness_check, remove_readiness_check
+from grocy_telegram_bot.monitoring.watcher import RegularIntervalWorker
+from tests import TestBase
+
+
+class HealthTest(TestBase):
+
+    def setUp(self):
+        self.server = StatsServer(port=0, listen="127.0.0.1")
+        self.server.start()
+
+    def tearDown(self):
+        remove_readiness_check("first")
+        remove_readiness_check("second")
+        self.server.shutdown()
+
+    def test_healthz(self):
+        status, body = self._get("/healthz")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), {"status": "ok"})
+
+    def test_readyz(self):
+        ready = {"value": False}
+        add_readiness_check("first", lambda: (True, {"latency_ms": 5}))
+        add_readiness_check("second", lambda: (ready["value"], {}))
+
+        status, body = self._get("/readyz")
+        self.assertEqual(status, 503)
+        data = json.loads(body)
+        self.assertEqual(data["status"], "unavailable")
+        self.assertEqual(data["checks"]["first"], {"ok": True, "latency_ms": 5})
+        self.assertEqual(data["checks"]["second"], {"ok": False})
+
+        ready["value"] = True
+        status, body = self._get("/readyz")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)["status"], "ok")
+
+    def test_failing_check(self):
+        def check():
+            raise ValueError("broken")
+
+        add_readiness_check("first", check)
+        status, body = self._get("/readyz")
+        self.assertEqual(status, 503)
+        self.assertEqual(json.loads(body)["checks"]["first"], {"ok": False, "error": "broken"})
+
+    def test_metrics(self):
+        status, body = self._get("/metrics")
+        self.assertEqual(status, 200)
+        self.assertIn(b"python_info", body)
+
+    def test_watcher_is_alive(self):
+        worker = RegularIntervalWorker(10)
+        worker._run = MagicMock()
+        self.assertFalse(worker.is_alive())
+        worker.start()
+        try:
+            self.assertTrue(worker.is_alive())
+            # the first run is executed right away
+            while worker.last_success is None:
+                time.sleep(0.01)
+            worker.last_success -= 60
+            self.assertFalse(worker.is_alive())
+        finally:
+            worker.stop()
+
+    def _get(self, path: str) -> (int, bytes):
+        connection = HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
@@ -0,0 +1,37 @@
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from grocy_telegram_bot.bot.inline_keyboard_handler import InlineKeyboardHandler
+from grocy_telegram_bot.bot.state import InteractionStateStore
+from grocy_telegram_bot.telegram_util import ProductActionCallbackData, PRODUCT_ACTION_CONSUME
+from tests import TestBase
+
+
+class InlineKeyboardHandlerTest(TestBase):
+
+    def setUp(self):
+        self.handler = InlineKeyboardHandler(InteractionStateStore(max_entries=10, ttl=timedelta(minutes=1)))
+
+    def test_stateless_callback_of_inline_message(self):
+        callback = MagicMock()
+        self.handler.register_stateless_callback(ProductActionCallbackData.command_id, callback)
+
+        update = MagicMock()
+        # messages sent via inline query have no chat
+        update.effective_chat = None
+        update.callback_query.data = ProductActionCallbackData(42, PRODUCT_ACTION_CONSUME).encode()
+
+        self.handler.inline_keyboard_click_callback(update, MagicMock())
+
+        data = callback.call_args[0][2]
+        self.assertEqual(data.product_id, 42)
+        self.assertEqual(data.action, PRODUCT_ACTION_CONSUME)
+
+    def test_unknown_message(self):
+        update = MagicMock()
+        update.callback_query.data = '{"c":"s","s":1,"b":0,"sh":1}'
+        context = MagicMock()
+
+        self.handler.inline_keyboard_click_callback(update, context)
+
+        context.bot.answer_callback_query.assert_called_once_with(update.callback_query.id, text="Unknown message")
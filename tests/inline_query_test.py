@@ -0,0 +1,62 @@
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+# the bot package has to be imported before any command module, to resolve their circular import
+import grocy_telegram_bot.bot  # noqa: F401
+from grocy_telegram_bot.commands.inline_query import InlineQueryCommandHandler, INLINE_QUERY_CACHE_TIME
+from grocy_telegram_bot.search import FuzzySearchIndex
+from tests import TestBase
+
+
+class InlineQueryTest(TestBase):
+
+    def setUp(self):
+        self.refreshing = threading.Event()
+        self.release = threading.Event()
+        self.index = FuzzySearchIndex(key=lambda x: x.name)
+
+        def get_product_index():
+            self.refreshing.set()
+            self.release.wait(5)
+            self.index.update([SimpleNamespace(id=1, name="Milk", available_amount="2")])
+            return self.index
+
+        self.grocy = MagicMock(product_index=self.index)
+        self.grocy.get_product_index.side_effect = get_product_index
+        self.handler = InlineQueryCommandHandler(MagicMock(), self.grocy, MagicMock(), MagicMock(), MagicMock())
+
+    def tearDown(self):
+        self.release.set()
+
+    @patch("grocy_telegram_bot.commands.inline_query.CONFIG_ADMINS")
+    def test_refresh_in_background(self, _):
+        context = MagicMock()
+
+        # the index is cold, the answer must not wait for loading it
+        self.handler._inline_query_callback(self._update("milk"), context)
+        self.assertEqual(context.bot.answer_inline_query.call_args[1]["results"], [])
+        self.assertEqual(context.bot.answer_inline_query.call_args[1]["cache_time"], 0)
+        self.assertTrue(self.refreshing.wait(5))
+
+        # only a single refresh runs at a time
+        self.handler._inline_query_callback(self._update("mil"), context)
+        self.release.set()
+        self._wait_for_refresh()
+        self.assertEqual(self.grocy.get_product_index.call_count, 1)
+
+        self.handler._inline_query_callback(self._update("milk"), context)
+        kwargs = context.bot.answer_inline_query.call_args[1]
+        self.assertEqual(list(map(lambda x: x.title, kwargs["results"])), ["Milk"])
+        self.assertEqual(kwargs["cache_time"], INLINE_QUERY_CACHE_TIME)
+        self._wait_for_refresh()
+
+    def _wait_for_refresh(self):
+        self.handler._refresh_lock.acquire(timeout=5)
+        self.handler._refresh_lock.release()
+
+    @staticmethod
+    def _update(query: str) -> MagicMock:
+        update = MagicMock()
+        update.inline_query.query = query
+        return update
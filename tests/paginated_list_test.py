@@ -0,0 +1,90 @@
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from grocy_telegram_bot.bot.inline_keyboard_handler import InlineKeyboardHandler
+from grocy_telegram_bot.bot.paginated_list import PaginatedList, ListSnapshotCache
+from grocy_telegram_bot.bot.state import InteractionStateStore
+from grocy_telegram_bot.telegram_util import PageCallbackData
+from tests import TestBase
+
+
+class PaginatedListTest(TestBase):
+
+    def setUp(self):
+        self.state_store = InteractionStateStore(max_entries=10, ttl=timedelta(minutes=1))
+        self.keyboard_handler = InlineKeyboardHandler(self.state_store)
+        self.rendered_rows = []
+        self.queries = []
+
+        def load_rows(query):
+            self.queries.append(query)
+            return ["Header", *map(lambda x: [x], range(query["count"]))]
+
+        def render_rows(rows):
+            self.rendered_rows.extend(rows)
+            return list(map(lambda x: f"item {x[0]}", rows))
+
+        self.list = PaginatedList(self.keyboard_handler, "test", load_rows, render_rows, page_size=3, cache_rows=8)
+        self.bot = MagicMock()
+        self.bot.send_message.return_value.message_id = 2
+
+    def test_single_page(self):
+        self.list.send(self.bot, 1, "Title", {"count": 2})
+
+        kwargs = self.bot.send_message.call_args[1]
+        self.assertEqual(kwargs["text"], "Title\nHeader\nitem 0\nitem 1")
+        self.assertIsNone(kwargs["reply_markup"])
+        self.assertIsNone(self.state_store.get_message_state(1, 2))
+
+    def test_navigation(self):
+        self.list.send(self.bot, 1, "Title", {"count": 5})
+
+        kwargs = self.bot.send_message.call_args[1]
+        self.assertEqual(kwargs["text"], "Title\nHeader\nitem 0\nitem 1\n\nPage 1/2")
+        # only the visible page is rendered
+        self.assertEqual(self.rendered_rows, [[0], [1]])
+        # the rows are not part of the interaction state
+        self.assertNotIn("rows", self.state_store.get_message_state(1, 2)["callback_data"])
+
+        self._press_page(2, 1)
+        self.assertEqual(self.bot.edit_message_text.call_args[0][0], "Title\nitem 2\nitem 3\nitem 4\n\nPage 2/2")
+        self.assertEqual(self.state_store.get_message_state(1, 2)["callback_data"]["page"], 1)
+        # navigating doesn't load the list again
+        self.assertEqual(len(self.queries), 1)
+
+    def test_evicted_snapshot(self):
+        self.list.send(self.bot, 1, "Title", {"count": 5})
+        self.bot.send_message.return_value.message_id = 3
+        self.list.send(self.bot, 1, "Title", {"count": 4})
+
+        # the first list has been evicted, so it is loaded again
+        self._press_page(2, 1)
+        self.assertEqual(self.bot.edit_message_text.call_args[0][0], "Title\nitem 2\nitem 3\nitem 4\n\nPage 2/2")
+        self.assertEqual(self.queries, [{"count": 5}, {"count": 4}, {"count": 5}])
+
+    def _press_page(self, message_id: int, page: int):
+        update = MagicMock()
+        update.effective_chat.id = 1
+        update.effective_message.message_id = message_id
+        update.callback_query.data = PageCallbackData(page).encode()
+        self.keyboard_handler.inline_keyboard_click_callback(update, MagicMock(bot=self.bot))
+
+
+class ListSnapshotCacheTest(TestBase):
+
+    def test_bounded_by_rows(self):
+        cache = ListSnapshotCache(max_rows=5)
+        cache.put((1, 1), [1, 2])
+        cache.put((1, 2), [1, 2])
+        cache.get((1, 1))
+        cache.put((1, 3), [1, 2])
+
+        # the least recently used snapshot is evicted
+        self.assertIsNone(cache.get((1, 2)))
+        self.assertEqual(cache.get((1, 1)), [1, 2])
+        self.assertEqual(cache.get((1, 3)), [1, 2])
+
+        # snapshots larger than the cache are not cached at all
+        cache.put((1, 4), list(range(6)))
+        self.assertIsNone(cache.get((1, 4)))
+        self.assertEqual(cache.get((1, 1)), [1, 2])
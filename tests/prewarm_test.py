@@ -0,0 +1,71 @@
+import time
+from unittest import mock
+
+from pygrocy import Grocy
+
+from grocy_telegram_bot.cache import GrocyCached, invalidate_cache, get_cache
+from grocy_telegram_bot.prewarm import CachePrewarmer
+from grocy_telegram_bot.stats import PREFETCH_COUNT, PREFETCH_HIT_COUNT
+from tests import TestBase
+
+
+def _grocy_function(name: str, result=None) -> mock.MagicMock:
+    function = mock.MagicMock(return_value=result)
+    function.__qualname__ = name
+    return function
+
+
+def _wait_for(condition: callable, timeout: float = 5):
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.01)
+
+
+class CachePrewarmerTest(TestBase):
+
+    def setUp(self):
+        invalidate_cache()
+        product = mock.MagicMock(id=1, barcodes=["4006381333931"])
+        product.name = "Milk"
+        self.missing_products = _grocy_function("Grocy.missing_products", [product])
+        self.add_product = _grocy_function("Grocy.add_product")
+        self.patches = [
+            mock.patch.object(Grocy, "stock", _grocy_function("Grocy.stock", [])),
+            mock.patch.object(Grocy, "expiring_products", _grocy_function("Grocy.expiring_products", [])),
+            mock.patch.object(Grocy, "expired_products", _grocy_function("Grocy.expired_products", [])),
+            mock.patch.object(Grocy, "missing_products", self.missing_products),
+            mock.patch.object(Grocy, "add_product", self.add_product),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.grocy = GrocyCached(base_url="http://127.0.0.1", api_key="key")
+        self.prewarmer = CachePrewarmer(self.grocy)
+
+    def tearDown(self):
+        self.prewarmer.stop()
+        for patch in self.patches:
+            patch.stop()
+        invalidate_cache()
+
+    def test_prewarm(self):
+        hits = PREFETCH_HIT_COUNT.labels(function="GrocyCached.get_product_index")._value.get()
+
+        self.prewarmer.start()
+        self.assertTrue(self.prewarmer.ready.wait(5))
+
+        index = self.grocy.get_product_index()
+        self.assertEqual(index.search("Milk")[0][1], 100)
+        self.assertEqual(self.missing_products.call_count, 1)
+        self.assertEqual(PREFETCH_HIT_COUNT.labels(function="GrocyCached.get_product_index")._value.get(),
+                         hits + 1)
+
+    def test_prefetch_after_write(self):
+        self.prewarmer.start()
+        self.assertTrue(self.prewarmer.ready.wait(5))
+        count = PREFETCH_COUNT.labels(function="GrocyCached.get_all_products")._value.get()
+
+        self.grocy.add_product(1, 1, None)
+
+        _wait_for(lambda: PREFETCH_COUNT.labels(function="GrocyCached.get_all_products")._value.get() > count)
+        self.assertEqual(self.missing_products.call_count, 2)
+        self.assertTrue(any(map(lambda x: x.startswith("GrocyCached.get_all_products"), get_cache().keys())))
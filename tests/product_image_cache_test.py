@@ -0,0 +1,37 @@
+import tempfile
+from pathlib import Path
+
+from grocy_telegram_bot.images import ProductImageCache
+from tests import TestBase
+
+
+class ProductImageCacheTest(TestBase):
+
+    def test_get(self):
+        cache = ProductImageCache()
+        self.assertIsNone(cache.get(1, "milk.jpg"))
+
+        cache.put(1, "milk.jpg", "file_id_1")
+        self.assertEqual(cache.get(1, "milk.jpg"), "file_id_1")
+
+    def test_changed_picture(self):
+        cache = ProductImageCache()
+        cache.put(1, "milk.jpg", "file_id_1")
+
+        self.assertIsNone(cache.get(1, "new_milk.jpg"))
+
+    def test_remove(self):
+        cache = ProductImageCache()
+        cache.put(1, "milk.jpg", "file_id_1")
+        cache.remove(1)
+
+        self.assertIsNone(cache.get(1, "milk.jpg"))
+        self.assertEqual(len(cache), 0)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = Path(directory, "images.json")
+            ProductImageCache(file_path).put(1, "milk.jpg", "file_id_1")
+
+            cache = ProductImageCache(file_path)
+            self.assertEqual(cache.get(1, "milk.jpg"), "file_id_1")
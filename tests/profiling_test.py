@@ -0,0 +1,74 @@
+import threading
+from time import sleep
+
+from grocy_telegram_bot.profiling import sample_stacks, format_collapsed_stacks, format_top_functions, \
+    trace_allocations, ProfilerBusyError
+from tests import TestBase
+
+
+def _busy_worker(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class ProfilingTest(TestBase):
+
+    def test_sample_stacks(self):
+        stop = threading.Event()
+        thread = threading.Thread(target=_busy_worker, args=(stop,), name="busy", daemon=True)
+        thread.start()
+        try:
+            stacks = sample_stacks(0.2, interval=0.01, thread_names="busy")
+        finally:
+            stop.set()
+            thread.join()
+
+        busy_stacks = list(filter(lambda x: x.startswith("busy;"), stacks))
+        self.assertTrue(len(busy_stacks) > 0)
+        self.assertTrue(any(map(lambda x: "profiling_test.py:_busy_worker" in x, busy_stacks)))
+
+        collapsed = format_collapsed_stacks(stacks)
+        for line in collapsed.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            self.assertEqual(stacks[stack], int(count))
+
+        self.assertIn("profiling_test.py:_busy_worker", format_top_functions(stacks))
+
+    def test_idle_threads(self):
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=_busy_worker, args=(stop,), name="handler_0", daemon=True),
+            threading.Thread(target=stop.wait, name="handler_1", daemon=True),
+            threading.Thread(target=_busy_worker, args=(stop,), name="other", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            stacks = sample_stacks(0.2, interval=0.01)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        # threads waiting for something are not sampled, just like threads not doing the work of the bot
+        self.assertEqual(set(map(lambda x: x.split(";", 1)[0], stacks)), {"handler_0"})
+        top = format_top_functions(stacks).splitlines()[3]
+        self.assertTrue(top.endswith("profiling_test.py:_busy_worker"))
+        self.assertGreater(float(top.split()[0]), 50)
+
+    def test_single_profile_at_a_time(self):
+        thread = threading.Thread(target=sample_stacks, args=(0.3,), daemon=True)
+        thread.start()
+        sleep(0.05)
+        try:
+            with self.assertRaises(ProfilerBusyError):
+                sample_stacks(0.1)
+        finally:
+            thread.join()
+
+    def test_trace_allocations(self):
+        import tracemalloc
+
+        report = trace_allocations(0.05, limit=5)
+        self.assertIn("Largest growth:", report)
+        self.assertFalse(tracemalloc.is_tracing())
@@ -0,0 +1,43 @@
+import random
+from datetime import datetime, timezone, timedelta
+from unittest.mock import MagicMock
+
+from babel.dates import format_date
+from emoji import emojize
+
+from grocy_telegram_bot.render import render_products
+from tests import BenchmarkBase
+
+
+def _product_to_str(item) -> str:
+    # rendering as it was done before, without any caching
+    from pygrocy.utils import parse_int
+    amount = parse_int(item.available_amount, 0)
+
+    text = f"{amount}x\t{item.name}"
+    if item.best_before_date is not None:
+        text += f" (Exp: {format_date(item.best_before_date.astimezone().date(), locale='en')})"
+    return text
+
+
+class RenderBenchmark(BenchmarkBase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        today = datetime.now(tz=timezone.utc)
+        self.products = []
+        for i in range(5000):
+            product = MagicMock(available_amount=str(rng.randint(0, 10)),
+                                best_before_date=today + timedelta(days=rng.randint(0, 60)))
+            product.name = f"Product {i}"
+            self.products.append(product)
+
+    def test_render_inventory(self):
+        def render_uncached():
+            emojize("\n".join(map(_product_to_str, self.products)), use_aliases=True)
+
+        def render():
+            "\n".join(render_products(self.products))
+
+        self.benchmark("uncached", render_uncached, number=3)
+        self.benchmark("render_products", render, number=3)
@@ -0,0 +1,40 @@
+from datetime import datetime, timezone, timedelta
+from unittest.mock import MagicMock
+
+from grocy_telegram_bot.render import render_products, render_chores, format_date, Template
+from tests import TestBase
+
+
+class RenderTest(TestBase):
+
+    def test_render_products(self):
+        best_before_date = datetime(2020, 1, 20, 12, tzinfo=timezone.utc)
+        products = [
+            MagicMock(available_amount="2", best_before_date=best_before_date),
+            MagicMock(available_amount=None, best_before_date=None),
+        ]
+        products[0].name = "Milk"
+        products[1].name = "Bread"
+
+        texts = render_products(products)
+
+        self.assertEqual(texts, [
+            f"2x\tMilk (Exp: {format_date(best_before_date.astimezone().date())})",
+            "0x\tBread",
+        ])
+
+    def test_render_chores(self):
+        chore = MagicMock(next_estimated_execution_time=datetime.now(tz=timezone.utc) + timedelta(days=3, hours=1))
+        chore.name = "Vacuum"
+
+        text = render_chores([chore])[0]
+
+        self.assertTrue(text.startswith("Vacuum\n  Due: 3 days"))
+
+    def test_format_date(self):
+        self.assertEqual(format_date(datetime(2020, 1, 20).date(), "de"), "20.01.2020")
+
+    def test_template(self):
+        template = Template(":thumbsup: {name}")
+
+        self.assertEqual(template.render(name=":x:"), "👍 :x:")
@@ -0,0 +1,55 @@
+from unittest.mock import MagicMock, patch
+
+# the bot package has to be imported before any command module, to resolve their circular import
+import grocy_telegram_bot.bot  # noqa: F401
+from grocy_telegram_bot.commands.shopping_list import ShoppingListCommandHandler, AddToInventoryError
+from tests import TestBase
+
+
+class ShoppingListCheckOffTest(TestBase):
+
+    def setUp(self):
+        self.grocy = MagicMock()
+        self.inline_keyboard_handler = MagicMock()
+        self.inline_keyboard_handler.get_listener_data.return_value = {
+            "items": {"7": {"product_id": 3, "product_name": "Milk", "amount": 2, "button_click_count": 2}}
+        }
+        self.handler = ShoppingListCommandHandler(MagicMock(), self.grocy, MagicMock(), self.inline_keyboard_handler,
+                                                  MagicMock())
+
+    def test_check_off(self):
+        # the api client returns the parsed json response
+        self.grocy.remove_product_in_shopping_list.return_value = None
+        self.grocy.add_product.return_value = [{"id": 1}]
+
+        self.handler._check_off_shopping_list_product(3, 1, 2)
+
+        self.grocy.remove_product_in_shopping_list.assert_called_once_with(3, 1, amount=2)
+        self.assertEqual(self.grocy.add_product.call_args[1]["amount"], 2)
+
+    def test_remove_failed(self):
+        self.grocy.remove_product_in_shopping_list.side_effect = ConnectionError()
+
+        self.assertRaises(ConnectionError, self.handler._check_off_shopping_list_product, 3, 1, 2)
+        self.grocy.add_product.assert_not_called()
+
+        with patch("grocy_telegram_bot.commands.shopping_list.send_message") as send_message:
+            self.handler._undo_check_off(MagicMock(), 1, 2, 7, 2, ConnectionError())
+        item = self.inline_keyboard_handler.get_listener_data.return_value["items"]["7"]
+        self.assertEqual(item["button_click_count"], 0)
+        self.assertIn("Failed to check off", send_message.call_args[0][2])
+
+    def test_add_failed(self):
+        self.grocy.add_product.side_effect = ConnectionError("timeout")
+
+        with self.assertRaises(AddToInventoryError) as context:
+            self.handler._check_off_shopping_list_product(3, 1, 2)
+
+        bot = MagicMock()
+        with patch("grocy_telegram_bot.commands.shopping_list.send_message") as send_message:
+            self.handler._undo_check_off(bot, 1, 2, 7, 2, context.exception)
+        # the product has been removed from the shopping list, so the buttons are kept
+        item = self.inline_keyboard_handler.get_listener_data.return_value["items"]["7"]
+        self.assertEqual(item["button_click_count"], 2)
+        bot.edit_message_reply_markup.assert_not_called()
+        self.assertIn("failed to add it to the inventory", send_message.call_args[0][2])
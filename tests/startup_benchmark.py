@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+from tests import BenchmarkBase
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import_time(module: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Imports a module in a new interpreter using "python -X importtime"
+    :param module: the module to import
+    :return: module name -> (self time, cumulative time) in microseconds
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=PROJECT_DIR, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, cumulative_time, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_time), int(cumulative_time))
+    return times
+
+
+class StartupBenchmark(BenchmarkBase):
+
+    def test_import_time(self):
+        runs = list(map(lambda x: measure_import_time("grocy_telegram_bot.bot"), range(5)))
+        best = min(runs, key=lambda x: x["grocy_telegram_bot.bot"][1])
+
+        print(f"import grocy_telegram_bot.bot: {best['grocy_telegram_bot.bot'][1] / 1000:.1f} ms")
+        own_modules = filter(lambda x: x[0].startswith("grocy_telegram_bot"), best.items())
+        for name, (self_time, _) in sorted(own_modules, key=lambda x: x[1][0], reverse=True)[:10]:
+            print(f"  {name}: {self_time / 1000:.1f} ms")
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+from tests import TestBase
+from tests.startup_benchmark import PROJECT_DIR
+
+# modules that are only needed once the bot is actually used
+DEFERRED_MODULES = ["babel", "emoji", "fuzzywuzzy"]
+
+
+class StartupTest(TestBase):
+
+    def test_deferred_imports(self):
+        script = "\n".join([
+            "import sys",
+            "import grocy_telegram_bot.bot",
+            "from grocy_telegram_bot.config import Config",
+            "print(len(Config._instances))",
+            f"print(','.join(filter(lambda x: x in sys.modules, {DEFERRED_MODULES})))",
+        ])
+        result = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_DIR, stdout=subprocess.PIPE,
+                                universal_newlines=True, check=True)
+        config_instances, loaded_modules = result.stdout.splitlines()
+
+        # the configuration is only loaded when the bot is created
+        self.assertEqual(config_instances, "0")
+        self.assertEqual(loaded_modules, "")
@@ -0,0 +1,75 @@
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from grocy_telegram_bot.bot.state import InteractionStateStore
+from tests import TestBase
+
+
+class InteractionStateStoreTest(TestBase):
+
+    def test_message_and_user_state(self):
+        store = InteractionStateStore(max_entries=10, ttl=timedelta(minutes=1))
+        store.put_message_state(1, 2, {"a": 1})
+        store.put_user_state(1, {"b": 2})
+
+        self.assertEqual(store.get_message_state(1, 2), {"a": 1})
+        self.assertEqual(store.get_user_state(1), {"b": 2})
+        self.assertIsNone(store.get_message_state(1, 3))
+
+        self.assertEqual(store.pop_user_state(1), {"b": 2})
+        self.assertIsNone(store.get_user_state(1))
+
+    def test_least_recently_used_is_evicted(self):
+        store = InteractionStateStore(max_entries=2, ttl=timedelta(minutes=1))
+        store.put_message_state(1, 1, {})
+        store.put_message_state(1, 2, {})
+        # access the first one, so the second one is the least recently used
+        store.get_message_state(1, 1)
+        store.put_message_state(1, 3, {})
+
+        self.assertEqual(len(store), 2)
+        self.assertIsNotNone(store.get_message_state(1, 1))
+        self.assertIsNone(store.get_message_state(1, 2))
+        self.assertIsNotNone(store.get_message_state(1, 3))
+
+    def test_expiry(self):
+        store = InteractionStateStore(max_entries=10, ttl=timedelta(milliseconds=50))
+        store.put_message_state(1, 1, {})
+        time.sleep(0.1)
+
+        self.assertIsNone(store.get_message_state(1, 1))
+        self.assertEqual(len(store), 0)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = Path(directory, "state.json")
+            store = InteractionStateStore(max_entries=10, ttl=timedelta(minutes=1), file_path=file_path)
+            store.put_message_state(1, 2, {"items": {"3": {"product_id": 4}}})
+            # changes are written in the background, or when the store is stopped
+            self.assertFalse(file_path.exists())
+            store.stop()
+
+            restored = InteractionStateStore(max_entries=10, ttl=timedelta(minutes=1), file_path=file_path)
+            self.assertEqual(restored.get_message_state(1, 2), {"items": {"3": {"product_id": 4}}})
+            restored.stop()
+
+    def test_periodic_flush(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = Path(directory, "state.json")
+            store = InteractionStateStore(max_entries=10, ttl=timedelta(minutes=1), file_path=file_path,
+                                          flush_interval=timedelta(milliseconds=10))
+            try:
+                for i in range(100):
+                    store.put_message_state(1, i, {"a": i})
+                end = time.time() + 5
+                while not file_path.exists() and time.time() < end:
+                    time.sleep(0.01)
+                self.assertTrue(file_path.exists())
+            finally:
+                store.stop()
+
+            restored = InteractionStateStore(max_entries=10, ttl=timedelta(minutes=1), file_path=file_path)
+            self.assertEqual(restored.get_message_state(1, 99), {"a": 99})
+            restored.stop()
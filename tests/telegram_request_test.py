@@ -0,0 +1,51 @@
+from time import time
+from unittest import mock
+
+from prometheus_client import REGISTRY
+from telegram.error import RetryAfter
+from telegram.utils.request import Request
+
+from grocy_telegram_bot.bot.request import InstrumentedRequest, api_method_name, payload_size, handling_update
+from tests import TestBase
+
+URL = "https://api.telegram.org/bot123:abc/sendMessage"
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TelegramRequestTest(TestBase):
+
+    def test_api_method_name(self):
+        self.assertEqual(api_method_name(URL), "sendMessage")
+        self.assertEqual(api_method_name("https://api.telegram.org/file/bot123:abc/photos/file_1.jpg"),
+                         "downloadFile")
+
+    def test_payload_size(self):
+        self.assertEqual(payload_size({"body": b"12345"}), 5)
+        self.assertEqual(payload_size({"fields": {"chat_id": "12", "photo": ("image.jpeg", b"1234", "image/jpeg")}}),
+                         6)
+
+    def test_retry_after(self):
+        request = InstrumentedRequest()
+        count = _sample("telegram_retry_after_count_total", method="sendMessage")
+
+        with mock.patch.object(Request, "_request_wrapper", side_effect=RetryAfter(3)):
+            self.assertRaises(RetryAfter, request._request_wrapper, "POST", URL, body=b"{}")
+
+        self.assertEqual(_sample("telegram_retry_after_count_total", method="sendMessage"), count + 1)
+
+    def test_update_reply_time(self):
+        request = InstrumentedRequest()
+        count = _sample("update_reply_seconds_count")
+
+        with mock.patch.object(Request, "_request_wrapper", return_value=b'{"ok": true, "result": {}}'):
+            with handling_update(time()):
+                request._request_wrapper("POST", URL, body=b"{}")
+                request._request_wrapper("POST", URL, body=b"{}")
+            request._request_wrapper("POST", URL, body=b"{}")
+
+        # only the first reply to an update is measured
+        self.assertEqual(_sample("update_reply_seconds_count"), count + 1)
+        self.assertGreaterEqual(_sample("telegram_request_seconds_count", method="sendMessage"), 3)
@@ -0,0 +1,70 @@
+import json
+import tempfile
+from pathlib import Path
+
+from grocy_telegram_bot.tracing import RingBufferExporter, JsonLinesExporter, add_exporter, remove_exporter, trace, \
+    span, record_span, format_trace, NOOP_SPAN
+from tests import TestBase
+
+
+class TracingTest(TestBase):
+
+    def setUp(self):
+        self.buffer = RingBufferExporter(capacity=2)
+        add_exporter(self.buffer)
+
+    def tearDown(self):
+        remove_exporter(self.buffer)
+
+    def test_trace(self):
+        with trace("update", handler="inventory"):
+            record_span("queue", 1.0, 1.5)
+            with span("grocy", function="get_all_products") as s:
+                s.set(cache="miss")
+                with span("http", endpoint="stock"):
+                    pass
+
+        spans = self.buffer.traces()[-1]
+        self.assertEqual(list(map(lambda x: x.name, spans)), ["update", "queue", "grocy", "http"])
+        self.assertEqual(len(set(map(lambda x: x.trace_id, spans))), 1)
+        self.assertEqual(spans[3].parent_id, spans[2].span_id)
+        self.assertEqual(spans[2].attributes, {"function": "get_all_products", "cache": "miss"})
+        self.assertEqual(spans[1].duration, 0.5)
+
+        lines = format_trace(spans).splitlines()
+        self.assertTrue(lines[1].startswith("update "))
+        self.assertTrue(lines[4].startswith("    http "))
+
+    def test_ring_buffer(self):
+        for i in range(3):
+            with trace("update", index=i):
+                pass
+
+        traces = self.buffer.traces()
+        self.assertEqual(list(map(lambda x: x[0].attributes["index"], traces)), [1, 2])
+
+    def test_no_trace(self):
+        with span("grocy") as s:
+            self.assertIs(s, NOOP_SPAN)
+
+        remove_exporter(self.buffer)
+        with trace("update") as s:
+            self.assertIs(s, NOOP_SPAN)
+        self.assertEqual(len(self.buffer.traces()), 0)
+
+    def test_json_lines_exporter(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = Path(directory, "traces.jsonl")
+            exporter = JsonLinesExporter(file_path)
+            add_exporter(exporter)
+            try:
+                with trace("update"):
+                    with span("render"):
+                        pass
+            finally:
+                remove_exporter(exporter)
+
+            with open(file_path) as file:
+                spans = list(map(json.loads, file))
+
+        self.assertEqual(list(map(lambda x: x["name"], spans)), ["update", "render"])
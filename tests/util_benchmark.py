@@ -0,0 +1,128 @@
+import random
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# the bot package has to be imported before any command module, to resolve their circular import
+import grocy_telegram_bot.bot  # noqa: F401
+from grocy_telegram_bot.cache import GrocyCached, get_cache
+from grocy_telegram_bot.commands.shopping_list import ShoppingListCommandHandler
+from grocy_telegram_bot.telegram_util import ShoppingListItemButtonCallbackData
+from grocy_telegram_bot.util import filter_new_by_key, filter_expired_products, filter_expiring_products, \
+    fuzzy_match, product_to_str, chore_to_str
+from tests import BenchmarkBase
+
+SIZES = [10, 100, 1000, 10000, 100000]
+
+WORDS = ["organic", "whole", "milk", "cheese", "bread", "apple", "banana", "tomato", "sauce", "pasta", "rice",
+         "chicken", "beef", "butter", "yogurt", "juice", "orange", "coffee", "tea", "sugar", "flour", "salt"]
+
+
+def _sizes(maximum: int = SIZES[-1]):
+    return list(filter(lambda x: x <= maximum, SIZES))
+
+
+def _number(size: int, items: int = 10000) -> int:
+    """
+    :param size: number of items processed by a single execution
+    :param items: number of items to process per measurement
+    :return: number of executions per measurement
+    """
+    return max(1, items // size)
+
+
+def _products(size: int, rng: random.Random) -> list:
+    now = datetime.now(tz=timezone.utc)
+    products = []
+    for i in range(size):
+        products.append(SimpleNamespace(id=i, name=f"{' '.join(rng.sample(WORDS, 2))} {i}",
+                                        available_amount=str(rng.randint(0, 10)),
+                                        best_before_date=now + timedelta(days=rng.randint(-30, 60))))
+    return products
+
+
+def _chores(size: int, rng: random.Random) -> list:
+    now = datetime.now(tz=timezone.utc)
+    chores = []
+    for i in range(size):
+        chores.append(SimpleNamespace(id=i, name=f"Chore {i}",
+                                      next_estimated_execution_time=now + timedelta(days=rng.randint(-10, 10))))
+    return chores
+
+
+class UtilBenchmark(BenchmarkBase):
+
+    def setUp(self):
+        self.rng = random.Random(0)
+
+    def test_filter_new_by_key(self):
+        # filter_new_by_key scans the whole new list for every new item, larger sizes take too long
+        for size in _sizes(10000):
+            old = _products(size, self.rng)
+            # 1% of the items are new
+            new = old[size // 100:] + _products(max(1, size // 100), self.rng)
+            for i, product in enumerate(new[-max(1, size // 100):]):
+                product.id = size + i
+            self.benchmark(f"filter_new_by_key[{size}]", lambda: filter_new_by_key(old, new, key=lambda x: x.id),
+                           number=_number(size, 1000))
+
+    def test_filter_products(self):
+        for size in _sizes():
+            products = _products(size, self.rng)
+            self.benchmark(f"filter_expired_products[{size}]", lambda: filter_expired_products(products),
+                           number=_number(size))
+            self.benchmark(f"filter_expiring_products[{size}]", lambda: filter_expiring_products(products),
+                           number=_number(size))
+
+    def test_fuzzy_match(self):
+        for size in _sizes(10000):
+            products = _products(size, self.rng)
+            self.benchmark(f"fuzzy_match[{size}]",
+                           lambda: fuzzy_match("chese bred", products, limit=5, key=lambda x: x.name),
+                           number=_number(size, 1000))
+
+    def test_to_str(self):
+        for size in _sizes():
+            products = _products(size, self.rng)
+            chores = _chores(size, self.rng)
+            self.benchmark(f"product_to_str[{size}]", lambda: list(map(product_to_str, products)),
+                           number=_number(size))
+            self.benchmark(f"chore_to_str[{size}]", lambda: list(map(chore_to_str, chores)),
+                           number=_number(size))
+
+    def test_minifiable_data(self):
+        for size in _sizes():
+            data = [ShoppingListItemButtonCallbackData(i, i % 3, 3) for i in range(size)]
+            minified = list(map(lambda x: x.minify(), data))
+            self.benchmark(f"minify[{size}]", lambda: list(map(lambda x: x.minify(), data)),
+                           number=_number(size))
+            self.benchmark(f"parse[{size}]",
+                           lambda: list(map(ShoppingListItemButtonCallbackData.parse, minified)),
+                           number=_number(size))
+
+    def test_create_shopping_list_item_button_tuples(self):
+        config = MagicMock()
+        config.BOT_LIST_PAGE_SIZE.value = 10
+        config.BOT_SHOPPING_REMOVE_BUTTON_WHEN_COMPLETE.value = True
+        handler = ShoppingListCommandHandler(config, MagicMock(), MagicMock(), MagicMock(), MagicMock())
+        for size in _sizes():
+            items = {
+                str(i): {"product_id": i, "product_name": f"Product {i}", "amount": 3,
+                         "button_click_count": i % 4}
+                for i in range(size)
+            }
+            self.benchmark(f"create_shopping_list_item_button_tuples[{size}]",
+                           lambda: handler._create_shopping_list_item_button_tuples(items),
+                           number=_number(size))
+
+    def test_grocy_cached_overhead(self):
+        grocy = GrocyCached(base_url="http://127.0.0.1", api_key="key", port=9283)
+        # not a mock, since GrocyCached would wrap a callable attribute with the cache decorator
+        grocy._api_client = SimpleNamespace(get_stock=lambda: [])
+        get_cache().clear()
+        grocy.stock()
+
+        # cache hit, compared to calling the (mocked) api client directly
+        self.benchmark("GrocyCached.stock (hit)", grocy.stock, number=10000)
+        self.benchmark("api client get_stock", grocy._api_client.get_stock, number=10000)
+        get_cache().clear()
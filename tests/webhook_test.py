@@ -0,0 +1,68 @@
+import json
+from http.client import HTTPConnection
+from queue import Queue
+
+from telegram import Bot
+
+from grocy_telegram_bot.bot.webhook import WebhookServer, SECRET_TOKEN_HEADER
+from tests import TestBase
+
+
+class WebhookTest(TestBase):
+
+    def setUp(self):
+        self.update_queue = Queue()
+        self.server = WebhookServer(
+            listen="127.0.0.1",
+            port=0,
+            url_path="/telegram",
+            secret_token="secret",
+            bot=Bot("123456:ABC-DEF1234ghIkl-zyx57W2v1u123ew11"),
+            update_queue=self.update_queue,
+            workers=2
+        )
+        self.server.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def test_valid_update(self):
+        status = self._post("/telegram", self._generate_update_json(1), token="secret")
+
+        self.assertEqual(status, 200)
+        update = self.update_queue.get(timeout=5)
+        self.assertEqual(update.update_id, 1)
+        self.assertEqual(update.effective_message.text, "/help")
+
+    def test_invalid_secret_token(self):
+        self.assertEqual(self._post("/telegram", self._generate_update_json(1), token="wrong"), 403)
+        self.assertEqual(self._post("/telegram", self._generate_update_json(2), token=None), 403)
+        self.assertTrue(self.update_queue.empty())
+
+    def test_unknown_path(self):
+        self.assertEqual(self._post("/other", self._generate_update_json(1), token="secret"), 404)
+        self.assertTrue(self.update_queue.empty())
+
+    def _post(self, path: str, data: dict, token: str or None) -> int:
+        host, port = self.server.server_address
+        connection = HTTPConnection(host, port, timeout=5)
+        headers = {"Content-Type": "application/json"}
+        if token is not None:
+            headers[SECRET_TOKEN_HEADER] = token
+        connection.request("POST", path, body=json.dumps(data), headers=headers)
+        status = connection.getresponse().status
+        connection.close()
+        return status
+
+    @staticmethod
+    def _generate_update_json(update_id: int) -> dict:
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 1590000000,
+                "chat": {"id": 1, "type": "private"},
+                "from": {"id": 1, "is_bot": False, "first_name": "Test", "username": "myadminuser"},
+                "text": "/help"
+            }
+        }
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from grocy_telegram_bot.write_queue import GrocyWriteQueue
+from tests import TestBase
+
+
+class GrocyWriteQueueTest(TestBase):
+
+    def test_writes_are_coalesced(self):
+        queue = GrocyWriteQueue(delay=timedelta(minutes=1))
+        writes = []
+
+        queue.start()
+        for i in range(5):
+            queue.enqueue("milk", 1, write=lambda amount: writes.append(("milk", amount)))
+        queue.enqueue("eggs", 2, write=lambda amount: writes.append(("eggs", amount)))
+        # stopping executes all pending writes immediately
+        queue.stop()
+
+        self.assertCountEqual(writes, [("milk", 5), ("eggs", 2)])
+
+    def test_failed_write_is_undone(self):
+        queue = GrocyWriteQueue(delay=timedelta(milliseconds=10))
+        undone = []
+
+        def write(amount: int):
+            raise ConnectionError()
+
+        queue.start()
+        queue.enqueue("milk", 1, write=write, on_failure=lambda amount, ex: undone.append(amount))
+        queue.enqueue("milk", 2, write=write, on_failure=lambda amount, ex: undone.append(amount))
+        queue.stop()
+
+        self.assertEqual(undone, [1, 2])